@@ -22,8 +22,10 @@ from logs.logger_config import API_logger
 import traceback
 from flask import Flask, request, jsonify, Response
 import logging
-from database.database_manager import DatabaseManager
+from database.database_manager import DatabaseManager, UE_METRIC_FIELDS
 import re
+import json
+import itertools
 from influxdb_client import InfluxDBClient
 
 app = Flask(__name__)
@@ -60,6 +62,18 @@ def run_api(queue):
     app.run(debug=True, use_reloader=False)  # use_reloader=False is important to not spawn child processes
     
 ######################################################################################################################
+def query_options(*names):
+    """
+    Reads the optional query bounding arguments (start, window, aggregate, limit) of a metrics request.
+    The values are validated by DatabaseManager, which raises ValueError for invalid ones.
+    """
+    options = {name: request.args.get(name) for name in names if request.args.get(name) is not None}
+    if 'limit' in options:
+        if not options['limit'].isdigit():
+            raise ValueError("'limit' must be a positive integer.")
+        options['limit'] = int(options['limit'])
+    return options
+######################################################################################################################
 #This is an API for delete one ue from all place!
 @app.route('/del_ue', methods=['POST'])
 def del_ue():
@@ -107,17 +121,82 @@ def ue_metrics():
             return jsonify({'error': f"UE {ue_id} not found in the system"}), 404
 
         db_manager = DatabaseManager.get_instance()
-        metrics = db_manager.get_ue_metrics(ue_id)
+        options = query_options('start', 'window', 'aggregate', 'limit')
+        # Recent samples come from the cache of this process (filled from the database on a miss), bounded queries from the database
+        metrics = db_manager.get_ue_metrics(ue_id, **options) if options else db_manager.get_recent_ue_metrics(ue_id)
         if metrics:
             response = jsonify({'metrics': metrics})
             response.headers['Content-Type'] = 'application/json'
             return response, 200
         else:
             return jsonify({'message': f'No metrics found for UE {ue_id}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         API_logger.error(f"An error occurred while retrieving metrics for UE {ue_id}: {e}")
         return jsonify({'error': 'An error occurred while retrieving metrics'}), 500
 
+########################################################################################################################
+#This is an API for get the metrics of many UEs with one database query, given as a list of ue_ids or as every UE of a
+#sector or cell. The rows are streamed as NDJSON (one JSON object per line, default) or as columnar JSON per UE.
+@app.route('/ue_metrics/bulk', methods=['GET', 'POST'])
+def ue_metrics_bulk():
+    data = request.get_json(silent=True) or {}
+    ue_ids = data.get('ue_ids', request.args.get('ue_ids'))
+    sector_id = data.get('sector_id', request.args.get('sector_id'))
+    cell_id = data.get('cell_id', request.args.get('cell_id'))
+    output_format = data.get('format', request.args.get('format', 'ndjson'))
+    if isinstance(ue_ids, str):
+        ue_ids = [ue_id.strip() for ue_id in ue_ids.split(',') if ue_id.strip()]
+    if output_format not in ('ndjson', 'columnar'):
+        return jsonify({'error': "'format' must be 'ndjson' or 'columnar'"}), 400
+    if ue_ids is not None and not isinstance(ue_ids, list):
+        return jsonify({'error': "Invalid 'ue_ids'. Give a list of UE IDs or a comma separated string."}), 400
+    if ue_ids is not None and not all(re.match("^[a-zA-Z0-9]+$", str(ue_id)) for ue_id in ue_ids):
+        return jsonify({'error': "Invalid 'ue_ids'. Every UE ID must be alphanumeric."}), 400
+
+    try:
+        options = query_options('start', 'window', 'aggregate', 'limit')
+        options.update({name: data[name] for name in ('start', 'window', 'aggregate', 'limit') if name in data})
+        db_manager = DatabaseManager.get_instance()
+        rows = db_manager.get_bulk_ue_metrics(ue_ids=ue_ids, sector_id=sector_id, cell_id=cell_id, **options)
+        # Pull the first row before answering, so a failing query is reported with a status code
+        first = next(rows, None)
+        rows = itertools.chain([first], rows) if first is not None else iter(())
+        if output_format == 'columnar':
+            return Response(stream_columnar_metrics(rows), mimetype='application/json')
+        return Response(stream_ndjson_metrics(rows), mimetype='application/x-ndjson')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        API_logger.error(f"An error occurred while retrieving bulk UE metrics: {e}")
+        return jsonify({'error': 'An error occurred while retrieving metrics'}), 500
+
+def stream_ndjson_metrics(rows):
+    for row in rows:
+        row['timestamp'] = row['timestamp'].isoformat() if row['timestamp'] is not None else None
+        yield json.dumps(row) + '\n'
+
+def stream_columnar_metrics(rows):
+    """
+    Streams {"<ue_id>": {"timestamp": [...], "throughput": [...], ...}, ...}. The rows of a UE arrive together, so
+    each UE is written out as soon as its last row has been read.
+    """
+    yield '{'
+    ue_id, columns, separator = None, None, ''
+    for row in rows:
+        if row['ue_id'] != ue_id:
+            if columns is not None:
+                yield f"{separator}{json.dumps(ue_id)}: {json.dumps(columns)}"
+                separator = ', '
+            ue_id, columns = row['ue_id'], {'timestamp': [], **{field: [] for field in UE_METRIC_FIELDS}}
+        columns['timestamp'].append(row['timestamp'].isoformat() if row['timestamp'] is not None else None)
+        for field in UE_METRIC_FIELDS:
+            columns[field].append(row.get(field))
+    if columns is not None:
+        yield f"{separator}{json.dumps(ue_id)}: {json.dumps(columns)}"
+    yield '}'
+
 ########################################################################################################################
 #This is an API for add a ue instance via API, we should send a jason format of the ue info to add it.
 @app.route('/add_ue', methods=['POST'])
@@ -218,14 +297,32 @@ def sector_load():
 
     try:
         db_manager = DatabaseManager.get_instance()
-        load_metrics = db_manager.get_sector_load(sector_id)
+        load_metrics = db_manager.get_sector_load(sector_id, **query_options('start', 'window', 'aggregate', 'limit'))
         if load_metrics:
             return jsonify({'load_metrics': load_metrics}), 200
         else:
             return jsonify({'message': f'No load metrics found for sector {sector_id}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         API_logger.error(f"An error occurred while retrieving load metrics for sector {sector_id}: {e}")
         return jsonify({'error': 'An error occurred while retrieving load metrics'}), 500
+#########################################################################################################
+# This is an API for get the latest load of every sector, cell and gNodeB and of the network, written once per
+# monitoring tick.
+@app.route('/load_snapshot', methods=['GET'])
+def load_snapshot():
+    try:
+        db_manager = DatabaseManager.get_instance()
+        snapshot = db_manager.get_load_snapshot(**query_options('start'))
+        if snapshot['timestamp'] is None:
+            return jsonify({'message': 'No load metrics found'}), 404
+        return jsonify(snapshot), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        API_logger.error(f"An error occurred while retrieving the load snapshot: {e}")
+        return jsonify({'error': 'An error occurred while retrieving the load snapshot'}), 500
 ######################################################################################################### 
 #This is an API for change the traffic pattern
 @app.route('/set_traffic', methods=['POST'])
@@ -261,9 +358,11 @@ def get_ues():
         # Initialize your DatabaseManager
         db_manager = DatabaseManager.get_instance()
         # Fetch UE IDs from the database
-        ue_ids = db_manager.get_all_ue_ids()
+        ue_ids = db_manager.get_all_ue_ids(**query_options('start', 'limit'))
         # Return the list of UE IDs
         return jsonify({'ue_ids': ue_ids}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         # Log the error and return an error message
         # Make sure to set up logging appropriately
@@ -0,0 +1,107 @@
+#########################################################################################################
+# adaptive_sampler.py located in database folder. The AdaptiveSampler thins the per-UE raw metrics when #
+# the write path is under pressure. Every interval seconds it reads the measured write latency and the  #
+# fill ratio of the write queue: when either is above its target the sample rate is halved (down to     #
+# min_rate), when both are well below it the rate grows back step by step to 1. At a rate of 1/N only   #
+# one of every N points of each UE is written. Only the sampled measurements (ue_metrics by default)    #
+# are thinned; network, gNodeB, cell and sector metrics and the rollups keep their full resolution.    #
+# It reads line-protocol records (Points are serialized first) line by line, per series.                #
+#########################################################################################################
+import os
+import time
+import threading
+from database.line_protocol import series_key
+from database.metrics_sink import split_lines
+
+# Read from environment variables or use default values
+SAMPLER_MEASUREMENTS = os.getenv('SAMPLER_MEASUREMENTS', 'ue_metrics')  # Comma separated measurements that may be sampled
+SAMPLER_TARGET_LATENCY = float(os.getenv('SAMPLER_TARGET_LATENCY', '0.5'))  # Write latency in seconds above which the rate drops
+SAMPLER_TARGET_QUEUE_FILL = float(os.getenv('SAMPLER_TARGET_QUEUE_FILL', '0.5'))  # Queue fill ratio above which the rate drops
+SAMPLER_MIN_RATE = float(os.getenv('SAMPLER_MIN_RATE', '0.05'))  # Lowest sample rate
+SAMPLER_INTERVAL = float(os.getenv('SAMPLER_INTERVAL', '1.0'))  # Seconds between two adjustments of the rate
+SAMPLER_RECOVERY_STEP = float(os.getenv('SAMPLER_RECOVERY_STEP', '0.1'))  # Rate added per interval once the pressure is gone
+
+class AdaptiveSampler:
+    def __init__(self, pressure_fn, measurements=SAMPLER_MEASUREMENTS, target_latency=SAMPLER_TARGET_LATENCY,
+                 target_queue_fill=SAMPLER_TARGET_QUEUE_FILL, min_rate=SAMPLER_MIN_RATE, interval=SAMPLER_INTERVAL,
+                 recovery_step=SAMPLER_RECOVERY_STEP, clock=time.monotonic):
+        """
+        :param pressure_fn: Callable returning (write latency in seconds, queue fill ratio between 0 and 1).
+        :param measurements: Comma separated string or list of the measurements that may be sampled.
+        :param min_rate: Lowest sample rate, the fraction of the points of a UE still written.
+        :param clock: Monotonic clock in seconds, replaceable in tests.
+        """
+        if isinstance(measurements, str):
+            measurements = [measurement.strip() for measurement in measurements.split(',') if measurement.strip()]
+        if not 0 < min_rate <= 1:
+            raise ValueError("min_rate must be in (0, 1].")
+        self.pressure_fn = pressure_fn
+        self.measurements = frozenset(measurements)
+        self.target_latency = target_latency
+        self.target_queue_fill = target_queue_fill
+        self.min_rate = min_rate
+        self.interval = interval
+        self.recovery_step = recovery_step
+        self.clock = clock
+        self.rate = 1.0
+        self._every = 1
+        self._counts = {}
+        self._next_update = clock() + interval
+        self._lock = threading.Lock()
+        self._stats = {'kept': 0, 'skipped': 0}
+
+    def handles(self, record):
+        """Line-protocol records (str or bytes, e.g. a LineBuffer) with lines of the sampled measurements."""
+        if not isinstance(record, (str, bytes)):
+            return False
+        return any((measurement if isinstance(record, str) else measurement.encode('utf-8')) in record
+                   for measurement in self.measurements)
+
+    def keep_lines(self, record):
+        """
+        Thins a str or bytes record holding one or more lines. Every line of a sampled measurement is kept or sampled
+        out on its own, per series (measurement and tag set), so each UE is thinned on its own; the other lines are kept.
+        :return: The record with the lines to write (record itself when every line is kept), None when none is.
+        """
+        with self._lock:
+            if self.clock() >= self._next_update:
+                self._update()
+            if self._every == 1:
+                self._stats['kept'] += record.count('\n' if isinstance(record, str) else b'\n') + 1
+                return record
+            kept, sampled_out = [], False
+            for line in split_lines(record):
+                series = series_key(line)
+                if series.split(',', 1)[0] in self.measurements and not self._keep_series(series):
+                    sampled_out = True
+                    continue
+                kept.append(line)
+        if not sampled_out:
+            return record
+        return '\n'.join(kept).encode('utf-8') if kept else None
+
+    def _keep_series(self, key):
+        """Counts one point of a series and tells whether it is kept at the current rate. Called with the lock held."""
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        keep = count % self._every == 0
+        self._stats['kept' if keep else 'skipped'] += 1
+        return keep
+
+    def _update(self):
+        self._next_update = self.clock() + self.interval
+        latency, queue_fill = self.pressure_fn()
+        if latency > self.target_latency or queue_fill > self.target_queue_fill:
+            self.rate = max(self.min_rate, self.rate / 2)
+        elif latency < self.target_latency / 2 and queue_fill < self.target_queue_fill / 2:
+            self.rate = min(1.0, self.rate + self.recovery_step)
+        every = max(1, round(1 / self.rate))
+        if every != self._every:
+            self._every = every
+            self._counts = {}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['sample_rate'] = self.rate
+        return stats
@@ -0,0 +1,89 @@
+#########################################################################################################
+# circuit_breaker.py located in database folder. The CircuitBreaker guards the database writes of the   #
+# write pipeline. It opens after failure_threshold consecutive writes that failed or took longer than   #
+# slow_write_seconds; while open no write is attempted and the batches go straight to the disk spool,   #
+# so a slow or unreachable InfluxDB does not hold the writer thread and back up the queue. After        #
+# reset_timeout seconds a single trial write is let through (half open): it closes the breaker if it is #
+# fast and successful and opens it again otherwise.                                                     #
+#########################################################################################################
+import os
+import time
+import threading
+
+# Read from environment variables or use default values
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive slow or failed writes opening the breaker
+BREAKER_SLOW_WRITE_SECONDS = float(os.getenv('BREAKER_SLOW_WRITE_SECONDS', '2.0'))  # Writes slower than this count as failed
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30.0'))  # Seconds the breaker stays open before a trial write
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, slow_write_seconds=BREAKER_SLOW_WRITE_SECONDS,
+                 reset_timeout=BREAKER_RESET_TIMEOUT, clock=time.monotonic):
+        """
+        :param failure_threshold: Consecutive slow or failed writes after which the breaker opens.
+        :param slow_write_seconds: A successful write slower than this is counted as a failure.
+        :param reset_timeout: Seconds the breaker stays open before letting a trial write through.
+        :param clock: Monotonic clock in seconds, replaceable in tests.
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.slow_write_seconds = slow_write_seconds
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'rejected': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """
+        :return: True if a write may be attempted. Every allowed write must be followed by record().
+        """
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record(self, success, latency):
+        """
+        Records the outcome of an allowed write.
+        :param success: Whether the write succeeded.
+        :param latency: Duration of the write in seconds.
+        """
+        healthy = success and latency <= self.slow_write_seconds
+        with self._lock:
+            if healthy:
+                self._consecutive_failures = 0
+                self._state = self.CLOSED
+                self._trial_in_flight = False
+                return
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._stats['opened'] += 1
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._consecutive_failures
+        return stats
@@ -7,22 +7,254 @@
 # throughout the application.                                                                           #
 #########################################################################################################
 import os
-from influxdb_client import InfluxDBClient, WritePrecision, Point, QueryApi
-from influxdb_client.client.delete_api import DeleteApi
-from influxdb_client.client.write_api import SYNCHRONOUS
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from influxdb_client import WritePrecision, Point
+from database.metrics_sink import create_sink, METRICS_SINK, LINE_PRECISION
+from database.recent_metrics_cache import RecentMetricsCache, UE_METRIC_FIELDS
+from database.point_coalescer import PointCoalescer
+from database.rollup_aggregator import RollupAggregator
+from database.spool import DiskSpool, SPOOL_PATH
+from database.circuit_breaker import CircuitBreaker
+from database.adaptive_sampler import AdaptiveSampler
+from network.simulation_clock import SimulationClock, SIMULATION_CLOCK_MODE, SIMULATION_SPEED
 from logs.logger_config import database_logger  # Import the configured logger
 from datetime import datetime
 from influxdb_client import Point
 import json
+import re
 
 # Read from environment variables or use default values
 INFLUXDB_URL = os.getenv('INFLUXDB_URL', 'http://localhost:8086')
-INFLUXDB_TOKEN = os.getenv('INFLUXDB_TOKEN')
-if not INFLUXDB_TOKEN:
-    raise ValueError("INFLUXDB_TOKEN environment variable is not set.")
+INFLUXDB_TOKEN = os.getenv('INFLUXDB_TOKEN')  # Only required by the 'influxdb' metrics sink
 INFLUXDB_ORG = os.getenv('INFLUXDB_ORG', 'ranfusion')
 INFLUXDB_BUCKET = os.getenv('INFLUXDB_BUCKET', 'RAN_metrics')
+# Write pipeline settings
+INFLUXDB_BATCH_SIZE = int(os.getenv('INFLUXDB_BATCH_SIZE', '5000'))  # Maximum points per write request
+INFLUXDB_FLUSH_INTERVAL = float(os.getenv('INFLUXDB_FLUSH_INTERVAL', '1.0'))  # Seconds between flushes of a partial batch
+INFLUXDB_QUEUE_SIZE = int(os.getenv('INFLUXDB_QUEUE_SIZE', '100000'))  # Maximum points waiting to be written
+INFLUXDB_OVERFLOW_POLICY = os.getenv('INFLUXDB_OVERFLOW_POLICY', 'drop_oldest')  # 'block', 'drop_oldest' or 'sample'
+INFLUXDB_SAMPLE_EVERY = int(os.getenv('INFLUXDB_SAMPLE_EVERY', '10'))  # With 'sample', keep 1 of every N points while full
+WRITE_STATS_INTERVAL = float(os.getenv('WRITE_STATS_INTERVAL', '10.0'))  # Seconds between two write_path_metrics points
 
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'sample')
+# Query settings
+QUERY_AGGREGATES = ('mean', 'median', 'min', 'max', 'sum', 'count', 'first', 'last')  # Flux functions accepted by aggregateWindow
+ROLLUP_AGGREGATES = ('mean', 'min', 'max', 'count', 'last')  # Aggregates stored by the RollupAggregator
+UE_MEMBERSHIP_RANGE = '-30d'  # How far back the ue_metadata resolving the UEs of a sector or cell is read
+# Metrics are timestamped with the SimulationClock, which runs ahead of the wall clock in virtual mode at a speed of 0 or
+# above 1; the metric queries then read up to the latest time InfluxDB can store instead of stopping at now()
+QUERY_RANGE_STOP = ', stop: 2262-04-11T23:47:16Z' if SIMULATION_CLOCK_MODE == 'virtual' and (SIMULATION_SPEED == 0 or SIMULATION_SPEED > 1) else ''
+# Measurement -> (ID tag, load field, key in get_load_snapshot()) of the loads written once per monitoring tick
+LOAD_SNAPSHOT_FIELDS = {
+    'sector_metrics': ('sector_id', 'sector_load', 'sector_loads'),
+    'cell_metrics': ('cell_id', 'cell_load', 'cell_loads'),
+    'gnodeb_metrics': ('gnodeb_id', 'gnodeb_load', 'gnodeb_loads'),
+    'network_metrics': (None, 'network_load', None),
+}
+_FLUX_DURATION = re.compile(r'^(\d+(ns|us|ms|s|m|h|d|w|mo|y))+$')
+
+class WritePipeline:
+    """
+    Background write pipeline between the simulation and the database. Points are queued without touching the
+    network and a single writer thread sends them in batches, either when batch_size points are waiting or every
+    flush_interval seconds. The queue is bounded; when it is full the overflow policy decides what happens:
+    'block' waits for room, 'drop_oldest' discards the oldest queued point and 'sample' keeps only one of every
+    sample_every new points (replacing the oldest one) so an overload thins the stream instead of cutting it.
+    """
+    def __init__(self, write_fn, batch_size=INFLUXDB_BATCH_SIZE, flush_interval=INFLUXDB_FLUSH_INTERVAL,
+                 max_queue_size=INFLUXDB_QUEUE_SIZE, overflow_policy=INFLUXDB_OVERFLOW_POLICY, sample_every=INFLUXDB_SAMPLE_EVERY,
+                 on_written=None, spool=None, breaker=None):
+        """
+        :param write_fn: Callable(bucket, records) doing the actual write of a batch.
+        :param on_written: Optional callable(bucket, records) called after a batch has been written successfully.
+        :param spool: Optional DiskSpool the records of a failed write are appended to instead of being lost.
+        :param breaker: Optional CircuitBreaker; while it is open batches are spooled without trying write_fn, or
+                        dropped (counted in 'dropped') when there is no spool.
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.write_fn = write_fn
+        self.on_written = on_written
+        self.spool = spool
+        self.breaker = breaker
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.overflow_policy = overflow_policy
+        self.sample_every = max(1, int(sample_every))
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._flush_requested = False
+        self._in_flight = 0
+        self._overflow_count = 0
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'spooled': 0,
+            'rejected': 0,
+            'flushes': 0,
+            'last_flush_latency': 0.0,
+            'max_flush_latency': 0.0,
+            'total_flush_latency': 0.0,
+        }
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="influxdb-write-pipeline", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Write everything still queued and stop the writer thread."""
+        with self._condition:
+            if not self._running:
+                return
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def enqueue(self, record, bucket):
+        """
+        Queue one record for bucket. Never waits on the network; only the 'block' policy waits for queue room.
+        :return: True if the record was queued, False if the overflow policy discarded it.
+        """
+        self.start()
+        with self._condition:
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == 'block':
+                    self._condition.wait_for(lambda: len(self._queue) < self.max_queue_size or not self._running)
+                elif self.overflow_policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self._stats['dropped'] += 1
+                else:  # 'sample'
+                    self._overflow_count += 1
+                    self._stats['dropped'] += 1
+                    if self._overflow_count % self.sample_every:
+                        return False
+                    self._queue.popleft()
+            self._queue.append((bucket, record))
+            self._stats['enqueued'] += 1
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify_all()
+            return True
+
+    def enqueue_many(self, records, bucket):
+        for record in records:
+            self.enqueue(record, bucket)
+
+    def flush(self, timeout=None):
+        """
+        Ask the writer thread to write everything queued and wait until it is done.
+        :return: True if the queue was drained within timeout.
+        """
+        with self._condition:
+            if not self._running:
+                return not self._queue
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._queue and self._in_flight == 0, timeout)
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._queue)
+
+    def stats(self):
+        """Pipeline counters, current queue depth and flush latencies in seconds."""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+        stats['avg_flush_latency'] = stats['total_flush_latency'] / stats['flushes'] if stats['flushes'] else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._queue) >= self.batch_size or self._flush_requested or not self._running,
+                    self.flush_interval)
+                if not self._queue:
+                    self._flush_requested = False
+                    self._condition.notify_all()
+                    if not self._running:
+                        return
+                    continue
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                self._in_flight = len(batch)
+                # Room was made in the queue, wake up writers blocked by the 'block' policy
+                self._condition.notify_all()
+            self._write_batch(batch)
+            with self._condition:
+                self._in_flight = 0
+                if not self._queue:
+                    self._flush_requested = False
+                self._condition.notify_all()
+
+    def _write_batch(self, batch):
+        records_by_bucket = {}
+        for bucket, record in batch:
+            records_by_bucket.setdefault(bucket, []).append(record)
+        started = time.perf_counter()
+        written = failed = spooled = rejected = dropped = 0
+        for bucket, records in records_by_bucket.items():
+            # With the breaker open the database is not tried at all, the batch goes straight to the spool
+            if self.breaker is not None and not self.breaker.allow():
+                rejected += len(records)
+                if self.spool is None:
+                    dropped += len(records)
+                else:
+                    spooled += self._spool_batch(bucket, records)
+                continue
+            write_started = time.perf_counter()
+            try:
+                self.write_fn(bucket, records)
+                written += len(records)
+            except Exception as e:
+                self._record_write(False, write_started)
+                failed += len(records)
+                database_logger.error(f"Failed to write batch of {len(records)} points to bucket {bucket}: {e}")
+                spooled += self._spool_batch(bucket, records)
+                continue
+            self._record_write(True, write_started)
+            if self.on_written is not None:
+                try:
+                    self.on_written(bucket, records)
+                except Exception as e:
+                    database_logger.error(f"Write callback failed for bucket {bucket}: {e}")
+        latency = time.perf_counter() - started
+        with self._condition:
+            self._stats['written'] += written
+            self._stats['failed'] += failed
+            self._stats['spooled'] += spooled
+            self._stats['rejected'] += rejected
+            self._stats['dropped'] += dropped
+            self._stats['flushes'] += 1
+            self._stats['last_flush_latency'] = latency
+            self._stats['max_flush_latency'] = max(self._stats['max_flush_latency'], latency)
+            self._stats['total_flush_latency'] += latency
+
+    def _record_write(self, success, started):
+        if self.breaker is not None:
+            self.breaker.record(success, time.perf_counter() - started)
+
+    def _spool_batch(self, bucket, records):
+        if self.spool is None:
+            return 0
+        try:
+            self.spool.append(bucket, records)
+            return len(records)
+        except Exception as e:
+            database_logger.error(f"Failed to spool {len(records)} points for bucket {bucket}, they are lost: {e}")
+            return 0
+##################################################################################################################################
 class DatabaseManager:
     _instance = None
 
@@ -45,14 +277,51 @@ class DatabaseManager:
         # This method replaces the original __init__ content
         #print(f"InfluxDB token: {INFLUXDB_TOKEN}")  # Print the InfluxDB token for test
         #print(f"Connecting to InfluxDB with URL: {INFLUXDB_URL}, Token: {INFLUXDB_TOKEN}, Org: {INFLUXDB_ORG}")
-        self.client = InfluxDBClient(url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
-        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
-        self.query_api = self.client.query_api()
+        self.sink = create_sink(METRICS_SINK, url=INFLUXDB_URL, token=INFLUXDB_TOKEN, org=INFLUXDB_ORG)
+        # client and query_api only exist for the InfluxDB sink; queries return empty results on the other sinks
+        self.client = getattr(self.sink, 'client', None)
+        self.write_api = getattr(self.sink, 'write_api', None)
+        self.query_api = getattr(self.sink, 'query_api', None)
         self.bucket = INFLUXDB_BUCKET
         self.org = INFLUXDB_ORG
+        # Time source of the measurement timestamps, shared with the simulation so all series follow simulated time
+        self.clock = SimulationClock.get_instance()
+        # Latest ue_metrics samples per UE, refreshed by the write pipeline after every written batch
+        self.recent_metrics = RecentMetricsCache()
+        # Batches that fail to be written are spooled to disk and replayed once the database accepts writes again.
+        # The spool directory belongs to one process, the simulation one, which enables it with start_spool().
+        self.spool = None
+        # Opens after repeated slow or failed writes, batches are then spooled (or dropped without a spool) without
+        # waiting on the database
+        self.breaker = CircuitBreaker()
+        # All writes go through the background pipeline so simulation threads never wait on the network
+        self.write_pipeline = WritePipeline(self.sink.write, on_written=self.recent_metrics.on_written, spool=self.spool,
+                                            breaker=self.breaker)
+        # Thins the per-UE raw metrics when the write latency or the queue depth rises
+        self.sampler = AdaptiveSampler(self._write_pressure)
+        self._next_write_stats = time.monotonic() + WRITE_STATS_INTERVAL
+        # Downsampled 10s/1m rollups of the metric measurements, and sampling of their raw points
+        self.rollup = RollupAggregator()
+        # Per-thread coalescer of the tick being run, see tick_scope()
+        self._tick_local = threading.local()
+##################################################################################################################################
+    def start_spool(self):
+        """
+        Enables the disk spool (SPOOL_PATH) for the writes of this process and starts replaying what it holds. Called
+        only by the simulation process: other processes, like the API one, would share the directory and replay the
+        same segments.
+        :return: The DiskSpool, None if SPOOL_PATH is empty.
+        """
+        if self.spool is None and SPOOL_PATH:
+            self.spool = DiskSpool()
+            self.spool.start(self._replay_lines)
+            self.write_pipeline.spool = self.spool
+        return self.spool
 ##################################################################################################################################
     def get_sector_by_id(self, sector_id):
-        query = f'from(bucket: "{self.bucket}") |> range(start: -1d) |> filter(fn: (r) => r._measurement == "sector_metrics" and r.sector_id == "{sector_id}")'
+        if self.query_api is None:
+            return None
+        query = f'from(bucket: "{self.bucket}") |> range(start: -1d{QUERY_RANGE_STOP}) |> filter(fn: (r) => r._measurement == "sector_metadata" and r.sector_id == "{sector_id}")'
         result = self.query_api.query(query=query)
         for table in result:
             for record in table.records:
@@ -65,15 +334,30 @@ class DatabaseManager:
         point = sector.serialize_for_influxdb()  # Assuming serialize_for_influxdb() prepares the data correctly
         self.insert_data(point)
 ##################################################################################################################################
-    def get_sectors(self):
+    def get_sectors(self, start='-30d', limit=None):
+        """
+        Returns the latest metadata of every sector, one dictionary per sector.
+        :param start: Flux range start, a negative duration like '-30d'.
+        :param limit: Maximum number of sectors returned.
+        """
+        if self.query_api is None:
+            return []
         try:
-            query = f'from(bucket:"{self.bucket}") |> range(start: -30d) |> filter(fn:(r) => r._measurement == "sectors")'
+            query = f'''
+            from(bucket: "{self.bucket}")
+                |> range(start: {self._flux_start(start)}{QUERY_RANGE_STOP})
+                |> filter(fn: (r) => r._measurement == "sector_metadata")
+                |> last()
+                |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+                |> group()
+                |> sort(columns: ["sector_id"])
+                {self._flux_limit(limit)}
+            '''
             result = self.query_api.query(query=query)
             sectors = []
             for table in result:
                 for record in table.records:
-                    sector_data = json.loads(record.get_value())
-                    sectors.append(sector_data)
+                    sectors.append({key: value for key, value in record.values.items() if not key.startswith('_') and key not in ('result', 'table')})
             return sectors
         except Exception as e:
             print(f"Failed to retrieve sectors: {e}")
@@ -92,7 +376,9 @@ class DatabaseManager:
         
         # Construct the delete predicate function
         predicate = f'_measurement="ue_metrics" AND ue_id="{ue_id}" AND sector_id="{sector_id}"'
-        
+        self.recent_metrics.invalidate(ue_id)
+        if self.client is None:
+            return
         try:
             # Perform the deletion
             self.client.delete_api().delete(start_time, stop_time, predicate, bucket=self.bucket, org=INFLUXDB_ORG)
@@ -103,7 +389,9 @@ class DatabaseManager:
     def test_connection(self):
         """Test if the connection to the database is successful."""
         try:
-            self.client.ping()
+            if not self.sink.ping():
+                database_logger.error("Database connection test failed: metrics sink is not reachable.")
+                return False
             database_logger.info("Database connection successful.")
             return True
         except Exception as e:
@@ -111,12 +399,27 @@ class DatabaseManager:
             return False
 ##################################################################################################################################
     def insert_data_batch(self, points):
-        """Inserts a batch of Point objects into InfluxDB."""
+        """Queues a batch of Point objects for insertion into InfluxDB."""
         try:
-            self.write_api.write(bucket=self.bucket, record=points)
+            self._enqueue_many(points, self.bucket)
             #database_logger.info("Batch data inserted into InfluxDB")
         except Exception as e:
             database_logger.error(f"Failed to insert batch data into InfluxDB: {e}")
+##################################################################################################################################
+    def insert_line_protocol(self, data, bucket=None):
+        """
+        Queues line protocol built with the precompiled serializers (a LineBuffer, bytes or str) as one record.
+        :param data: Newline separated lines.
+        :param bucket: Target bucket, defaults to the metrics bucket.
+        """
+        if hasattr(data, 'getvalue'):
+            data = data.getvalue()
+        if not data:
+            return
+        try:
+            self._enqueue(data, bucket or self.bucket)
+        except Exception as e:
+            database_logger.error(f"Failed to insert line protocol into InfluxDB: {e}")
 ##################################################################################################################################
     def insert_data(self, measurement_or_point, tags=None, fields=None, timestamp=None):
         #print('------------------inside  insert_data Function od database_manager.py -------------------')
@@ -132,46 +435,166 @@ class DatabaseManager:
             else:
                 # If separate parameters are provided, create a new Point
                 measurement = measurement_or_point
-                point = Point(measurement)
                 # For debugging: specifically check and print throughput and its type
                 if fields and 'throughput' in fields:
                     fields['throughput'] = float(fields['throughput'])
                     #print(f"Throughput (field): {throughput_value}, Type: {type(throughput_value)}")
+                # Use the provided timestamp or the current time
+                if timestamp is None:
+                    timestamp = self.clock.utcnow()
+                # Within a tick_scope() the row is merged with the other rows of the same series and second
+                coalescer = getattr(self._tick_local, 'coalescer', None)
+                if coalescer is not None:
+                    coalescer.add(self.bucket, measurement, tags or {}, fields or {}, timestamp)
+                    return
+                point = Point(measurement)
                 # Add tags and fields to the Point
                 for tag_key, tag_value in (tags or {}).items():
                     point.tag(tag_key, tag_value)
                 for field_key, field_value in (fields or {}).items():
                     point.field(field_key, field_value)
-                # Use the provided timestamp or the current time
-                if timestamp is None:
-                    timestamp = datetime.utcnow()
                 point.time(timestamp, WritePrecision.S)
             
-            # Write the point to the database
-            self.write_api.write(bucket=self.bucket, record=point)
+            # Queue the point for the background writer
+            self._enqueue(point, self.bucket)
             #print('Data write is done')
 
         except Exception as e:
             print(f"Failed to insert data into InfluxDB: {e}")
 
 ##################################################################################################################################
+    @contextmanager
+    def tick_scope(self):
+        """
+        Coalesces the rows written by the current thread with insert_data(measurement, tags, fields, timestamp) while
+        the scope is open: rows with the same bucket, measurement, tags and second are merged into one point, and the
+        merged points are queued when the scope exits. Points and line-protocol records are queued right away.
+        Nested scopes share the outer one. Other threads keep writing straight to the pipeline.
+        """
+        if getattr(self._tick_local, 'coalescer', None) is not None:
+            yield self._tick_local.coalescer
+            return
+        coalescer = self._tick_local.coalescer = PointCoalescer()
+        try:
+            yield coalescer
+        finally:
+            self._tick_local.coalescer = None
+            for bucket, point in coalescer.drain():
+                self._enqueue(point, bucket)
+
+    def _enqueue(self, record, bucket):
+        """
+        Hands a record to the write pipeline, after feeding it to the rollup aggregator. Raw lines of the sampled
+        measurements may then be skipped by the adaptive sampler; the rollups always see every line. Points at
+        LINE_PRECISION are serialized once here so both only read line protocol; Points at another precision (logs,
+        network metrics) are written as is.
+        """
+        self._write_stats_if_due()
+        if isinstance(record, Point) and record.write_precision == LINE_PRECISION:
+            record = record.to_line_protocol()
+        rollups = ()
+        if self.rollup.handles(record):
+            # Lines of a LineBuffer are sampled one by one, record then only holds the kept ones
+            record, rollups = self.rollup.add_lines(record)
+        if record is not None and self.sampler.handles(record):
+            record = self.sampler.keep_lines(record)
+        if record:
+            self.write_pipeline.enqueue(record, bucket)
+        self.write_pipeline.enqueue_many(rollups, bucket)
+
+    def _write_pressure(self):
+        """Measured write latency and queue fill ratio, read by the adaptive sampler."""
+        stats = self.write_pipeline.stats()
+        return stats['last_flush_latency'], stats['queue_depth'] / self.write_pipeline.max_queue_size
+
+    def _replay_lines(self, bucket, lines, precision):
+        """Spool replay write, which goes through the circuit breaker like the pipeline writes."""
+        if not self.breaker.allow():
+            raise ConnectionError("Circuit breaker is open.")
+        started = time.perf_counter()
+        try:
+            self.sink.write_lines(bucket, lines, precision)
+        except Exception:
+            self.breaker.record(False, time.perf_counter() - started)
+            raise
+        self.breaker.record(True, time.perf_counter() - started)
+
+    def _write_stats_if_due(self):
+        """Writes the write path metrics (breaker state, sample rate, queue) every WRITE_STATS_INTERVAL seconds."""
+        now = time.monotonic()
+        if now < self._next_write_stats:
+            return
+        self._next_write_stats = now + WRITE_STATS_INTERVAL
+        self.write_pipeline.enqueue(self.write_stats_point(), self.bucket)
+
+    def write_stats_point(self):
+        stats = self.get_write_stats()
+        return Point("write_path_metrics") \
+            .field("breaker_state", stats['breaker']['state']) \
+            .field("breaker_open", stats['breaker']['state'] != CircuitBreaker.CLOSED) \
+            .field("breaker_opened_count", int(stats['breaker']['opened'])) \
+            .field("sample_rate", float(stats['sample_rate'])) \
+            .field("queue_depth", int(stats['queue_depth'])) \
+            .field("last_flush_latency", float(stats['last_flush_latency'])) \
+            .field("spooled", int(stats['spooled'])) \
+            .field("dropped", int(stats['dropped'])) \
+            .time(self.clock.utcnow(), WritePrecision.S)
+
+    def _enqueue_many(self, records, bucket):
+        for record in records:
+            self._enqueue(record, bucket)
+##################################################################################################################################
+    def flush(self, timeout=None):
+        """Waits until every queued point has been written. Meant for shutdown and tests, not for simulation threads."""
+        return self.write_pipeline.flush(timeout)
+
+    def get_write_stats(self):
+        """
+        Returns the write pipeline statistics: queue depth, counters, flush latencies, the circuit breaker state, the
+        current sample rate and the spool counters.
+        """
+        stats = self.write_pipeline.stats()
+        stats['breaker'] = self.breaker.stats()
+        stats['sample_rate'] = self.sampler.rate
+        if self.spool is not None:
+            stats['spool'] = self.spool.stats()
+        return stats
+
     def close_connection(self):
-        """Closes the database connection."""
+        """Writes the open rollup windows and the queued points and closes the database connection."""
         try:
-            self.client.close()
+            self.write_pipeline.enqueue_many(self.rollup.flush(), self.bucket)
+            self.write_pipeline.stop()
+            if self.spool is not None:
+                self.spool.stop()
+            self.sink.close()
         except Exception as e:
             print(f"Failed to close database connection: {e}")
 ##################################################################################################################################
-    def get_all_ue_ids(self):
-        """Retrieves all UE IDs from InfluxDB."""
+    def get_all_ue_ids(self, start='-1d', limit=None):
+        """
+        Retrieves the distinct IDs of the UEs with metrics in InfluxDB, sorted.
+        :param start: Flux range start, a negative duration like '-1d'.
+        :param limit: Maximum number of IDs returned.
+        """
+        if self.query_api is None:
+            return []
         try:
-            query = f'from(bucket: "{self.bucket}") |> range(start: -1d) |> filter(fn: (r) => r._measurement == "ue_metrics")'
+            query = f'''
+            from(bucket: "{self.bucket}")
+                |> range(start: {self._flux_start(start)}{QUERY_RANGE_STOP})
+                |> filter(fn: (r) => r._measurement == "ue_metrics" and r._field == "throughput")
+                |> keep(columns: ["ue_id"])
+                |> group()
+                |> distinct(column: "ue_id")
+                |> sort()
+                {self._flux_limit(limit)}
+            '''
             result = self.query_api.query(query=query, org=INFLUXDB_ORG)
             ue_ids = []
             for table in result:
                 for record in table.records:
-                    if 'ue_id' in record.values:
-                        ue_ids.append(record.values['ue_id'])
+                    ue_ids.append(record.get_value())
         except Exception as e:
             database_logger.error(f"Failed to retrieve UE IDs from InfluxDB: {e}")
             return []  # Return an empty list in case of any exception
@@ -181,8 +604,8 @@ class DatabaseManager:
         """Inserts log data into the logs bucket in InfluxDB."""
         log_bucket = 'RAN_logs'
         try:
-            self.write_api.write(bucket=log_bucket, record=log_point)
-            database_logger.info(f"Log data inserted into bucket {log_bucket}")
+            self._enqueue(log_point, log_bucket)
+            database_logger.info(f"Log data queued for bucket {log_bucket}")
         except Exception as e:
             database_logger.error(f"Failed to insert log data into InfluxDB: {e}")
 ##################################################################################################################################
@@ -198,27 +621,33 @@ class DatabaseManager:
                 .tag("ue_id", str(ue_id))\
                 .tag("connected_cell_id", str(new_cell_id)) \
                 .field("update_type", "cell_association_change")\
-                .time(datetime.utcnow())
-            # Write the point to InfluxDB
-            self.write_api.write(bucket=self.bucket, record=point)
+                .time(self.clock.utcnow())
+            # Queue the point for InfluxDB
+            self._enqueue(point, self.bucket)
             database_logger.info(f"UE {ue_id} association updated to cell {new_cell_id}")
         except Exception as e:
             database_logger.error(f"Failed to update UE association in the database: {e}")
             raise
 ##################################################################################################################################
     def write_sector_load(self, sector_id, load):
-        point = Point("sector_metrics") \
-            .tag("sector_id", sector_id) \
-            .field("sector_load", load) \
-            .time(datetime.utcnow(), WritePrecision.S)
-        self.write_api.write(bucket=self.bucket, record=point)
+        try:
+            point = Point("sector_metrics") \
+                .tag("sector_id", sector_id) \
+                .field("sector_load", load) \
+                .time(self.clock.utcnow(), WritePrecision.S)
+            self._enqueue(point, self.bucket)
+        except Exception as e:
+            database_logger.error(f"Failed to write load of sector {sector_id}: {e}")
 
     def write_cell_load(self, cell_id, load):
-        point = Point("cell_metrics") \
-            .tag("cell_id", cell_id) \
-            .field("cell_load", load) \
-            .time(datetime.utcnow(), WritePrecision.S)
-        self.write_api.write(bucket=self.bucket, record=point)
+        try:
+            point = Point("cell_metrics") \
+                .tag("cell_id", cell_id) \
+                .field("cell_load", load) \
+                .time(self.clock.utcnow(), WritePrecision.S)
+            self._enqueue(point, self.bucket)
+        except Exception as e:
+            database_logger.error(f"Failed to write load of cell {cell_id}: {e}")
 
 ###################################################################################################################################
     def write_network_measurement(self, network_load, network_delay, total_handover_success_count, total_handover_failure_count):
@@ -227,69 +656,225 @@ class DatabaseManager:
             .field("network_delay", float(network_delay)) \
             .field("total_handover_success_count", int(total_handover_success_count)) \
             .field("total_handover_failure_count", int(total_handover_failure_count)) \
-            .time(datetime.utcnow(), WritePrecision.NS)
-        self.write_api.write(bucket=self.bucket, record=point)
+            .time(self.clock.utcnow(), WritePrecision.NS)
+        self._enqueue(point, self.bucket)
 ##################################################################################################################################
-    def get_ue_metrics(self, ue_id):
-        #print(f"Attempting to fetch UE metrics for ue_id: {ue_id}")  # Debug message 1
-        query = f'''
-            from(bucket: "{self.bucket}")
-                |> range(start: -1d)
-                |> filter(fn: (r) => r._measurement == "ue_metrics" and r.ue_id == "{ue_id}")
-                // Check the output here to ensure fields are present
-                |> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value")
-                // Then check the output here to ensure the pivot is as expected
-        '''
-        # Execute query
-        result = self.query_api.query(query=query)
-        #print(f'Result of the query inside the get_ue_metrics for ue_id {ue_id}:', result)  # Debug message 2
-        metrics = []
-        if result:
-            for table in result:
-                #print('--------inside for loop DB Manager----table:', table)
-                for record in table.records:
-                    #print(f'Record from table: {record}')  # Debug message 3
-                    #print('----DB Manager-------record:', record)
-                    #print('--------------throughput:', record.values.get('throughput', None))
-                    #print('-------------------time:', record.get_time())
-                    #Ensure you are safely accessing fields, assuming 'throughput', 'jitter', 'packet_loss', 'delay' might not always be present
-                    metrics.append({
-                        'timestamp': record.get_time(),
-                        'throughput': record.values.get('throughput', None),
-                        'ue_jitter': record.values.get('jitter', None),
-                        'ue_packet_loss_rate': record.values.get('packet_loss', None),
-                        'ue_delay': record.values.get('delay', None)
-                    })
-        else:
+    def get_ue_metrics(self, ue_id, start='-1d', window=None, aggregate='mean', limit=None):
+        """
+        Returns the metrics of a UE, oldest first.
+        :param ue_id: The ID of the UE.
+        :param start: Flux range start, a negative duration like '-1d'.
+        :param window: Optional window like '10s' or '1m'; the samples are then aggregated per window in InfluxDB.
+        :param aggregate: Aggregate function applied per window, one of QUERY_AGGREGATES.
+        :param limit: Maximum number of samples returned, the most recent ones.
+        :return: List of dictionaries with timestamp, throughput, ue_jitter, ue_packet_loss_rate and ue_delay.
+        """
+        rows = self._query_metric("ue_metrics", {"ue_id": ue_id}, UE_METRIC_FIELDS, start, window, aggregate, limit)
+        if not rows and self.query_api is not None:
             print("No results found for the query.")
-        return metrics
+        return [{'timestamp': row['_time'], **{field: row.get(field) for field in UE_METRIC_FIELDS}} for row in rows]
+##################################################################################################################################
+    def get_sector_load(self, sector_id, start='-1d', window=None, aggregate='mean', limit=None):
+        """
+        Returns the load samples of a sector, oldest first. The parameters are the ones of get_ue_metrics.
+        :return: List of dictionaries with load and time.
+        """
+        rows = self._query_metric("sector_metrics", {"sector_id": sector_id}, ("sector_load",), start, window, aggregate, limit)
+        return [{'load': row.get('sector_load'), 'time': row['_time']} for row in rows]
 ##################################################################################################################################
-    def get_sector_load(self, sector_id):
-        # Flux query syntax for InfluxDB 2.x
+    def get_load_snapshot(self, start='-5m'):
+        """
+        Returns the latest load of every sector, cell and gNodeB and of the network, as written by the monitoring ticks,
+        in the layout of LoadSnapshot.to_dict(). This is how processes without the NetworkLoadManager (the API) read it.
+        :param start: Flux range start bounding how old the latest loads may be.
+        :return: Dictionary with network_load, gnodeb_loads, cell_loads, sector_loads and timestamp (of the newest load).
+        """
+        field_filter = ' or '.join(f'(r._measurement == "{measurement}" and r._field == "{field}")'
+                                   for measurement, (_, field, _) in LOAD_SNAPSHOT_FIELDS.items())
         query = f'''
         from(bucket: "{self.bucket}")
-            |> range(start: -1d)
-            |> filter(fn: (r) => r["_measurement"] == "sector" and r["sector_id"] == "{sector_id}")
-            |> filter(fn: (r) => r["_field"] == "load")  # Assuming 'load' is a field in your data
+            |> range(start: {self._flux_start(start)}{QUERY_RANGE_STOP})
+            |> filter(fn: (r) => {field_filter})
+            |> last()
         '''
+        snapshot = {'network_load': None, 'gnodeb_loads': {}, 'cell_loads': {}, 'sector_loads': {}, 'timestamp': None}
+        if self.query_api is None:
+            return snapshot
+        latest = {}  # (measurement, entity ID) -> (time, load); an entity may have several series
+        for table in self.query_api.query(query=query):
+            for record in table.records:
+                id_tag, _, _ = LOAD_SNAPSHOT_FIELDS[record.get_measurement()]
+                key = (record.get_measurement(), record.values.get(id_tag) if id_tag else None)
+                if key not in latest or record.get_time() > latest[key][0]:
+                    latest[key] = (record.get_time(), record.get_value())
+        for (measurement, entity_id), (timestamp, load) in latest.items():
+            _, _, loads_key = LOAD_SNAPSHOT_FIELDS[measurement]
+            if loads_key is None:
+                snapshot['network_load'] = load
+            else:
+                snapshot[loads_key][entity_id] = load
+            if snapshot['timestamp'] is None or timestamp > snapshot['timestamp']:
+                snapshot['timestamp'] = timestamp
+        return snapshot
+##################################################################################################################################
+    def _query_metric(self, measurement, tags, fields, start, window, aggregate, limit):
+        """
+        Runs a bounded query on a metric measurement, with the reduction done by InfluxDB.
+        When window is one of the rollup windows and aggregate one of the stored rollup aggregates, the rollup measurement
+        (for example ue_metrics_10s) is read instead of aggregating the raw points, which may be sampled.
+        :return: List of rows (dictionaries of _time and one key per field), oldest first.
+        """
+        tag_filter = ''.join(f' and r["{key}"] == "{self._flux_string(value)}"' for key, value in tags.items())
+        query, field_names = self._metric_flux(measurement, tag_filter, fields, start, window, aggregate, limit)
+        if self.query_api is None:
+            return []
         result = self.query_api.query(query=query)
-        load_metrics = []
+        rows = []
         for table in result:
             for record in table.records:
-                # Adjust according to the structure of your data
-                load_metrics.append({
-                    'load': record.get_value(),
-                    'time': record.get_time()
-                })
-        return load_metrics
+                row = {'_time': record.get_time()}
+                for name, field in field_names.items():
+                    row[field] = record.values.get(name)
+                rows.append(row)
+        rows.reverse()
+        return rows
+
+    def _metric_flux(self, measurement, tag_filter, fields, start, window, aggregate, limit, group_by=None):
+        """
+        Builds the Flux query of _query_metric() and get_bulk_ue_metrics().
+        :param tag_filter: Flux predicate appended to the measurement filter, starting with ' and ', or ''.
+        :param group_by: Optional tag column; the rows are then grouped by it and limit applies per group, with the
+                         groups returned one after the other and the rows of each oldest first.
+        :return: (query, field_names) with field_names mapping the queried field names to the returned ones.
+        """
+        if aggregate not in QUERY_AGGREGATES:
+            raise ValueError(f"Unknown aggregate function: {aggregate}")
+        range_start = self._flux_start(start)
+        limit_stage = self._flux_limit(limit)
+        if window is not None and not _FLUX_DURATION.match(str(window)):
+            raise ValueError(f"Invalid window: {window}")
+
+        rollup_windows = [label for label, _ in self.rollup.windows] if measurement in self.rollup.measurements else []
+        if window in rollup_windows and aggregate in ROLLUP_AGGREGATES:
+            measurement = f"{measurement}_{window}"
+            field_names = {f"{field}_{aggregate}": field for field in fields}
+            window_stage = ''
+        else:
+            field_names = {field: field for field in fields}
+            window_stage = f'|> aggregateWindow(every: {window}, fn: {aggregate}, createEmpty: false)' if window else ''
+
+        field_filter = ' or '.join(f'r._field == "{name}"' for name in field_names)
+        if group_by is None:
+            group_stage = '|> group()'
+            order_stage = ''
+        else:
+            group_stage = f'|> group(columns: ["{group_by}"])'
+            order_stage = '|> sort(columns: ["_time"])'
+        query = f'''
+        from(bucket: "{self.bucket}")
+            |> range(start: {range_start}{QUERY_RANGE_STOP})
+            |> filter(fn: (r) => r._measurement == "{measurement}"{tag_filter})
+            |> filter(fn: (r) => {field_filter})
+            {window_stage}
+            |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+            {group_stage}
+            |> sort(columns: ["_time"], desc: true)
+            {limit_stage}
+            {order_stage}
+        '''
+        return query, field_names
+
+    def get_bulk_ue_metrics(self, ue_ids=None, sector_id=None, cell_id=None, start='-1d', window=None, aggregate='mean', limit=None):
+        """
+        Returns the metrics of many UEs with a single query grouped by ue_id, instead of one query per UE.
+        The UEs are given either as a list of IDs or as every UE of a sector or cell; the members of a sector or cell are
+        resolved from the latest ue_metadata of each UE in the same Flux query. The rows are streamed from InfluxDB as
+        they arrive: all the rows of a UE come together, oldest first.
+        The other parameters are the ones of get_ue_metrics, with limit applied per UE.
+        :param ue_ids: Iterable of UE IDs.
+        :param sector_id: ID of the sector whose UEs are queried.
+        :param cell_id: ID of the cell whose UEs are queried.
+        :return: Iterator of dictionaries with ue_id, timestamp, throughput, ue_jitter, ue_packet_loss_rate and ue_delay.
+        """
+        if sum(selector is not None for selector in (ue_ids, sector_id, cell_id)) != 1:
+            raise ValueError("Exactly one of ue_ids, sector_id or cell_id is required.")
+        preamble = ''
+        if ue_ids is not None:
+            ue_ids = sorted({str(ue_id) for ue_id in ue_ids})
+            if not ue_ids:
+                return iter(())
+            id_set = '[' + ', '.join(f'"{self._flux_string(ue_id)}"' for ue_id in ue_ids) + ']'
+        else:
+            column, value = ("connected_sector_id", sector_id) if sector_id is not None else ("connected_cell_id", cell_id)
+            preamble = f'''
+        members = from(bucket: "{self.bucket}")
+            |> range(start: {UE_MEMBERSHIP_RANGE}{QUERY_RANGE_STOP})
+            |> filter(fn: (r) => r._measurement == "ue_metadata")
+            |> group(columns: ["ue_id"])
+            |> last(column: "_time")
+            |> filter(fn: (r) => r["{column}"] == "{self._flux_string(value)}")
+            |> group()
+            |> findColumn(fn: (key) => true, column: "ue_id")'''
+            id_set = 'members'
+        tag_filter = f' and contains(value: r.ue_id, set: {id_set})'
+        query, field_names = self._metric_flux("ue_metrics", tag_filter, UE_METRIC_FIELDS, start, window, aggregate, limit,
+                                               group_by="ue_id")
+        if self.query_api is None:
+            return iter(())
+        return self._stream_bulk_rows(preamble + query, field_names)
+
+    def _stream_bulk_rows(self, query, field_names):
+        for record in self.query_api.query_stream(query=query):
+            row = {'ue_id': record.values.get('ue_id'), 'timestamp': record.get_time()}
+            for name, field in field_names.items():
+                row[field] = record.values.get(name)
+            yield row
+
+    @staticmethod
+    def _flux_start(start):
+        if not (str(start).startswith('-') and _FLUX_DURATION.match(str(start)[1:])):
+            raise ValueError(f"Invalid range start: {start}")
+        return start
+
+    @staticmethod
+    def _flux_limit(limit):
+        if limit is None:
+            return ''
+        if int(limit) < 1:
+            raise ValueError("limit must be at least 1.")
+        return f'|> limit(n: {int(limit)})'
+
+    @staticmethod
+    def _flux_string(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"')
+##################################################################################################################################
+    def get_recent_ue_metrics(self, ue_id):
+        """
+        Returns the latest ue_metrics samples of a UE from the in-memory cache. In the simulation process the cache is
+        fed by the writes; elsewhere (the API process), or once the samples are older than RECENT_METRICS_TTL, the
+        latest samples are queried from the database and cached.
+        The samples have the same keys as the ones of get_ue_metrics.
+        :param ue_id: The ID of the UE.
+        :return: List of at most RECENT_METRICS_SIZE samples, oldest first.
+        """
+        samples = self.recent_metrics.get(ue_id)
+        if not samples:
+            samples = self.get_ue_metrics(ue_id, limit=self.recent_metrics.size)
+            if samples:
+                self.recent_metrics.put(ue_id, samples)
+        return samples
 ##################################################################################################################################
     def flush_all_data(self):
         from datetime import datetime, timezone
         import requests
 
         try:
-            if not hasattr(self, 'client'):
+            if not hasattr(self, 'sink'):
                 self.client_init()
+            if self.client is None:
+                self.sink.clear(self.bucket)
+                print(f"All data in the bucket {self.bucket} has been deleted successfully.")
+                return True
 
             bucket_to_clear = self.bucket
             start = "1970-01-01T00:00:00Z"
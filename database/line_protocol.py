@@ -0,0 +1,218 @@
+#########################################################################################################
+# line_protocol.py located in database folder. Precompiled InfluxDB line-protocol serializers. Building #
+# an influxdb_client Point per entity per write converts and escapes every tag and field through the    #
+# Point machinery each time. A LineTemplate is compiled once per entity class: the measurement, tag     #
+# keys and field keys are escaped and sorted up front, the tag prefix of an entity is computed once and #
+# cached on the entity, and field values are formatted with one small function per type. Lines can be  #
+# appended as bytes to a reusable LineBuffer that is handed to the write pipeline as a single record.   #
+# The output is identical to Point.to_line_protocol() for the same tags, fields and timestamp, and      #
+# parse_line() reads such a line back for the consumers of written records (caches, rollups), and       #
+# series_key() cuts the series of a line without parsing it (sampler).                                  #
+#########################################################################################################
+import math
+
+_ESCAPE_MEASUREMENT = str.maketrans({',': r'\,', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+_ESCAPE_KEY = str.maketrans({',': r'\,', '=': r'\=', ' ': r'\ ', '\n': r'\n', '\t': r'\t', '\r': r'\r'})
+_ESCAPE_STRING = str.maketrans({'"': r'\"', '\\': r'\\'})
+
+def escape_tag_value(value):
+    escaped = str(value).translate(_ESCAPE_KEY)
+    if escaped.endswith('\\'):
+        escaped += ' '
+    return escaped
+
+def _format_float(value):
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    text = repr(value)
+    # Whole numbers are written without the trailing ".0", as influxdb_client does
+    return text[:-2] if text.endswith('.0') else text
+
+def _format_int(value):
+    return f"{int(value)}i"
+
+def _format_bool(value):
+    return 'true' if value else 'false'
+
+def _format_str(value):
+    return '"' + str(value).translate(_ESCAPE_STRING) + '"'
+
+FIELD_FORMATTERS = {
+    float: _format_float,
+    int: _format_int,
+    bool: _format_bool,
+    str: _format_str,
+}
+
+class LineTemplate:
+    def __init__(self, measurement, tag_keys, fields):
+        """
+        :param measurement: Measurement name.
+        :param tag_keys: Tag keys, in the order their values are passed to prefix().
+        :param fields: Sequence of (field key, type) with type one of float, int, bool or str, in the order the values
+                       are passed to format() and write().
+        """
+        self.measurement = measurement
+        self.tag_keys = tuple(tag_keys)
+        self._tag_order = sorted(range(len(self.tag_keys)), key=lambda index: self.tag_keys[index])
+        self._escaped_measurement = measurement.translate(_ESCAPE_MEASUREMENT)
+        self._escaped_tag_keys = [key.translate(_ESCAPE_KEY) for key in self.tag_keys]
+        # Fields are written sorted by key, like Point does, each with its precompiled "key=" and formatter
+        self._fields = sorted(((key.translate(_ESCAPE_KEY) + '=', FIELD_FORMATTERS[kind], index)
+                               for index, (key, kind) in enumerate(fields)), key=lambda field: field[0])
+
+    def prefix(self, tag_values):
+        """
+        :param tag_values: Tag values in the order of tag_keys; None values are left out.
+        :return: The measurement and tag set of a line, followed by the separating space.
+        """
+        parts = [self._escaped_measurement]
+        for index in self._tag_order:
+            value = tag_values[index]
+            if value is None:
+                continue
+            value = escape_tag_value(value)
+            if value:
+                parts.append(f"{self._escaped_tag_keys[index]}={value}")
+        return ','.join(parts) + ' '
+
+    def cached_prefix(self, owner, tag_values):
+        """Returns the prefix for tag_values, computed once per owner and recomputed only when its tag values change."""
+        cache = owner.__dict__.setdefault('_line_prefixes', {})
+        cached = cache.get(self.measurement)
+        if cached is None or cached[0] != tag_values:
+            cached = cache[self.measurement] = (tag_values, self.prefix(tag_values))
+        return cached[1]
+
+    def format_fields(self, values):
+        """
+        :param values: Field values in the order of the fields given to the constructor; None values are left out.
+        :return: The comma separated field set, sorted by key.
+        """
+        fields = []
+        for key, formatter, index in self._fields:
+            value = values[index]
+            if value is None:
+                continue
+            value = formatter(value)
+            if value is not None:
+                fields.append(key + value)
+        return ','.join(fields)
+
+    def format(self, prefix, values, timestamp=None, fragment=None):
+        """
+        :param prefix: Result of prefix() or cached_prefix().
+        :param values: Field values in the order of the fields given to the constructor; None values are left out.
+        :param timestamp: Integer timestamp already in the write precision, or None for the server time.
+        :param fragment: Optional preformatted field set (see format_fields()) written before the fields of values,
+                         for fields shared by many lines.
+        :return: One line of line protocol, without the trailing newline.
+        """
+        fields = self.format_fields(values)
+        if fragment:
+            fields = f"{fragment},{fields}" if fields else fragment
+        line = prefix + fields
+        return line if timestamp is None else f"{line} {int(timestamp)}"
+
+    def write(self, buffer, prefix, values, timestamp=None, fragment=None):
+        """Formats one line and appends it to buffer (a LineBuffer)."""
+        buffer.append(self.format(prefix, values, timestamp, fragment))
+
+class LineBuffer:
+    """
+    Reusable buffer of newline separated line-protocol bytes. getvalue() returns a record the write pipeline and
+    every metrics sink accept; clear() keeps the buffer so the next batch can reuse it.
+    """
+    def __init__(self):
+        self._buffer = bytearray()
+        self.lines = 0
+
+    def append(self, line):
+        if self.lines:
+            self._buffer += b'\n'
+        self._buffer += line.encode('utf-8')
+        self.lines += 1
+
+    def getvalue(self):
+        return bytes(self._buffer)
+
+    def clear(self):
+        del self._buffer[:]
+        self.lines = 0
+
+    def __len__(self):
+        return self.lines
+
+_UNESCAPE = {'n': '\n', 't': '\t', 'r': '\r'}
+
+def _split_unescaped(text, separator, quotes=False):
+    """Splits text at every separator that is not escaped (nor, with quotes, inside a double quoted string)."""
+    parts, start, index, quoted = [], 0, 0, False
+    while index < len(text):
+        char = text[index]
+        if char == '\\':
+            index += 2
+            continue
+        if quotes and char == '"':
+            quoted = not quoted
+        elif char == separator and not quoted:
+            parts.append(text[start:index])
+            start = index + 1
+        index += 1
+    parts.append(text[start:])
+    return parts
+
+def _unescape(text):
+    if '\\' not in text:
+        return text
+    chars, index = [], 0
+    while index < len(text):
+        if text[index] == '\\' and index + 1 < len(text):
+            chars.append(_UNESCAPE.get(text[index + 1], text[index + 1]))
+            index += 2
+        else:
+            chars.append(text[index])
+            index += 1
+    return ''.join(chars)
+
+def _parse_field_value(value):
+    if value.startswith('"'):
+        return _unescape(value[1:-1])
+    if value[-1:] in ('i', 'u'):
+        return int(value[:-1])
+    if value in ('t', 'T', 'true', 'True', 'TRUE'):
+        return True
+    if value in ('f', 'F', 'false', 'False', 'FALSE'):
+        return False
+    return float(value)
+
+def parse_line(line):
+    """
+    Parses one line of line protocol, the inverse of LineTemplate.format() and Point.to_line_protocol().
+    :return: (measurement, tags, fields, timestamp) with tags and fields as dictionaries and timestamp an int in the
+             precision of the line, or None if the line has none.
+    """
+    parts = _split_unescaped(line.strip(), ' ', quotes=True)
+    key, fields = parts[0], parts[1] if len(parts) > 1 else ''
+    timestamp = int(parts[2]) if len(parts) > 2 and parts[2] else None
+    key_parts = _split_unescaped(key, ',')
+    tags = {}
+    for tag in key_parts[1:]:
+        name, value = _split_unescaped(tag, '=')[:2]
+        tags[_unescape(name)] = _unescape(value)
+    parsed_fields = {}
+    for field in _split_unescaped(fields, ',', quotes=True) if fields else ():
+        name = _split_unescaped(field, '=')[0]
+        parsed_fields[_unescape(name)] = _parse_field_value(field[len(name) + 1:])
+    return _unescape(key_parts[0]), tags, parsed_fields, timestamp
+
+def series_key(line):
+    """
+    :return: The measurement and tag set of a line, as written (escaped), without parsing it. Lines of the same series
+             have the same key.
+    """
+    index = line.find(' ')
+    while index > 0 and line[index - 1] == '\\':
+        index = line.find(' ', index + 1)
+    return line if index < 0 else line[:index]
@@ -0,0 +1,196 @@
+#########################################################################################################
+# metrics_sink.py located in database folder. A metrics sink is the backend the DatabaseManager write   #
+# pipeline hands its batches to. Three backends are available: the InfluxDB client used in production,  #
+# an in-memory ring buffer and an append-only line-protocol file. The last two let the simulator run    #
+# (and be benchmarked) without a live InfluxDB and make it possible to compare write-path costs offline. #
+# The backend is selected with the METRICS_SINK environment variable.                                   #
+#########################################################################################################
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timezone
+from influxdb_client import InfluxDBClient, Point, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+# Read from environment variables or use default values
+METRICS_SINK = os.getenv('METRICS_SINK', 'influxdb')  # 'influxdb', 'memory' or 'file'
+METRICS_SINK_PATH = os.getenv('METRICS_SINK_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'metrics'))  # Directory of the file sink
+METRICS_MEMORY_CAPACITY = int(os.getenv('METRICS_MEMORY_CAPACITY', '1000000'))  # Lines kept by the memory sink
+
+# Precision of the timestamps of records handed over as line protocol (str or bytes), the one of the precompiled
+# serializers of line_protocol.py
+LINE_PRECISION = WritePrecision.S
+_NANOSECONDS = {WritePrecision.S: 10**9, WritePrecision.MS: 10**6, WritePrecision.US: 10**3, WritePrecision.NS: 1}
+
+def split_lines(record):
+    """Lines of a line-protocol record (str or bytes); a LineBuffer record holds several newline separated lines."""
+    if isinstance(record, bytes):
+        record = record.decode('utf-8')
+    return [line for line in record.split('\n') if line]
+
+def has_timestamp(line):
+    """True if a line-protocol line ends with a timestamp."""
+    head, _, timestamp = line.rpartition(' ')
+    # The fields are never a bare integer (they contain '='), so a last token of digits is the timestamp
+    return bool(head) and timestamp.lstrip('-').isdigit()
+
+def to_nanoseconds(line, precision=LINE_PRECISION):
+    """Returns a line-protocol line with its timestamp, if it has one, converted from precision to nanoseconds."""
+    if has_timestamp(line):
+        head, _, timestamp = line.rpartition(' ')
+        return f"{head} {int(timestamp) * _NANOSECONDS[precision]}"
+    return line
+
+def to_lines(record):
+    """
+    Converts a record accepted by the write pipeline (Point, dict, str or bytes) to line-protocol strings, one per line.
+    Every timestamp is rendered in nanoseconds, line-protocol records are converted from LINE_PRECISION, so lines of
+    different precisions can share one file.
+    """
+    if isinstance(record, Point):
+        return [record.to_line_protocol(precision=WritePrecision.NS)]
+    if isinstance(record, dict):
+        return [Point.from_dict(record, write_precision=WritePrecision.NS).to_line_protocol()]
+    return [to_nanoseconds(line) for line in split_lines(record)]
+
+def to_line_protocol(record):
+    """Converts a record to one line-protocol string, newline separated if it holds several lines; see to_lines()."""
+    return '\n'.join(to_lines(record))
+
+class MetricsSink(ABC):
+    """Interface of a metrics backend. Sinks without a query engine leave supports_queries False."""
+    supports_queries = False
+
+    @abstractmethod
+    def write(self, bucket, records):
+        """Writes a batch of records (Points or line-protocol strings/bytes) to bucket."""
+
+    @abstractmethod
+    def write_lines(self, bucket, lines, precision=LINE_PRECISION):
+        """Writes line-protocol strings whose timestamps are in precision, used to replay the spool."""
+
+    def ping(self):
+        """Returns True if the backend is reachable."""
+        return True
+
+    @abstractmethod
+    def clear(self, bucket):
+        """Deletes everything stored in bucket."""
+
+    def close(self):
+        pass
+##################################################################################################################################
+class InfluxDBSink(MetricsSink):
+    supports_queries = True
+
+    def __init__(self, url, token, org):
+        if not token:
+            raise ValueError("INFLUXDB_TOKEN environment variable is not set.")
+        self.client = InfluxDBClient(url=url, token=token, org=org)
+        self.org = org
+        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self.query_api = self.client.query_api()
+
+    def write(self, bucket, records):
+        # Points carry their own precision, line-protocol records use LINE_PRECISION
+        points = [record for record in records if not isinstance(record, (str, bytes))]
+        lines = [record for record in records if isinstance(record, (str, bytes))]
+        if points:
+            self.write_api.write(bucket=bucket, record=points)
+        if lines:
+            self.write_api.write(bucket=bucket, record=lines, write_precision=LINE_PRECISION)
+
+    def write_lines(self, bucket, lines, precision=LINE_PRECISION):
+        self.write_api.write(bucket=bucket, record=lines, write_precision=precision)
+
+    def ping(self):
+        return self.client.ping()
+
+    def clear(self, bucket):
+        stop = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        self.client.delete_api().delete("1970-01-01T00:00:00Z", stop, '', bucket=bucket, org=self.org)
+
+    def close(self):
+        self.client.close()
+##################################################################################################################################
+class MemorySink(MetricsSink):
+    """Keeps the latest capacity lines in memory, oldest lines are dropped first. Lines are stored in nanoseconds."""
+    def __init__(self, capacity=METRICS_MEMORY_CAPACITY):
+        self._lines = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.lines_written = 0
+        self.bytes_written = 0
+
+    def write(self, bucket, records):
+        self.write_lines(bucket, [line for record in records for line in to_lines(record)], WritePrecision.NS)
+
+    def write_lines(self, bucket, lines, precision=LINE_PRECISION):
+        if precision != WritePrecision.NS:
+            lines = [to_nanoseconds(line, precision) for line in lines]
+        lines = [(bucket, line) for line in lines]
+        with self._lock:
+            self._lines.extend(lines)
+            self.lines_written += len(lines)
+            self.bytes_written += sum(len(line) for _, line in lines)
+
+    def lines(self, bucket=None):
+        """Returns the stored lines, optionally only those of one bucket."""
+        with self._lock:
+            return [line for line_bucket, line in self._lines if bucket is None or line_bucket == bucket]
+
+    def clear(self, bucket):
+        with self._lock:
+            self._lines = deque((entry for entry in self._lines if entry[0] != bucket), maxlen=self._lines.maxlen)
+##################################################################################################################################
+class LineProtocolFileSink(MetricsSink):
+    """Appends line protocol to one file per bucket (<path>/<bucket>.lp), with nanosecond timestamps."""
+    def __init__(self, path=METRICS_SINK_PATH):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._files = {}
+        self._lock = threading.Lock()
+        self.lines_written = 0
+        self.bytes_written = 0
+
+    def file_path(self, bucket):
+        return os.path.join(self.path, f"{bucket}.lp")
+
+    def write(self, bucket, records):
+        self.write_lines(bucket, [line for record in records for line in to_lines(record)], WritePrecision.NS)
+
+    def write_lines(self, bucket, lines, precision=LINE_PRECISION):
+        if precision != WritePrecision.NS:
+            lines = [to_nanoseconds(line, precision) for line in lines]
+        data = ''.join(line + '\n' for line in lines)
+        with self._lock:
+            file = self._files.get(bucket)
+            if file is None:
+                file = self._files[bucket] = open(self.file_path(bucket), 'a', encoding='utf-8')
+            file.write(data)
+            file.flush()
+            self.lines_written += len(lines)
+            self.bytes_written += len(data)
+
+    def clear(self, bucket):
+        with self._lock:
+            file = self._files.pop(bucket, None)
+            if file is not None:
+                file.close()
+            open(self.file_path(bucket), 'w').close()
+
+    def close(self):
+        with self._lock:
+            for file in self._files.values():
+                file.close()
+            self._files = {}
+##################################################################################################################################
+def create_sink(kind=METRICS_SINK, url=None, token=None, org=None):
+    """Creates the metrics sink selected by kind ('influxdb', 'memory' or 'file')."""
+    if kind == 'influxdb':
+        return InfluxDBSink(url, token, org)
+    if kind == 'memory':
+        return MemorySink()
+    if kind == 'file':
+        return LineProtocolFileSink()
+    raise ValueError(f"Unknown metrics sink: {kind}")
@@ -0,0 +1,57 @@
+#########################################################################################################
+# point_coalescer.py located in database folder. The PointCoalescer merges, within one scope, every     #
+# row written for the same bucket, measurement, tag set and timestamp into a single point. A UE gets    #
+# one ue_metrics row from generate_traffic (delay, jitter, loss) and a second one from                  #
+# calculate_throughput (throughput) with the same second-precision timestamp: two writes where one is   #
+# enough, and two points InfluxDB treats as the same series row. DatabaseManager.tick_scope() routes    #
+# the insert_data() rows of a scope through a coalescer and hands the merged points to the write        #
+# pipeline. Rows are keyed by the values insert_data() was called with, so nothing is serialized or     #
+# parsed; Points and line-protocol records (the batch writes of the TickKernel) are written as is.      #
+#########################################################################################################
+from datetime import datetime
+from influxdb_client import Point, WritePrecision
+
+def _second(timestamp):
+    """Timestamp of a row at WritePrecision.S: datetimes and ISO strings are truncated to the second."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.replace(microsecond=0) if isinstance(timestamp, datetime) else timestamp
+
+class PointCoalescer:
+    def __init__(self):
+        self._rows = {}  # (bucket, measurement, tags, timestamp) -> merged fields, in insertion order
+        self.added = 0
+
+    def add(self, bucket, measurement, tags, fields, timestamp):
+        """
+        Merge fields into the row already collected for the same key, or collect them. Fields written later win, as
+        they would in InfluxDB.
+        :param tags: Dictionary of the tags of the row.
+        :param fields: Dictionary of the fields of the row.
+        :param timestamp: datetime, ISO string or integer seconds; rows in the same second share a point.
+        """
+        key = (bucket, measurement, tuple(sorted(tags.items())), _second(timestamp))
+        merged = self._rows.get(key)
+        if merged is None:
+            self._rows[key] = dict(fields)
+        else:
+            merged.update(fields)
+        self.added += 1
+
+    def drain(self):
+        """
+        :return: List of (bucket, point) of the merged points, in the order their keys were first seen. Empties the coalescer.
+        """
+        drained = []
+        for (bucket, measurement, tags, timestamp), fields in self._rows.items():
+            point = Point(measurement)
+            for key, value in tags:
+                point.tag(key, value)
+            for name, value in fields.items():
+                point.field(name, value)
+            drained.append((bucket, point.time(timestamp, WritePrecision.S)))
+        self._rows = {}
+        return drained
+
+    def __len__(self):
+        return len(self._rows)
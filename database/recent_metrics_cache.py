@@ -0,0 +1,101 @@
+#########################################################################################################
+# recent_metrics_cache.py located in database folder. The RecentMetricsCache keeps the latest ue_metrics #
+# samples of every UE in memory so callers that need recent UE metrics (the API, the CLI) do not have   #
+# to run a Flux query over a full day of rows. In the simulation process the cache is fed by the write  #
+# pipeline: every batch that has been written (Points and line-protocol records) refreshes the samples  #
+# of its UEs, so the cache never serves points that did not reach the database. Processes that do not   #
+# write ue_metrics, like the API one, fill it from their database queries instead. An entry is served   #
+# for RECENT_METRICS_TTL seconds after its last refresh, and deleting a UE invalidates it.              #
+#########################################################################################################
+import os
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from database.line_protocol import parse_line
+from database.metrics_sink import to_lines
+
+# Read from environment variables or use default values
+RECENT_METRICS_SIZE = int(os.getenv('RECENT_METRICS_SIZE', '60'))  # Samples kept per UE
+RECENT_METRICS_TTL = float(os.getenv('RECENT_METRICS_TTL', '1.0'))  # Seconds an entry is served after its last refresh
+
+# Fields of the ue_metrics samples, also the fields read by the UE metric queries of the DatabaseManager
+UE_METRIC_FIELDS = ('throughput', 'ue_jitter', 'ue_packet_loss_rate', 'ue_delay')
+
+class RecentMetricsCache:
+    def __init__(self, size=RECENT_METRICS_SIZE, ttl=RECENT_METRICS_TTL):
+        """
+        :param size: Number of samples kept per UE, older samples are evicted first.
+        :param ttl: Seconds the samples of a UE are served after they were last refreshed.
+        """
+        self.size = max(1, int(size))
+        self.ttl = ttl
+        self._samples = {}
+        self._refreshed = {}  # UE ID -> time.monotonic() of the last refresh
+        self._lock = threading.Lock()
+
+    def on_written(self, bucket, records):
+        """
+        Write pipeline callback, called with every batch that has been written.
+        Only ue_metrics lines carrying at least one metric field are cached.
+        """
+        updates = {}
+        for record in records:
+            if isinstance(record, (str, bytes)) and ('ue_metrics' if isinstance(record, str) else b'ue_metrics') not in record:
+                continue  # Line-protocol records without UE metrics are not parsed
+            for line in to_lines(record):
+                if not line.startswith(('ue_metrics,', 'ue_metrics ')):
+                    continue
+                _, tags, fields, timestamp = parse_line(line)
+                ue_id = tags.get('ue_id')
+                if ue_id is None:
+                    continue
+                sample = {field: fields.get(field) for field in UE_METRIC_FIELDS}
+                if all(value is None for value in sample.values()):
+                    continue
+                # to_lines() renders every timestamp in nanoseconds
+                sample['timestamp'] = datetime.fromtimestamp(timestamp / 1e9, timezone.utc) if timestamp is not None else None
+                updates.setdefault(ue_id, []).append(sample)
+        if not updates:
+            return
+        now = time.monotonic()
+        with self._lock:
+            for ue_id, samples in updates.items():
+                cached = self._samples.get(ue_id)
+                if cached is None:
+                    cached = self._samples[ue_id] = deque(maxlen=self.size)
+                cached.extend(samples)
+                self._refreshed[ue_id] = now
+
+    def put(self, ue_id, samples):
+        """Replaces the cached samples of a UE with samples read from the database, oldest first."""
+        with self._lock:
+            self._samples[str(ue_id)] = deque(samples, maxlen=self.size)
+            self._refreshed[str(ue_id)] = time.monotonic()
+
+    def _fresh(self, ue_id):
+        refreshed = self._refreshed.get(ue_id)
+        return refreshed is not None and time.monotonic() - refreshed <= self.ttl
+
+    def get(self, ue_id):
+        """
+        :param ue_id: The ID of the UE.
+        :return: List of the cached samples of the UE, oldest first (empty if none are cached or they are older than ttl).
+        """
+        with self._lock:
+            return list(self._samples.get(str(ue_id), ())) if self._fresh(str(ue_id)) else []
+
+    def latest(self, ue_id):
+        with self._lock:
+            cached = self._samples.get(str(ue_id))
+            return cached[-1] if cached and self._fresh(str(ue_id)) else None
+
+    def invalidate(self, ue_id=None):
+        """Drops the cached samples of one UE, or of every UE when ue_id is None."""
+        with self._lock:
+            if ue_id is None:
+                self._samples.clear()
+                self._refreshed.clear()
+            else:
+                self._samples.pop(str(ue_id), None)
+                self._refreshed.pop(str(ue_id), None)
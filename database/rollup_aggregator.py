@@ -0,0 +1,157 @@
+#########################################################################################################
+# rollup_aggregator.py located in database folder. The RollupAggregator downsamples metric points in    #
+# process before they are stored. For every series (measurement + tag set) and every configured window #
+# (10 seconds and 1 minute by default) it keeps min, max, mean, count and last of each numeric field,   #
+# and when the window is over it emits one rollup point to a separate measurement, for example          #
+# ue_metrics_10s or sector_metrics_1m. Raw points are optional: they can all be kept, sampled (1 of     #
+# every N per series) or dropped, so storage and query cost follow the number of windows instead of the #
+# tick rate. A window closes when the newest timestamp of its measurement passes its end, or on flush().#
+# It reads line-protocol records (Points are serialized by the DatabaseManager before they get here).  #
+#########################################################################################################
+import os
+import threading
+from influxdb_client import Point, WritePrecision
+from database.line_protocol import parse_line
+from database.metrics_sink import split_lines, LINE_PRECISION
+
+# Read from environment variables or use default values
+ROLLUP_WINDOWS = os.getenv('ROLLUP_WINDOWS', '10s,1m')  # Comma separated windows, empty to disable rollups
+ROLLUP_MEASUREMENTS = os.getenv('ROLLUP_MEASUREMENTS', 'ue_metrics,sector_metrics,cell_metrics')  # Measurements rolled up
+ROLLUP_RAW_SAMPLE_EVERY = int(os.getenv('ROLLUP_RAW_SAMPLE_EVERY', '1'))  # Keep 1 of every N raw points per series, 0 drops them
+
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600}
+_PRECISION_SECONDS = {WritePrecision.S: 1, WritePrecision.MS: 1e3, WritePrecision.US: 1e6, WritePrecision.NS: 1e9}
+
+def parse_windows(windows):
+    """
+    :param windows: Comma separated windows like '10s,1m' (units s, m or h), or a list of them.
+    :return: List of (label, seconds), e.g. [('10s', 10), ('1m', 60)].
+    """
+    if isinstance(windows, str):
+        windows = [window.strip() for window in windows.split(',') if window.strip()]
+    parsed = []
+    for window in windows:
+        unit = window[-1]
+        if unit not in _UNIT_SECONDS or not window[:-1].isdigit() or int(window[:-1]) < 1:
+            raise ValueError(f"Invalid rollup window: {window}")
+        parsed.append((window, int(window[:-1]) * _UNIT_SECONDS[unit]))
+    return parsed
+
+class RollupAggregator:
+    def __init__(self, windows=ROLLUP_WINDOWS, measurements=ROLLUP_MEASUREMENTS, raw_sample_every=ROLLUP_RAW_SAMPLE_EVERY):
+        """
+        :param windows: Rollup windows, see parse_windows().
+        :param measurements: Comma separated string or list of the measurements to roll up.
+        :param raw_sample_every: Keep 1 of every N raw points per series; 1 keeps all of them, 0 drops all of them.
+        """
+        if isinstance(measurements, str):
+            measurements = [measurement.strip() for measurement in measurements.split(',') if measurement.strip()]
+        if raw_sample_every < 0:
+            raise ValueError("raw_sample_every cannot be negative.")
+        self.windows = parse_windows(windows)
+        self.measurements = frozenset(measurements)
+        self.raw_sample_every = raw_sample_every
+        self._open = {}  # measurement -> window seconds -> window start -> tags -> field -> stats
+        self._raw_counts = {}
+        # Newest timestamp seen per measurement, in seconds. Kept per measurement because entities do not all
+        # timestamp their points with the same clock.
+        self._watermarks = {}
+        self._lock = threading.Lock()
+
+    def handles(self, record):
+        """Line-protocol records (str or bytes, e.g. a LineBuffer) with lines of the rolled-up measurements."""
+        if not self.windows or not isinstance(record, (str, bytes)):
+            return False
+        return any((measurement if isinstance(record, str) else measurement.encode('utf-8')) in record
+                   for measurement in self.measurements)
+
+    def add_lines(self, record, precision=LINE_PRECISION):
+        """
+        Accumulates the numeric fields of every line of a rolled-up measurement into every window, for str or bytes
+        records holding one or more lines. Those lines are sampled as raw points; the other lines are kept.
+        :param precision: Precision of the timestamps of the lines.
+        :return: (record, rollup_points): the record with the lines to write (record itself when every line is kept,
+                 None when none is), and the rollup points of the windows the lines closed.
+        """
+        kept, rollups, sampled_out = [], [], False
+        for line in split_lines(record):
+            measurement, tags, fields, timestamp = parse_line(line)
+            if measurement in self.measurements and timestamp is not None:
+                keep_raw, closed = self._accumulate(measurement, tags, fields, int(timestamp / _PRECISION_SECONDS[precision]))
+                rollups.extend(closed)
+                if not keep_raw:
+                    sampled_out = True
+                    continue
+            kept.append(line)
+        if not sampled_out:
+            return record, rollups
+        return ('\n'.join(kept).encode('utf-8') if kept else None), rollups
+
+    def _accumulate(self, measurement, tags, fields, timestamp):
+        """Accumulates fields (name -> value) of a series at timestamp, in seconds; returns (keep_raw, rollup_points)."""
+        tags = tuple(sorted(tags.items()))
+        fields = [(name, value) for name, value in fields.items()
+                  if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        with self._lock:
+            open_windows = self._open.setdefault(measurement, {})
+            for _, seconds in (self.windows if fields else ()):
+                window = open_windows.setdefault(seconds, {}).setdefault(timestamp - timestamp % seconds, {})
+                stats = window.setdefault(tags, {})
+                for name, value in fields:
+                    field_stats = stats.get(name)
+                    if field_stats is None:
+                        stats[name] = [value, value, value, 1, value]
+                    else:
+                        if value < field_stats[0]:
+                            field_stats[0] = value
+                        if value > field_stats[1]:
+                            field_stats[1] = value
+                        field_stats[2] += value
+                        field_stats[3] += 1
+                        field_stats[4] = value
+            rollups = []
+            watermark = self._watermarks.get(measurement)
+            if watermark is None or timestamp > watermark:
+                self._watermarks[measurement] = timestamp
+                rollups = self._close_windows(measurement, timestamp)
+            keep_raw = self._sample_raw((measurement, tags))
+        return keep_raw, rollups
+
+    def flush(self):
+        """Close every open window, including the ones still in progress, and return their rollup points."""
+        with self._lock:
+            return [rollup for measurement in list(self._open) for rollup in self._close_windows(measurement, None)]
+
+    def _sample_raw(self, series):
+        if self.raw_sample_every == 0:
+            return False
+        if self.raw_sample_every == 1:
+            return True
+        count = self._raw_counts.get(series, 0)
+        self._raw_counts[series] = count + 1
+        return count % self.raw_sample_every == 0
+
+    def _close_windows(self, measurement, watermark):
+        rollups = []
+        open_windows = self._open.get(measurement, {})
+        for label, seconds in self.windows:
+            windows = open_windows.get(seconds, {})
+            for start in sorted(windows):
+                if watermark is not None and start + seconds > watermark:
+                    break
+                for tags, stats in windows.pop(start).items():
+                    rollups.append(self._rollup_point(f"{measurement}_{label}", tags, stats, start))
+        return rollups
+
+    @staticmethod
+    def _rollup_point(measurement, tags, stats, start):
+        point = Point(measurement)
+        for key, value in tags:
+            point.tag(key, value)
+        for name, (minimum, maximum, total, count, last) in stats.items():
+            point.field(f"{name}_min", float(minimum)) \
+                .field(f"{name}_max", float(maximum)) \
+                .field(f"{name}_mean", float(total) / count) \
+                .field(f"{name}_count", int(count)) \
+                .field(f"{name}_last", float(last))
+        return point.time(start, WritePrecision.S)
@@ -0,0 +1,250 @@
+#########################################################################################################
+# spool.py located in database folder. The DiskSpool is a write-ahead spool for metrics that could not  #
+# be written to the database. When a batch of the write pipeline fails (InfluxDB down, slow or         #
+# rejecting the request) its records are appended as line protocol to append-only segment files         #
+# instead of being lost. Segments rotate at a size limit and the oldest ones are dropped only when the  #
+# spool reaches its maximum size. A replay thread sends the segments back, oldest first, as soon as the #
+# database accepts writes again, with a rate limit so the recovery does not compete with live traffic.  #
+# Segments left by a previous run are picked up at start, so data survives a restart of the simulator.  #
+#########################################################################################################
+import os
+import time
+import threading
+from influxdb_client import Point, WritePrecision
+from database.metrics_sink import split_lines, has_timestamp, LINE_PRECISION
+from logs.logger_config import database_logger
+
+# Read from environment variables or use default values
+SPOOL_PATH = os.getenv('SPOOL_PATH', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'spool'))  # Empty disables the spool
+SPOOL_SEGMENT_BYTES = int(os.getenv('SPOOL_SEGMENT_BYTES', str(16 * 1024 * 1024)))  # Size at which a segment is rotated
+SPOOL_MAX_BYTES = int(os.getenv('SPOOL_MAX_BYTES', str(1024 * 1024 * 1024)))  # Oldest segments are dropped beyond this size
+SPOOL_REPLAY_RATE = float(os.getenv('SPOOL_REPLAY_RATE', '20000'))  # Maximum lines per second sent back while replaying
+SPOOL_REPLAY_BATCH = int(os.getenv('SPOOL_REPLAY_BATCH', '5000'))  # Lines per replay write
+SPOOL_RETRY_INTERVAL = float(os.getenv('SPOOL_RETRY_INTERVAL', '5.0'))  # Seconds between replay attempts, doubled on failure
+SPOOL_MAX_RETRY_INTERVAL = float(os.getenv('SPOOL_MAX_RETRY_INTERVAL', '60.0'))
+
+_SEGMENT_SUFFIX = '.lp'
+
+class DiskSpool:
+    def __init__(self, path=SPOOL_PATH, segment_bytes=SPOOL_SEGMENT_BYTES, max_bytes=SPOOL_MAX_BYTES,
+                 replay_rate=SPOOL_REPLAY_RATE, replay_batch=SPOOL_REPLAY_BATCH, retry_interval=SPOOL_RETRY_INTERVAL,
+                 max_retry_interval=SPOOL_MAX_RETRY_INTERVAL):
+        """
+        :param path: Directory of the segment files, created if needed.
+        :param segment_bytes: Size at which the segment being written is closed and a new one started.
+        :param max_bytes: Maximum size of all segments; beyond it the oldest closed segments are deleted.
+        :param replay_rate: Maximum lines per second written back by replay().
+        :param replay_batch: Lines per write while replaying.
+        """
+        self.path = path
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.max_bytes = max(1, int(max_bytes))
+        self.replay_rate = replay_rate
+        self.replay_batch = max(1, int(replay_batch))
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._open = {}  # (bucket, precision) -> [file, segment name, size]
+        self._segments = {}  # segment name -> size, closed and open
+        self._sequence = 0
+        self._replaying = None  # Segment being replayed, never dropped by _enforce_max_bytes()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stats = {'spooled': 0, 'replayed': 0, 'dropped': 0, 'replay_failures': 0}
+        for name in sorted(os.listdir(path)):
+            if name.endswith(_SEGMENT_SUFFIX) and self._parse_name(name) is not None:
+                self._segments[name] = os.path.getsize(os.path.join(path, name))
+                self._sequence = max(self._sequence, self._parse_name(name)[0])
+        if self._segments:
+            database_logger.info(f"Metrics spool has {len(self._segments)} segments to replay from a previous run.")
+
+    @staticmethod
+    def _parse_name(name):
+        """Segment names are <sequence>.<precision>.<bucket>.lp; returns (sequence, precision, bucket) or None."""
+        parts = name[:-len(_SEGMENT_SUFFIX)].split('.', 2)
+        if len(parts) != 3 or not parts[0].isdigit():
+            return None
+        return int(parts[0]), parts[1], parts[2]
+
+    def append(self, bucket, records):
+        """
+        Appends records (Points, dicts or line-protocol strings/bytes) for bucket. Points are spooled in nanoseconds and
+        line-protocol records in LINE_PRECISION; Points without a timestamp are stamped with the current time so a later
+        replay does not move them.
+        """
+        lines_by_precision = {}
+        now = time.time_ns()
+        for record in records:
+            if isinstance(record, dict):
+                record = Point.from_dict(record, write_precision=WritePrecision.NS)
+            if isinstance(record, Point):
+                line = record.to_line_protocol(precision=WritePrecision.NS)
+                if line:
+                    if not has_timestamp(line):
+                        line = f"{line} {now}"
+                    lines_by_precision.setdefault(WritePrecision.NS, []).append(line)
+            else:
+                lines_by_precision.setdefault(LINE_PRECISION, []).extend(split_lines(record))
+        with self._lock:
+            for precision, lines in lines_by_precision.items():
+                if not lines:
+                    continue
+                data = ('\n'.join(lines) + '\n').encode('utf-8')
+                segment = self._open.get((bucket, precision))
+                if segment is None or segment[2] >= self.segment_bytes:
+                    segment = self._rotate(bucket, precision)
+                segment[0].write(data)
+                segment[0].flush()
+                segment[2] += len(data)
+                self._segments[segment[1]] += len(data)
+                self._stats['spooled'] += len(lines)
+            self._enforce_max_bytes()
+
+    def _rotate(self, bucket, precision):
+        self._close_segment((bucket, precision))
+        self._sequence += 1
+        name = f"{self._sequence:012d}.{precision}.{bucket}{_SEGMENT_SUFFIX}"
+        segment = self._open[(bucket, precision)] = [open(os.path.join(self.path, name), 'ab'), name, 0]
+        self._segments[name] = 0
+        return segment
+
+    def _close_segment(self, key):
+        segment = self._open.pop(key, None)
+        if segment is not None:
+            segment[0].close()
+
+    def _enforce_max_bytes(self):
+        open_names = {segment[1] for segment in self._open.values()}
+        for name in sorted(self._segments):
+            if sum(self._segments.values()) <= self.max_bytes:
+                return
+            if name in open_names or name == self._replaying:
+                continue
+            lines = self._count_lines(name)
+            self._remove_segment(name)
+            self._stats['dropped'] += lines
+            database_logger.warning(f"Metrics spool is full, dropped segment {name} with {lines} lines.")
+
+    def _count_lines(self, name):
+        with open(os.path.join(self.path, name), 'rb') as file:
+            return sum(1 for _ in file)
+
+    def _remove_segment(self, name):
+        self._segments.pop(name, None)
+        try:
+            os.remove(os.path.join(self.path, name))
+        except FileNotFoundError:
+            pass
+
+    def pending_bytes(self):
+        with self._lock:
+            return sum(self._segments.values())
+
+    def has_pending(self):
+        with self._lock:
+            return any(self._segments.values())
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['segments'] = len(self._segments)
+            stats['pending_bytes'] = sum(self._segments.values())
+        return stats
+
+    def replay(self, write_fn):
+        """
+        Writes the spooled lines back, oldest segment first, at most replay_rate lines per second. A segment is deleted
+        once all its lines are written. If a write fails the lines not yet written are kept and the exception is raised.
+        :param write_fn: Callable(bucket, lines, precision) writing line-protocol strings.
+        :return: Number of lines written.
+        """
+        replayed = 0
+        while not self._stop.is_set():
+            with self._lock:
+                names = sorted(name for name, size in self._segments.items() if size)
+                if not names:
+                    # Drop empty segment files of closed segments
+                    for name in [name for name in self._segments if name not in {s[1] for s in self._open.values()}]:
+                        self._remove_segment(name)
+                    return replayed
+                name = names[0]
+                sequence, precision, bucket = self._parse_name(name)
+                # Close the segment if it is still being written, new records go to a new one
+                for key, segment in list(self._open.items()):
+                    if segment[1] == name:
+                        self._close_segment(key)
+                self._replaying = name
+            try:
+                with open(os.path.join(self.path, name), 'rb') as file:
+                    lines = [line.decode('utf-8') for line in file.read().splitlines() if line]
+            except FileNotFoundError:
+                # Deleted outside the spool, forget the segment instead of retrying it forever
+                database_logger.warning(f"Metrics spool segment {name} no longer exists, dropping it.")
+                self._keep_unwritten(name, [])
+                continue
+            except Exception:
+                with self._lock:
+                    self._replaying = None  # The segment stays, it is retried on the next replay
+                raise
+            written = 0
+            try:
+                while written < len(lines) and not self._stop.is_set():
+                    started = time.monotonic()
+                    batch = lines[written:written + self.replay_batch]
+                    write_fn(bucket, batch, precision)
+                    written += len(batch)
+                    with self._lock:
+                        self._stats['replayed'] += len(batch)
+                    if self.replay_rate > 0:
+                        self._stop.wait(max(0.0, len(batch) / self.replay_rate - (time.monotonic() - started)))
+            finally:
+                replayed += written
+                self._keep_unwritten(name, lines[written:])
+
+    def _keep_unwritten(self, name, lines):
+        with self._lock:
+            self._replaying = None
+            if not lines:
+                self._remove_segment(name)
+                return
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            temporary = os.path.join(self.path, name + '.tmp')
+            with open(temporary, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, os.path.join(self.path, name))
+            self._segments[name] = len(data)
+
+    def start(self, write_fn):
+        """Starts the replay thread, which calls replay(write_fn) every retry_interval seconds while lines are pending."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(write_fn,), name="metrics-spool-replay", daemon=True)
+        self._thread.start()
+
+    def _run(self, write_fn):
+        interval = self.retry_interval
+        while not self._stop.wait(interval):
+            if not self.has_pending():
+                continue
+            try:
+                replayed = self.replay(write_fn)
+                if replayed:
+                    database_logger.info(f"Replayed {replayed} spooled lines to the database.")
+                interval = self.retry_interval
+            except Exception as e:
+                with self._lock:
+                    self._stats['replay_failures'] += 1
+                interval = min(interval * 2, self.max_retry_interval)
+                database_logger.warning(f"Spool replay failed, retrying in {interval:.0f}s: {e}")
+
+    def stop(self):
+        """Stops the replay thread and closes the segments. Lines not replayed stay on disk for the next run."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for key in list(self._open):
+                self._close_segment(key)
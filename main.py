@@ -19,6 +19,7 @@ from network.sector_manager import SectorManager
 from network.NetworkLoadManager import NetworkLoadManager
 from logs.logger_config import gnodbe_load_logger, ue_logger
 from network.network_delay import NetworkDelay
+from network.tick_kernel import TickKernel
 from simulator_cli import SimulatorCLI
 from threading import Thread
 from API_Gateway import API
@@ -43,13 +44,11 @@ def run_api(queue):
 
     api_server_thread.join()  # Wait for the API server thread to finish
 
-def generate_traffic_loop(traffic_controller, ue_list, network_load_manager, network_delay_calculator, db_manager):
+def generate_traffic_loop(traffic_controller, ue_manager, network_load_manager):
     print(f"Debug: inside generate_traffic_loop of main.py ")  # Debugging line
-    while True:
-        for ue in ue_list:
-            throughput_data = traffic_controller.calculate_throughput(ue)
-            network_load_manager.network_measurement()
-        time.sleep(1)
+    # One tick = traffic for all UEs, then one load aggregation and one network measurement
+    tick_kernel = TickKernel(traffic_controller, network_load_manager, ue_manager)
+    tick_kernel.run()  # The traffic loop drives simulated time, one tick interval per pass
 
 def main():
     logging.basicConfig(level=logging.INFO)
@@ -73,10 +72,11 @@ def main():
 
     # Database connection
     db_manager = DatabaseManager.get_instance()
+    db_manager.start_spool()  # Only this process spools, the API process was started without it
     if db_manager.test_connection():
-        print("Connection to InfluxDB successful.")
+        print(f"Connection to metrics sink '{type(db_manager.sink).__name__}' successful.")
     else:
-        print("Failed to connect to InfluxDB. Exiting...")
+        print(f"Failed to connect to metrics sink '{type(db_manager.sink).__name__}'. Exiting...")
         return
 
     # Network Initialization
@@ -93,7 +93,7 @@ def main():
     network_delay_calculator = NetworkDelay()
 
     traffic_controller_instance = TrafficController()
-    traffic_thread = Thread(target=generate_traffic_loop, args=(traffic_controller_instance, ues, network_load_manager, network_delay_calculator, db_manager))
+    traffic_thread = Thread(target=generate_traffic_loop, args=(traffic_controller_instance, ue_manager, network_load_manager))
     traffic_thread.start()
 
     monitoring_thread = Thread(target=network_load_manager.monitoring)
@@ -5,6 +5,8 @@
 # network performance and logs network metrics for analysis. to address future needs around flexibly incorporating more advanced metrics    #
 # like cell load, sector load, gnodb load, network load calulcattion, and load balancing techniques.                                        #
 #############################################################################################################################################
+import os
+import threading
 from network.cell import Cell
 from network.sector import Sector
 from network.network_delay import NetworkDelay
@@ -12,9 +14,18 @@ from network.gNodeB_manager import gNodeBManager
 from network.cell_manager import CellManager
 from network.sector_manager import SectorManager
 from database.database_manager import DatabaseManager
+from database.line_protocol import LineBuffer
+from network.ue_store import UEStore
+from network.load_snapshot import LoadSnapshot
+from network.topology import CompiledTopology, SECTOR_COUNT_WEIGHT, SECTOR_THROUGHPUT_WEIGHT
 from network.loadbalancer import LoadBalancer
+from network.simulation_clock import SimulationClock
 from logs.logger_config import cell_load_logger, sector_load_logger, gnodbe_load_logger, sector_logger
-import time
+
+# Read from environment variables or use default values
+LOAD_RECONCILE_TICKS = max(1, int(os.getenv('LOAD_RECONCILE_TICKS', '60')))  # Loads are fully recomputed every N monitoring ticks
+MONITORING_MAX_WAIT = float(os.getenv('MONITORING_MAX_WAIT', '5.0'))  # Wall seconds monitoring waits for the next simulated second
+CONGESTION_THRESHOLD = 80  # Load percentage above which load balancing is triggered
 
 class NetworkLoadManager:
     _instance = None
@@ -38,34 +49,122 @@ class NetworkLoadManager:
         self.gNodeB_manager = gNodeB_manager
         self.db_manager = DatabaseManager.get_instance()
         self.load_balancer = LoadBalancer()
+        self.clock = SimulationClock.get_instance()
+        self.line_buffer = LineBuffer()  # Reused for the load lines of every refresh_snapshot call
+        self._updates = 0  # Calls of update_loads(), the first one computes every load
+        self.topology = None  # CompiledTopology of the latest full recomputation
+        self._cell_load_sum = float(0)  # Running sum of the loads of all cells
+        self._snapshot = LoadSnapshot.empty()  # Loads of the latest tick, replaced as a whole by refresh_snapshot()
+        self._snapshot_lock = threading.Lock()
+        # The load balancer reads the loads of the latest tick from this manager
+        self.load_balancer.network_load_manager = self
         
 #####################################################################################################################   
-    def calculate_sector_load(self, sector: Sector):
-        """Calculate the load of a sector based on the number of connected UEs, their throughput, and its capacity.
-        :param sector: An instance of the Sector class.
-        :return: The load of the sector as a percentage.
+    # Loads are kept incrementally. The UEStore keeps the UE count and capped throughput of every sector as running sums
+    # and remembers the sectors whose sums changed; update_loads() recomputes only those sectors, in O(1) each, and
+    # applies the change of their load to the running load sums of their cell, gNodeB and the network. Once per tick
+    # refresh_snapshot() (the load phase of the TickKernel) turns these values into a LoadSnapshot, and the calculate_*
+    # methods and monitoring read the latest snapshot.
+    def update_loads(self):
         """
+        Brings the loads up to date with the UE attaches, detaches and throughput changes since the previous call.
+        Every LOAD_RECONCILE_TICKS calls all loads are recomputed instead, vectorized over a freshly compiled topology,
+        which also accounts for configuration changes and removes the rounding drift of the running sums.
+        :return: The sectors whose load was recomputed.
+        """
+        store = UEStore.get_instance()
+        self._updates += 1
+        if (self._updates - 1) % LOAD_RECONCILE_TICKS == 0:
+            store.recount_sectors()
+            store.pop_dirty_sectors()
+            # Vectorized recomputation of every load over the compiled topology
+            self.topology = CompiledTopology(self.sector_manager.sectors.values(), self.cell_manager.cells.values(),
+                                             self.cell_manager.gNodeBs.values())
+            self._apply_topology_loads(self.topology, self.topology.compute(store))
+            return self.topology.sectors
+        sectors = [self.sector_manager.sectors[sector_id] for sector_id in store.pop_dirty_sectors()
+                   if sector_id in self.sector_manager.sectors]
+        for sector in sectors:
+            self._apply_sector_load(sector, self._sector_load(sector, store))
+        return sectors
+
+    def _sector_load(self, sector, store):
         if sector.capacity == 0:
             return 100  # Indicates the sector is overloaded if capacity is 0
+        index = store.sector_index_of(sector.sector_id)
+        ue_count_load = (store.sector_ue_count[index] / sector.capacity) * 100
+        # Check for zero max throughput to default to 0 load
+        throughput_load = (store.sector_capped_throughput[index] / sector.max_throughput) * 100 if sector.max_throughput else 0
+        # Use constant weights for configurable relative importance
+        return float(SECTOR_COUNT_WEIGHT * ue_count_load + SECTOR_THROUGHPUT_WEIGHT * throughput_load)
 
-        ue_count_load = (len(sector.connected_ues) / sector.capacity) * 100 if sector.capacity else 0
+    def _apply_sector_load(self, sector, sector_load):
+        """Sets the load of sector and applies its change to the running load sums of its cell, gNodeB and the network."""
+        delta = sector_load - sector.sector_load_attribute
+        sector.sector_load_attribute = sector_load
+        cell = sector.cell
+        if not delta or cell is None or not getattr(cell, 'sectors', None):
+            return
+        cell.sector_load_sum += delta
+        cell_load = cell.sector_load_sum / len(cell.sectors)
+        cell_delta = cell_load - cell.cell_load
+        cell.cell_load = cell_load
+        self._cell_load_sum += cell_delta
+        gNodeB = cell.gNodeB
+        if gNodeB is not None and gNodeB.Cells:
+            gNodeB.cell_load_sum += cell_delta
+            gNodeB.gnb_load = gNodeB.cell_load_sum / len(gNodeB.Cells)
 
-        # Encapsulate throughput capping logic
-        total_capped_throughput = self.calculate_capped_throughput(sector)
+    def _apply_topology_loads(self, topology, loads):
+        """Sets every load, and the running load sums derived from them, from the TopologyLoads of topology."""
+        for sector, load in zip(topology.sectors, loads.sector_loads.tolist()):
+            sector.sector_load_attribute = load
+        for cell, load in zip(topology.cells, loads.cell_loads.tolist()):
+            cell.cell_load = load
+            cell.sector_load_sum = load * len(cell.sectors)
+        for gNodeB, load in zip(topology.gNodeBs, loads.gNodeB_loads.tolist()):
+            gNodeB.gnb_load = load
+            gNodeB.cell_load_sum = load * len(gNodeB.Cells)
+        self._cell_load_sum = loads.network_load * len(topology.cells)
 
-        # Check for zero max throughput to default to 0 load
-        throughput_load = (total_capped_throughput / sector.max_throughput) * 100 if sector.max_throughput else 0
-    
-        # Use constant weights for configurable relative importance
-        COUNT_WEIGHT = 0.7
-        TP_WEIGHT = 0.3
-        sector_load = COUNT_WEIGHT * ue_count_load + TP_WEIGHT * throughput_load
-        sector.sector_load_attribute = sector_load  # Update the sector's load attribute
+    def refresh_snapshot(self):
+        """
+        Computes the loads of this tick once, bottom-up (sectors, cells, gNodeBs, then the network), writes the load of
+        every sector, cell and gNodeB to the database as one record and publishes the snapshot for get_snapshot().
+        :return: The new LoadSnapshot.
+        """
+        with self._snapshot_lock:
+            self.update_loads()
+            sectors = self.sector_manager.sectors
+            cells = self.cell_manager.cells
+            gNodeBs = self.cell_manager.gNodeBs
+            snapshot = LoadSnapshot(
+                self._snapshot.tick + 1,
+                {sector_id: sector.sector_load_attribute for sector_id, sector in sectors.items()},
+                {cell_id: cell.cell_load if cell.sectors else 0 for cell_id, cell in cells.items()},
+                {gNodeB_id: gNodeB.gnb_load if gNodeB.Cells else 0 for gNodeB_id, gNodeB in gNodeBs.items()},
+                self._cell_load_sum / len(cells) if cells else 0,
+                timestamp=self.clock.time())
+            # Each load is written once per tick, all of them in one record
+            self.line_buffer.clear()
+            for entity in list(sectors.values()) + list(cells.values()) + list(gNodeBs.values()):
+                entity.to_line_protocol(self.line_buffer)
+            self.db_manager.insert_line_protocol(self.line_buffer)
+            self._snapshot = snapshot
+        return snapshot
 
-        # Directly write the sector load to the database
-        self.db_manager.write_sector_load(sector.sector_id, sector_load)
+    def get_snapshot(self):
+        """Returns the LoadSnapshot of the latest tick, computing the first one if no tick ran yet."""
+        if self._snapshot.tick < 0:
+            return self.refresh_snapshot()
+        return self._snapshot
 
-        return sector_load
+    def calculate_sector_load(self, sector):
+        """Load of a sector at the latest tick.
+        :param sector: An instance of the Sector class, or a sector ID.
+        :return: The load of the sector as a percentage.
+        """
+        return self.get_snapshot().sector_load(getattr(sector, 'sector_id', sector))
 
 
     def calculate_capped_throughput(self, sector: Sector):
@@ -73,81 +172,41 @@ class NetworkLoadManager:
         :param sector: An instance of the Sector class.
         :return: The total capped throughput.
         """
-        max_share = sector.max_throughput * 0.1
-        capped_ue_throughputs = [min(ue.throughput, max_share) for ue in sector.ues.values()]
-        return sum(capped_ue_throughputs)
+        store = UEStore.get_instance()
+        return float(store.sector_capped_throughput[store.sector_index_of(sector.sector_id)])
 ########################################################################################################################   
     def calculate_cell_load(self, cell: Cell):
         """
-        Calculate the load of a cell based on the loads of its sectors.
+        Load of a cell, the average load of its sectors, at the latest tick.
         :param cell: An instance of the Cell class.
         :return: The load of the cell as a percentage.
         """
-        # Check if the cell has sectors
-        if not cell.sectors:
-            return 0  # Return 0 if there are no sectors to avoid division by zero
-
-        # Calculate the load for each sector and store the loads in a list
-        sector_loads = [self.calculate_sector_load(sector) for sector in cell.sectors]
-
-        # Calculate the average load of the cell based on its sectors
-        cell_load = sum(sector_loads) / len(sector_loads)
-        cell.cell_load = cell_load  # Update the cell's attribute
-
-        # Directly write the cell load to the database using DatabaseManager's method
-        self.db_manager.write_cell_load(cell.ID, cell_load)
-
-        return cell_load
+        return self.get_snapshot().cell_load(cell.ID)
 ####################################################################################################################   
     def calculate_gNodeB_load(self):
         """
-        Calculate the load of each gNodeB based on the loads of its cells and write it to the database.
+        Load of each gNodeB, the average load of its cells, at the latest tick.
+        :return: Dictionary of gNodeB ID to load percentage.
         """
-        gNodeB_loads = {}
-        for gNodeB_id, gNodeB in self.cell_manager.gNodeBs.items():
-            if not gNodeB.Cells:
-                gNodeB_loads[gNodeB_id] = 0
-                continue
-        
-            cell_loads = [self.calculate_cell_load(cell) for cell in gNodeB.Cells]
-            gNodeB_load = sum(cell_loads) / len(cell_loads) if cell_loads else 0
-            gNodeB_loads[gNodeB_id] = gNodeB_load
-        
-            # Update the gNodeB's load
-            gNodeB.gnb_load = gNodeB_load
-        
-            # Serialize the gNodeB for InfluxDB
-            point = gNodeB.serialize_for_influxdb()
-        
-            # Write the serialized data point to InfluxDB
-            self.db_manager.insert_data(point)  
-        
-            # Log the load of each gNodeB
-            gnodbe_load_logger.info(f"gNodeB {gNodeB_id} Load: {gNodeB_load:.2f}%")
-        
-        return gNodeB_loads
+        return dict(self.get_snapshot().gNodeB_loads)
 ####################################################################################################################   
     def calculate_network_load(self):
         """
-        Calculate the overall network load based on the loads of all cells.
+        Overall network load, the average load of all cells, at the latest tick.
 
         :return: The average load of the network as a percentage.
         """
-        cells = self.cell_manager.cells.values()
-        
-        if not cells:
-            return 0
-        # Incorporate data volume into the calculation
-        #total_data_volume = sum(ue.data_volume for ue in self.ue_manager.get_ues())
-        cell_loads = [self.calculate_cell_load(cell) for cell in cells]
-        network_load = sum(cell_loads) / len(cell_loads)
-
-        return network_load
+        return self.get_snapshot().network_load
 ####################################################################################################################   
-    def network_measurement(self):
-        network_load = self.calculate_network_load()
+    def network_measurement(self, network_load=None):
+        """
+        Write one network measurement (load, delay, handover counts) to the database.
+
+        :param network_load: Network load already aggregated for this tick; calculated here when not provided.
+        """
+        if network_load is None:
+            network_load = self.calculate_network_load()
         #print(f"Network Load: {network_load:.2f}%")
-        network_load = self.calculate_network_load()
         # Calculate network delay
         network_delay_calculator = NetworkDelay()
         network_delay = network_delay_calculator.calculate_delay(network_load)
@@ -165,41 +224,51 @@ class NetworkLoadManager:
         """
         Continuously monitors sector load, cell load, and network load.
         Triggers load balancing if any load exceeds the congestion threshold.
+        The loads are computed and written once per tick by the TickKernel (refresh_snapshot); monitoring reads its
+        latest snapshot and handles each one once.
         """
+        last_tick = None
         while True:
-            # Calculate and log gNodeB loads
-            gNodeB_loads = self.calculate_gNodeB_load()
-            for gNodeB_id, load in gNodeB_loads.items():
-                gnodbe_load_logger.info(f"gNodeB {gNodeB_id} Load: {load:.2f}%")
-                if load > 80:  # Congestion threshold for gNodeBs
-                    gnodbe_load_logger.warning(f"gNodeB {gNodeB_id} is congested with a load of {load:.2f}%.")
-                    self.load_balancer.handle_load_balancing('gNodeB', gNodeB_id)
-
-            # Calculate and log cell loads
-            for cell_id, cell in self.cell_manager.cells.items():
-                cell_load = self.calculate_cell_load(cell)
-                cell_load_logger.info(f"Cell {cell_id} Load: {cell_load:.2f}%")
-                if cell_load > 80:  # Congestion threshold for cells
-                    cell_load_logger.warning(f"Cell {cell_id} is congested with a load of {cell_load:.2f}%.")
-                    self.load_balancer.handle_load_balancing('cell', cell_id)
-
-            # Calculate and log sector loads
-            for sector_id, sector in self.sector_manager.sectors.items():
-                sector_load = self.calculate_sector_load(sector)
-                sector_load_logger.info(f"Sector {sector_id} Load: {sector_load:.2f}%")
-                if sector_load > 80:  # Congestion threshold for sectors
-                    sector_load_logger.warning(f"Sector {sector_id} is congested with a load of {sector_load:.2f}%.")
-                    self.load_balancer.handle_load_balancing('sector', sector_id)
-
-            # Calculate and log network load
-            network_load = self.calculate_network_load()
-            cell_load_logger.info(f"Network average load: {network_load:.2f}%")
-            if network_load > 80:  # Congestion threshold for the network
-                cell_load_logger.warning(f"Network is congested with an average load of {network_load:.2f}%.")
+            try:
+                snapshot = self.get_snapshot()
+                if snapshot.tick != last_tick:
+                    last_tick = snapshot.tick
+                    self.handle_snapshot(snapshot)
+            except Exception as e:
+                # A failing iteration (a database error for example) must not end the monitoring thread
+                cell_load_logger.error(f"Load monitoring iteration failed: {e}")
+
+            # Wait one simulated second, so monitoring follows the simulation speed, but never forever if it stalls
+            self.clock.sleep(1, timeout=MONITORING_MAX_WAIT)
+
+    def handle_snapshot(self, snapshot):
+        """
+        Logs the loads of a LoadSnapshot and triggers load balancing for the entities above the congestion threshold.
+        :param snapshot: The LoadSnapshot of a tick.
+        """
+        for gNodeB_id, load in snapshot.gNodeB_loads.items():
+            gnodbe_load_logger.info(f"gNodeB {gNodeB_id} Load: {load:.2f}%")
+        for cell_id, load in snapshot.cell_loads.items():
+            cell_load_logger.info(f"Cell {cell_id} Load: {load:.2f}%")
+        for sector_id, load in snapshot.sector_loads.items():
+            sector_load_logger.info(f"Sector {sector_id} Load: {load:.2f}%")
 
-            time.sleep(1) 
+        # Trigger load balancing for the entities above the congestion threshold
+        loggers = {'gNodeB': gnodbe_load_logger, 'cell': cell_load_logger, 'sector': sector_load_logger}
+        loads = {'gNodeB': snapshot.gNodeB_loads, 'cell': snapshot.cell_loads, 'sector': snapshot.sector_loads}
+        for entity_type, entity_ids in snapshot.congested(CONGESTION_THRESHOLD).items():
+            for entity_id in entity_ids:
+                loggers[entity_type].warning(f"{entity_type} {entity_id} is congested with a load of {loads[entity_type][entity_id]:.2f}%.")
+                self.load_balancer.handle_load_balancing(entity_type, entity_id)
+
+        cell_load_logger.info(f"Network average load: {snapshot.network_load:.2f}%")
+        if snapshot.network_load > CONGESTION_THRESHOLD:
+            cell_load_logger.warning(f"Network is congested with an average load of {snapshot.network_load:.2f}%.")
 
 ################################################Finding Neighbors#########################################################
+    def get_all_cells(self):
+        return list(self.cell_manager.cells.values())
+
     def get_sorted_entities_by_load(self, entity_id):
         if entity_id.startswith("sector"):  # Assuming sector IDs have a unique prefix
             return self.get_sorted_neighbor_sectors(entity_id)
@@ -212,20 +281,23 @@ class NetworkLoadManager:
 
     def get_sorted_neighbor_sectors(self, sector_id):
         neighbors = self.sector_manager.get_neighbor_sectors(sector_id)
-        # Calculate load for each neighbor
-        neighbor_loads = [(neighbor_id, self.calculate_sector_load(neighbor)) for neighbor_id, neighbor in neighbors.items()]
+        # Load of each neighbor at the latest tick
+        snapshot = self.get_snapshot()
+        neighbor_loads = [(neighbor_id, snapshot.sector_load(neighbor_id)) for neighbor_id in neighbors]
         # Sort by load
         sorted_neighbors = sorted(neighbor_loads, key=lambda x: x[1], reverse=True)  # Assuming higher load should be first
         return [neighbor[0] for neighbor in sorted_neighbors]
 
     def get_sorted_neighbor_cells(self, cell_id):
         neighbors = self.cell_manager.get_neighbor_cells(cell_id)
-        neighbor_loads = [(neighbor_id, self.calculate_cell_load(neighbor)) for neighbor_id, neighbor in neighbors.items()]
+        snapshot = self.get_snapshot()
+        neighbor_loads = [(neighbor_id, snapshot.cell_load(neighbor_id)) for neighbor_id in neighbors]
         sorted_neighbors = sorted(neighbor_loads, key=lambda x: x[1], reverse=True)  # Assuming higher load should be first
         return [neighbor[0] for neighbor in sorted_neighbors]
 
     def get_sorted_neighbor_gNodeBs(self, gNodeB_id):
-        neighbors = self.gNodeBManager.get_neighbor_gNodeBs(gNodeB_id)
-        neighbor_loads = [(neighbor_id, self.calculate_gNodeB_load().get(neighbor_id, 0)) for neighbor_id in neighbors]
+        neighbors = self.gNodeB_manager.get_neighbor_gNodeBs(gNodeB_id)
+        snapshot = self.get_snapshot()
+        neighbor_loads = [(neighbor_id, snapshot.gNodeB_load(neighbor_id)) for neighbor_id in neighbors]
         sorted_neighbors = sorted(neighbor_loads, key=lambda x: x[1], reverse=True)  # Assuming higher load should be first
         return [neighbor[0] for neighbor in sorted_neighbors]
\ No newline at end of file
@@ -0,0 +1,297 @@
+#####################################################################################################################
+# address_pool.py is located in network folder. Pools the IP, MAC and IMEI of the UEs so every UE gets a unique one #
+# and a deleted UE gives its addresses back, instead of drawing random values that start colliding after a few     #
+# hundred UEs. IPv4Pool is a bitmap (one bit per address, 2 MB for a /8) over UE_IP_POOL_CIDR; MAC addresses and    #
+# IMEIs are handed out sequentially (MACs under the locally administered UE_MAC_PREFIX, IMEIs from the 8-digit      #
+# UE_IMEI_TAC on) with a free list for released values. Blocks of addresses for batch creation, and the Luhn check  #
+# digits of their IMEIs, are computed with NumPy. UEAddressPools groups the three pools of the UEs.                 #
+#####################################################################################################################
+import os
+import heapq
+import ipaddress
+import threading
+import numpy as np
+
+# Read from environment variables or use default values
+UE_IP_POOL_CIDR = os.getenv('UE_IP_POOL_CIDR', '10.0.0.0/8')  # Addresses of the UEs
+UE_MAC_PREFIX = os.getenv('UE_MAC_PREFIX', '02:00:00')  # First 3 octets of the UE MAC addresses (locally administered)
+UE_IMEI_TAC = os.getenv('UE_IMEI_TAC', '35000000')  # Type Allocation Code the IMEIs are numbered from
+
+FULL_WORD = np.uint64(0xFFFFFFFFFFFFFFFF)
+SCAN_WORDS = 4096  # Bitmap words searched at a time for free addresses
+
+class PoolExhaustedError(RuntimeError):
+    pass
+
+def luhn_check_digits(bodies):
+    """
+    Vectorized Luhn check digit of each number of bodies (e.g. the 14 digits of an IMEI).
+    :param bodies: Array of non-negative integers.
+    :return: Array of the check digits, appended to a body it makes a number passing luhn_valid().
+    """
+    bodies = np.asarray(bodies, dtype=np.int64)
+    total = np.zeros(bodies.shape, dtype=np.int64)
+    remaining = bodies.copy()
+    position = 0  # From the rightmost digit of the body, which is doubled
+    while np.any(remaining):
+        digits = remaining % 10
+        if position % 2 == 0:
+            digits = digits * 2
+            digits = digits - 9 * (digits > 9)
+        total += digits
+        remaining //= 10
+        position += 1
+    return (10 - total % 10) % 10
+
+def luhn_check_digit(body):
+    """Luhn check digit of one number, the scalar counterpart of luhn_check_digits() for single allocations."""
+    total = 0
+    for position, digit in enumerate(reversed(str(int(body)))):
+        digit = int(digit) * (2 if position % 2 == 0 else 1)
+        total += digit - 9 if digit > 9 else digit
+    return (10 - total % 10) % 10
+
+def luhn_valid(numbers):
+    """Vectorized Luhn check of complete numbers (body followed by its check digit)."""
+    numbers = np.asarray(numbers, dtype=np.int64)
+    return luhn_check_digits(numbers // 10) == numbers % 10
+
+class IPv4Pool:
+    def __init__(self, cidr=UE_IP_POOL_CIDR):
+        network = ipaddress.IPv4Network(cidr)
+        self.network = network
+        self.first = int(network.network_address)
+        self.size = network.num_addresses
+        self._words = np.zeros((self.size + 63) // 64, dtype=np.uint64)  # Bit set = address in use
+        self._set_bits(np.arange(self.size, len(self._words) * 64))  # Bits past the end of the network
+        if self.size > 2:
+            self._set_bits(np.array([0, self.size - 1]))  # Network and broadcast addresses
+        self._cursor = 0  # Words before the cursor are full
+        self._lock = threading.Lock()
+
+    def _set_bits(self, offsets, value=True):
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if len(offsets) == 0:
+            return
+        masks = np.left_shift(np.uint64(1), (offsets % 64).astype(np.uint64))
+        words = offsets // 64
+        if value:
+            np.bitwise_or.at(self._words, words, masks)
+        else:
+            np.bitwise_and.at(self._words, words, ~masks)
+
+    def _offset(self, address):
+        try:
+            offset = int(ipaddress.IPv4Address(address)) - self.first
+        except ValueError:
+            return None  # Not an IPv4 address
+        return offset if 0 <= offset < self.size else None
+
+    def _format(self, offsets):
+        values = np.asarray(offsets, dtype=np.int64) + self.first
+        octets = [(values >> shift & 0xFF).tolist() for shift in (24, 16, 8, 0)]
+        return [f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(*octets)]
+
+    def allocate_block(self, n):
+        """:return: List of n free addresses, lowest first, now in use."""
+        with self._lock:
+            found = []
+            word = self._cursor
+            while n > sum(map(len, found)) and word < len(self._words):
+                chunk = self._words[word:word + SCAN_WORDS]
+                bits = np.unpackbits(chunk.view(np.uint8), bitorder='little')
+                free = np.flatnonzero(bits == 0)[:n - sum(map(len, found))] + word * 64
+                found.append(free)
+                word += len(chunk)
+            offsets = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+            if len(offsets) < n:
+                raise PoolExhaustedError(f"No {n} free addresses left in {self.network}.")
+            self._set_bits(offsets)
+            # Skip the words that are now full
+            while self._cursor < len(self._words) and self._words[self._cursor] == FULL_WORD:
+                self._cursor += 1
+            return self._format(offsets)
+
+    def allocate(self):
+        """:return: The lowest free address, now in use."""
+        with self._lock:
+            while self._cursor < len(self._words) and self._words[self._cursor] == FULL_WORD:
+                self._cursor += 1
+            if self._cursor == len(self._words):
+                raise PoolExhaustedError(f"No free address left in {self.network}.")
+            free = ~int(self._words[self._cursor]) & int(FULL_WORD)
+            bit = (free & -free).bit_length() - 1  # Lowest free bit of the first word that is not full
+            self._words[self._cursor] |= np.uint64(1 << bit)
+            return self._format([self._cursor * 64 + bit])[0]
+
+    def claim(self, address):
+        """
+        Marks an address given by the user as in use; addresses outside the network are ignored.
+        :raises ValueError: If the address is already in use (or is the network or broadcast address).
+        """
+        offset = self._offset(address)
+        if offset is not None:
+            with self._lock:
+                if self._words[offset // 64] >> np.uint64(offset % 64) & np.uint64(1):
+                    raise ValueError(f"IP address {address} is already in use.")
+                self._set_bits([offset])
+
+    def release(self, address):
+        offset = self._offset(address)
+        if offset is not None and 0 < offset < self.size - 1:
+            with self._lock:
+                self._set_bits([offset], value=False)
+                self._cursor = min(self._cursor, offset // 64)
+
+    def in_use(self, address):
+        offset = self._offset(address)
+        return offset is not None and bool(self._words[offset // 64] >> np.uint64(offset % 64) & np.uint64(1))
+
+class SequentialPool:
+    """Numbers first..first + size - 1 handed out in order; released numbers are handed out again first."""
+    def __init__(self, first, size):
+        self.first = first
+        self.size = size
+        self._next = first
+        self._free = []  # Heap of the released numbers, entries no longer in _free_numbers are skipped
+        self._free_numbers = set()
+        self._claimed = set()  # Numbers at or after the counter given by the user, skipped by the counter
+        self._lock = threading.Lock()
+
+    def allocate_numbers(self, n):
+        """:return: Array of n numbers, released ones first, then a block from the counter."""
+        with self._lock:
+            numbers = []
+            while self._free and len(numbers) < n:
+                number = heapq.heappop(self._free)
+                if number in self._free_numbers:
+                    self._free_numbers.discard(number)
+                    numbers.append(number)
+            blocks = [np.array(numbers, dtype=np.int64)]
+            missing = n - len(numbers)
+            while missing > 0:
+                if self._next + missing > self.first + self.size:
+                    raise PoolExhaustedError(f"No {n} free values left in the pool.")
+                block = np.arange(self._next, self._next + missing, dtype=np.int64)
+                self._next += missing
+                if self._claimed:
+                    taken = np.isin(block, np.fromiter(self._claimed, dtype=np.int64))
+                    self._claimed.difference_update(block[taken].tolist())
+                    block = block[~taken]
+                blocks.append(block)
+                missing -= len(block)
+            return np.concatenate(blocks)
+
+    def claim_number(self, number, value=None):
+        """
+        Marks a number given by the user as in use; numbers outside the pool are ignored.
+        :param value: The address of the number, for the error message.
+        :raises ValueError: If the number is already in use.
+        """
+        if not self.first <= number < self.first + self.size:
+            return
+        with self._lock:
+            if number in self._claimed or (number < self._next and number not in self._free_numbers):
+                raise ValueError(f"{value or number} is already in use.")
+            if number >= self._next:
+                self._claimed.add(number)
+            else:
+                self._free_numbers.discard(number)
+
+    def release_number(self, number):
+        if not self.first <= number < self.first + self.size:
+            return
+        with self._lock:
+            if number < self._next and number not in self._free_numbers:
+                self._free_numbers.add(number)
+                heapq.heappush(self._free, number)
+
+class MACPool(SequentialPool):
+    def __init__(self, prefix=UE_MAC_PREFIX):
+        self.prefix = prefix.lower()
+        super().__init__(0, 1 << 24)  # The last 3 octets
+
+    def allocate_block(self, n):
+        numbers = self.allocate_numbers(n)
+        octets = [(numbers >> shift & 0xFF).tolist() for shift in (16, 8, 0)]
+        return [f"{self.prefix}:{a:02x}:{b:02x}:{c:02x}" for a, b, c in zip(*octets)]
+
+    def allocate(self):
+        return self.allocate_block(1)[0]
+
+    def _number(self, mac):
+        mac = str(mac).lower()
+        if not mac.startswith(self.prefix + ':'):
+            return None
+        try:
+            return int(mac[len(self.prefix) + 1:].replace(':', ''), 16)
+        except ValueError:
+            return None
+
+    def claim(self, mac):
+        number = self._number(mac)
+        if number is not None:
+            self.claim_number(number, f"MAC address {mac}")
+
+    def release(self, mac):
+        number = self._number(mac)
+        if number is not None:
+            self.release_number(number)
+
+class IMEIPool(SequentialPool):
+    def __init__(self, tac=UE_IMEI_TAC):
+        # 14-digit bodies (TAC + 6-digit serial) from the TAC on; past the last serial the next TAC is used
+        first = int(tac) * 10**6
+        super().__init__(first, 10**14 - first)
+
+    def allocate_block(self, n):
+        bodies = self.allocate_numbers(n)
+        imeis = bodies * 10 + luhn_check_digits(bodies)
+        return [f"{imei:015d}" for imei in imeis.tolist()]
+
+    def allocate(self):
+        body = int(self.allocate_numbers(1)[0])
+        return f"{body * 10 + luhn_check_digit(body):015d}"
+
+    def _number(self, imei):
+        imei = str(imei)
+        return int(imei[:14]) if len(imei) == 15 and imei.isdigit() else None
+
+    def claim(self, imei):
+        number = self._number(imei)
+        if number is not None:
+            self.claim_number(number, f"IMEI {imei}")
+
+    def release(self, imei):
+        number = self._number(imei)
+        if number is not None:
+            self.release_number(number)
+
+class UEAddressPools:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, cidr=UE_IP_POOL_CIDR, mac_prefix=UE_MAC_PREFIX, tac=UE_IMEI_TAC):
+        self.ip = IPv4Pool(cidr)
+        self.mac = MACPool(mac_prefix)
+        self.imei = IMEIPool(tac)
+
+    def allocate_block(self, n):
+        """:return: Lists of n IPs, n MAC addresses and n IMEIs for batch creation."""
+        return self.ip.allocate_block(n), self.mac.allocate_block(n), self.imei.allocate_block(n)
+
+    def release(self, ip=None, mac=None, imei=None):
+        """Gives the addresses of a deleted UE back to the pools."""
+        if ip:
+            self.ip.release(ip)
+        if mac:
+            self.mac.release(mac)
+        if imei:
+            self.imei.release(imei)
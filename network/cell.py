@@ -16,7 +16,11 @@ from influxdb_client.client.write_api import SYNCHRONOUS
 from database.time_utils import get_current_time_ntp, server_pools
 from influxdb_client.client.write_api import WritePrecision
 from datetime import datetime
+from database.line_protocol import LineTemplate
+from network.simulation_clock import SimulationClock
+from network.ue_registry import OrderedUESet
 cell_instances = {}
+CELL_METRICS_LINE = LineTemplate("cell_metrics", ("cell_id", "gnodeb_id"), (("cell_load", float), ("current_ue_count", int)))
 
 class Cell:
     def __init__(self, cell_id, gnodeb_id, frequencyBand, duplexMode, tx_power, bandwidth, ssbPeriodicity, ssbOffset, maxConnectUes, max_throughput,  channelModel, sectorCount, trackingArea=None, is_active=True, technology="5GNR"):
@@ -35,8 +39,7 @@ class Cell:
         self.max_throughput = max_throughput# Maximum throughput the cell can handle in Mbps
         self.ChannelModel = channelModel     # Channel model used for the cell (e.g., urban, rural)
         self.TrackingArea = trackingArea     # Tracking area code, if applicable
-        self.ConnectedUEs = []              # List of UEs currently connected to the cell
-        self.assigned_UEs = []              # Initialize the list of assigned UEs
+        self._ues = OrderedUESet()          # UEs of the sectors of the cell, updated by the sectors on attach and detach
         self.last_ue_update = None          # Timestamp of the last update to the UE list
         self.last_update = None             # Timestamp of the last update to any cell attribute
         self.IsActive = is_active           # Indicates whether the cell is active or not
@@ -46,6 +49,7 @@ class Cell:
         self.gNodeB = None                  # Initialize with None
         self.Technology = technology
         self.cell_load = float(0)           # this is cell load for each cell and shoudl be float!
+        self.sector_load_sum = float(0)     # Running sum of the loads of its sectors, kept by the NetworkLoadManager
         current_time = get_current_time_ntp()
         # Logging statement should be here, after all attributes are set
         cell_logger.info(f" A Cell '{cell_id}' has been created at '{current_time}' in gNodeB '{gnodeb_id}' with max capacity {self.maxConnectUes} ue.")
@@ -88,12 +92,13 @@ class Cell:
 
         }
 ####################################################################################### 
-    def serialize_for_influxdb(self, cell_load):
+    def serialize_metadata_for_influxdb(self):
+        """Static configuration of the cell, written at initialization and when the configuration changes."""
         try:
             # Convert current UTC time to a UNIX timestamp in seconds
-            unix_timestamp_seconds = int(datetime.utcnow().timestamp())
-    
-            point = Point("cell_metrics") \
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
+
+            point = Point("cell_metadata") \
                 .tag("cell_id", str(self.ID)) \
                 .tag("gnodeb_id", str(self.gNodeB_ID)) \
                 .tag("entity_type", "cell") \
@@ -111,15 +116,48 @@ class Cell:
                 .field("CellisActive", bool(self.IsActive)) \
                 .field("sector_count", int(self.SectorCount)) \
                 .field("is_active", bool(self.IsActive)) \
-                .field("cell_load", self.cell_load)\
                 .time(unix_timestamp_seconds, WritePrecision.S)  # Set the timestamp in seconds
-    
+
+            return point
+        except Exception as e:
+            database_logger.error(f"Error serializing cell metadata for InfluxDB: {e}")
+            raise
+
+    def serialize_for_influxdb(self, cell_load=None):
+        """
+        Load and UE count of the cell.
+        :param cell_load: Load to report, defaults to the cell_load attribute.
+        """
+        try:
+            # Convert current UTC time to a UNIX timestamp in seconds
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
+
+            point = Point("cell_metrics") \
+                .tag("cell_id", str(self.ID)) \
+                .tag("gnodeb_id", str(self.gNodeB_ID)) \
+                .field("cell_load", float(self.cell_load if cell_load is None else cell_load)) \
+                .field("current_ue_count", int(self.current_ue_count)) \
+                .time(unix_timestamp_seconds, WritePrecision.S)  # Set the timestamp in seconds
+
             return point
         except Exception as e:
             database_logger.error(f"Error serializing cell data for InfluxDB: {e}")
             # Depending on your error handling policy, you might want to re-raise the exception or return None
             raise
 
+    def to_line_protocol(self, buffer=None):
+        """
+        Precompiled counterpart of serialize_for_influxdb(), producing the same line without building a Point.
+        :param buffer: Optional LineBuffer the line is appended to.
+        :return: The line, or None when it has been appended to buffer.
+        """
+        prefix = CELL_METRICS_LINE.cached_prefix(self, (str(self.ID), str(self.gNodeB_ID)))
+        values = (self.cell_load, self.current_ue_count)
+        timestamp = int(SimulationClock.get_instance().time())
+        if buffer is None:
+            return CELL_METRICS_LINE.format(prefix, values, timestamp)
+        CELL_METRICS_LINE.write(buffer, prefix, values, timestamp)
+
 ####################################################################################
     def add_sector_to_cell(self, sector):
     # Directly work with the self instance, no need to find by cell_id
@@ -167,17 +205,32 @@ class Cell:
                 return sector
         return None  # Or, alternatively, raise an exception if the sector is not found.
     
+    @property
+    def ConnectedUEs(self):
+        """Live view of the IDs of the UEs connected to the cell, in attach order."""
+        return self._ues
+
+    # Every UE of a sector is also assigned to its cell, both names give the same view
+    assigned_UEs = ConnectedUEs
+
+    def ue_attached(self, ue_id):
+        """Called by a sector of the cell when a UE attaches to it."""
+        self._ues.add(ue_id)
+        self.IsActive = True
+
+    def ue_detached(self, ue_id):
+        """Called by a sector of the cell when a UE leaves it."""
+        self._ues.discard(ue_id)
+        # Update the IsActive attribute based on the presence of connected UEs
+        self.IsActive = len(self._ues) > 0
+
     def update_ue_lists(self):
-        # Reset the lists to ensure they only contain current UEs
-        self.ConnectedUEs = []
-        self.assigned_UEs = []
-        # Aggregate UE information from all sectors
-        for sector in self.sectors:  # Assuming self.sectors is a list of Sector objects
-            self.ConnectedUEs.extend(sector.connected_ues)  # Assuming sector.connected_ues is a list of UE IDs
-            self.assigned_UEs.extend(sector.connected_ues)  # Similarly for assigned UEs
-        # Optionally, remove duplicates if any UE is connected or assigned to multiple sectors
-        self.ConnectedUEs = list(set(self.ConnectedUEs))
-        self.assigned_UEs = list(set(self.assigned_UEs))
-    
+        """
+        Rebuilds the UEs of the cell from all its sectors; attach and detach keep them up to date otherwise. The set is
+        refilled in place, so views of ConnectedUEs taken before stay current.
+        """
+        self._ues.clear()
+        for sector in self.sectors:
+            self._ues.update(sector.connected_ues)
         # Update the IsActive attribute based on the presence of connected UEs
-        self.IsActive = len(self.ConnectedUEs) > 0
\ No newline at end of file
+        self.IsActive = len(self._ues) > 0
\ No newline at end of file
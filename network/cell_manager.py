@@ -69,9 +69,8 @@ class CellManager:
             # Add the new cell to the cells dictionary
             self.cells[cell_id] = new_cell
 
-            # Serialize for InfluxDB and insert data
-            point = new_cell.serialize_for_influxdb(cell_load)
-            self.db_manager.insert_data(point)
+            # Serialize for InfluxDB and insert data: static configuration once, then the first load sample
+            self.db_manager.insert_data_batch([new_cell.serialize_metadata_for_influxdb(), new_cell.serialize_for_influxdb(cell_load)])
 
         cell_logger.info("Cells initialization completed.")
         #print(f"Initialized cells print for test the issue: {self.cells}")  # Add this line to print out the cells
@@ -100,8 +99,8 @@ class CellManager:
         # Assuming the Cell class has an update_ue_lists method
         new_cell.update_ue_lists()  # Update the UE lists of the newly added cell
 
-        point = new_cell.serialize_for_influxdb()  # Serialize the cell for InfluxDB
-        self.db_manager.insert_data(point)  # Insert the serialized data into the database
+        # Serialize the cell for InfluxDB and insert the serialized data into the database
+        self.db_manager.insert_data_batch([new_cell.serialize_metadata_for_influxdb(), new_cell.serialize_for_influxdb()])
 
     def remove_cell(self, cell_id):
         """
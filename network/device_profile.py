@@ -0,0 +1,128 @@
+#####################################################################################################################
+# device_profile.py is located in network folder. A DeviceProfile holds the configuration a UE shares with every   #
+# other UE of the same device type (RAT, bandwidth, modulation list, bandwidth parts, SNR thresholds, MIMO, coding, #
+# RLC mode, model, processing, ...). Profiles are immutable and interned by the DeviceProfileRegistry: UEs created  #
+# from the same ue_config.json entry point to one profile object instead of carrying their own copies of the lists  #
+# and strings. Changing a profile field of one UE gives it another interned profile (copy on write). Each profile   #
+# formats its ue_metadata fields once, so serializing a UE only formats its own per-UE fields.                      #
+#####################################################################################################################
+import re
+import threading
+from database.line_protocol import LineTemplate
+
+# UE attribute, configuration key (snake case), ue_metadata field and field type of every profile field
+PROFILE_FIELDS = (
+    ('RAT', 'rat', 'rat', str),
+    ('MaxBandwidth', 'max_bandwidth', 'max_bandwidth', int),
+    ('DuplexMode', 'duplex_mode', 'duplex_mode', str),
+    ('TxPower', 'tx_power', 'tx_power', int),
+    ('Modulation', 'modulation', 'modulation', str),
+    ('Coding', 'coding', 'coding', str),
+    ('MIMO', 'mimo', 'mimo', str),
+    ('Processing', 'processing', 'processing', str),
+    ('BandwidthParts', 'bandwidth_parts', 'bandwidth_parts', str),
+    ('ChannelModel', 'channel_model', 'channel_model', str),
+    ('TrafficModel', 'traffic_model', 'traffic_model', str),
+    ('RLCMode', 'rlc_mode', 'rlc_mode', str),
+    ('SNRThresholds', 'snr_thresholds', 'snr_thresholds', str),
+    ('HOMargin', 'ho_margin', 'ho_margin', str),
+    ('N310', 'n310', 'n310', str),
+    ('N311', 'n311', 'n311', str),
+    ('Model', 'model', 'model', str),
+)
+PROFILE_ATTRIBUTES = tuple(field[0] for field in PROFILE_FIELDS)
+# Values used when the configuration does not give one, as UE did before profiles
+PROFILE_DEFAULTS = {'MaxBandwidth': 0, 'TxPower': 0, 'SNRThresholds': ()}
+# Profile fields of the ue_metadata lines, formatted once per profile
+PROFILE_METADATA_LINE = LineTemplate("ue_metadata", (), [(field, kind) for _, _, field, kind in PROFILE_FIELDS])
+
+def camel_to_snake(name):
+    name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+def _freeze(value):
+    """Lists become tuples so a profile, shared by many UEs, cannot be modified through one of them."""
+    return tuple(value) if isinstance(value, list) else value
+
+def _metadata_value(value, kind):
+    """Value of a profile field in ue_metadata, as UE.serialize_metadata_for_influxdb() always wrote it."""
+    if isinstance(value, tuple):
+        return ','.join(map(str, value))
+    return int(value) if kind is int else str(value)
+
+class DeviceProfile:
+    __slots__ = ('values', 'metadata_fields', 'metadata_fragment')
+
+    def __init__(self, values):
+        """
+        Use DeviceProfileRegistry.intern() instead, which returns the shared profile for values.
+        :param values: Tuple of the profile values in the order of PROFILE_FIELDS.
+        """
+        values = tuple(_freeze(value) for value in values)
+        object.__setattr__(self, 'values', values)
+        # Fields of the ue_metadata Point and the preformatted line protocol of the same fields
+        metadata_fields = {field: _metadata_value(value, kind)
+                           for (_, _, field, kind), value in zip(PROFILE_FIELDS, values)}
+        object.__setattr__(self, 'metadata_fields', metadata_fields)
+        object.__setattr__(self, 'metadata_fragment', PROFILE_METADATA_LINE.format_fields(tuple(metadata_fields.values())))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DeviceProfile is immutable, use DeviceProfileRegistry.replace().")
+
+    def get(self, attribute):
+        return self.values[PROFILE_ATTRIBUTES.index(attribute)]
+
+    def as_dict(self):
+        return dict(zip(PROFILE_ATTRIBUTES, self.values))
+
+class DeviceProfileRegistry:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def intern(self, values):
+        """Returns the shared profile for values (a tuple in the order of PROFILE_FIELDS), creating it once."""
+        key = tuple(_freeze(value) for value in values)
+        profile = self._profiles.get(key)
+        if profile is None:
+            with self._lock:
+                profile = self._profiles.setdefault(key, DeviceProfile(key))
+        return profile
+
+    def from_config(self, config):
+        """
+        :param config: UE keyword arguments or a ue_config.json UE entry (camelCase keys are accepted).
+        :return: The shared profile of the profile fields of config.
+        """
+        config = {camel_to_snake(key): value for key, value in config.items()}
+        return self.intern(tuple(config.get(key) if config.get(key) is not None else PROFILE_DEFAULTS.get(attribute)
+                                 for attribute, key, _, _ in PROFILE_FIELDS))
+
+    def replace(self, profile, **changes):
+        """Returns the shared profile equal to profile with changes (UE attribute names) applied."""
+        values = list(profile.values)
+        for attribute, value in changes.items():
+            values[PROFILE_ATTRIBUTES.index(attribute)] = value
+        return self.intern(tuple(values))
+
+    def __len__(self):
+        return len(self._profiles)
+
+def profile_property(attribute):
+    """UE property reading a profile field; setting it moves the UE to the profile with the new value."""
+    index = PROFILE_ATTRIBUTES.index(attribute)
+    def get(self):
+        return self.profile.values[index]
+    def set(self, value):
+        self.profile = DeviceProfileRegistry.get_instance().replace(self.profile, **{attribute: value})
+    return property(get, set)
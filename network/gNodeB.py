@@ -20,6 +20,8 @@ from influxdb_client.client.write_api import SYNCHRONOUS, WritePrecision
 from database.time_utils import get_current_time_ntp, server_pools
 from multiprocessing import Lock
 from network.sector import Sector
+from database.line_protocol import LineTemplate
+from network.simulation_clock import SimulationClock
 
 current_time = get_current_time_ntp()
 DEFAULT_BLACKLISTED_CELLS = []
@@ -38,6 +40,8 @@ def load_gNodeB_config():
 gNodeBs_config = load_gNodeB_config()
 
 gNodeB_instances = {}
+GNODEB_METRICS_LINE = LineTemplate("gnodeb_metrics", ("gnodeb_id",), (
+    ("gnodeb_load", float), ("handover_success_count", int), ("handover_failure_count", int)))
 
 class gNodeB:
     
@@ -46,6 +50,7 @@ class gNodeB:
         self.instance_id = str(uuid.uuid4())  # Generic unique identifier for the instance of the GNodeB
         gNodeB_instances[gnodeb_id] = self #define global dictionaries
         self.gnb_load = float(0) # this is for wrriting the gNodeb Load
+        self.cell_load_sum = float(0)  # Running sum of the loads of its cells, kept by the NetworkLoadManager
         self.Latitude = latitude  # float: Geographic latitude where the gNodeB is located
         self.Longitude = longitude  # float: Geographic longitude where the gNodeB is located
         self.CoverageRadius = coverageRadius  # int: The radius (in meters) that the gNodeB covers
@@ -88,10 +93,12 @@ class gNodeB:
             gNodeBs_dict[gnodeb.ID] = gnodeb
         return gNodeBs_dict
     ###############################################################################################################
-    # add serialization methods to the gNodeB class to convert gNodeB instances into a format suitable for InfluxDB
-    def serialize_for_influxdb(self):
+    # add serialization methods to the gNodeB class to convert gNodeB instances into a format suitable for InfluxDB.
+    # The static configuration goes to gnodeb_metadata, written at launch and on configuration change, and only the
+    # load and handover counters go to gnodeb_metrics, written every monitoring tick.
+    def serialize_metadata_for_influxdb(self):
         try:
-            point = Point("gnodeb_metrics") \
+            point = Point("gnodeb_metadata") \
                 .tag("gnodeb_id", self.ID) \
                 .tag("entity_type", "gnodeb")\
                 .tag("instance_id", str(self.instance_id)) \
@@ -106,8 +113,6 @@ class gNodeB:
                 .field("sector_count", int(self.SectorCount)) \
                 .field("measurement_bandwidth", float(self.MeasurementBandwidth)) \
                 .field("blacklisted_cells", ','.join(map(str, self.BlacklistedCells)) if self.BlacklistedCells is not None else None) \
-                .field("handover_success_count", int(self.handover_success_count)) \
-                .field("handover_failure_count", int(self.handover_failure_count)) \
                 .field("location", ','.join(map(str, self.Location)) if self.Location is not None else None) \
                 .field("bandwidth", float(self.Bandwidth)) \
                 .field("handover_margin", float(self.HandoverMargin)) \
@@ -119,14 +124,40 @@ class gNodeB:
                 .field("load_balancing_offset", int(self.LoadBalancingOffset)) \
                 .field("cell_ids", ','.join(map(str, self.CellIds)) if self.CellIds is not None else None) \
                 .field("sector_ids", ','.join([str(sector_id) for sector_id in self.SectorIds])) \
+                .time(int(SimulationClock.get_instance().time()), WritePrecision.S)  # Corrected timestamp in seconds
+
+            return point
+        except Exception as e:
+            database_logger.error(f"Error serializing gNodeB metadata for InfluxDB: {e}")
+            raise
+
+    def serialize_for_influxdb(self):
+        try:
+            point = Point("gnodeb_metrics") \
+                .tag("gnodeb_id", self.ID) \
                 .field("gnodeb_load", float(self.gnb_load)) \
-                .time(int(time.time()), WritePrecision.S)  # Corrected timestamp in seconds
+                .field("handover_success_count", int(self.handover_success_count)) \
+                .field("handover_failure_count", int(self.handover_failure_count)) \
+                .time(int(SimulationClock.get_instance().time()), WritePrecision.S)  # Corrected timestamp in seconds
 
             return point
         except Exception as e:
             database_logger.error(f"Error serializing gNodeB data for InfluxDB: {e}")
             # Depending on your error handling policy, you might want to re-raise the exception or return None
             raise
+
+    def to_line_protocol(self, buffer=None):
+        """
+        Precompiled counterpart of serialize_for_influxdb(), producing the same line without building a Point.
+        :param buffer: Optional LineBuffer the line is appended to.
+        :return: The line, or None when it has been appended to buffer.
+        """
+        prefix = GNODEB_METRICS_LINE.cached_prefix(self, (self.ID,))
+        values = (self.gnb_load, self.handover_success_count, self.handover_failure_count)
+        timestamp = int(SimulationClock.get_instance().time())
+        if buffer is None:
+            return GNODEB_METRICS_LINE.format(prefix, values, timestamp)
+        GNODEB_METRICS_LINE.write(buffer, prefix, values, timestamp)
 ######################################################################################################
 ##################################################Cell and sector add Management##########################
     def add_cell_to_gNodeB(self, cell):
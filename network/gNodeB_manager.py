@@ -8,7 +8,9 @@ import os
 from network.gNodeB import gNodeB, load_gNodeB_config
 from database.database_manager import DatabaseManager
 from logs.logger_config import cell_logger, gnodeb_logger
-from network.utils import calculate_distance
+from network.spatial_index import SpatialIndex
+
+NEIGHBOR_ATTRIBUTES = frozenset(('Latitude', 'Longitude', 'CoverageRadius'))  # Attributes the neighbors depend on
 
 class gNodeBManager:
     _instance = None
@@ -31,6 +33,8 @@ class gNodeBManager:
             self.db_manager = DatabaseManager.get_instance()
             self.base_dir = base_dir
             self.gNodeBs_config = load_gNodeB_config()
+            self.spatial_index = SpatialIndex()  # Positions of the gNodeBs for the neighbor queries
+            self._neighbor_cache = {}  # gNodeB ID -> neighbor IDs, cleared when a gNodeB is added, moved or removed
 
         # Check if gNodeBs_config contains gNodeBs data
         if 'gNodeBs' not in self.gNodeBs_config or not self.gNodeBs_config['gNodeBs']:
@@ -48,8 +52,10 @@ class gNodeBManager:
             
             gnodeb = gNodeB(**gNodeB_data)
             self.gNodeBs[gnodeb.ID] = gnodeb
-            point = gnodeb.serialize_for_influxdb()  # Serialize for InfluxDB
-            self.db_manager.insert_data(point)  # Insert the Point object directly
+            # Static configuration once, then the first load sample
+            self.db_manager.insert_data_batch([gnodeb.serialize_metadata_for_influxdb(), gnodeb.serialize_for_influxdb()])
+        self.spatial_index.build((gnodeb.ID, gnodeb.Latitude, gnodeb.Longitude) for gnodeb in self.gNodeBs.values())
+        self._neighbor_cache.clear()
         return self.gNodeBs
     
     def list_all_gNodeBs_detailed(self):
@@ -82,8 +88,9 @@ class gNodeBManager:
         
         gnodeb = gNodeB(**gNodeB_data)
         self.gNodeBs[gnodeb.ID] = gnodeb
-        point = gnodeb.serialize_for_influxdb()
-        self.db_manager.insert_data(point)
+        self.spatial_index.add(gnodeb.ID, gnodeb.Latitude, gnodeb.Longitude)
+        self._neighbor_cache.clear()
+        self.db_manager.insert_data_batch([gnodeb.serialize_metadata_for_influxdb(), gnodeb.serialize_for_influxdb()])
 
     def remove_gNodeB(self, gnodeb_id):
         """
@@ -93,11 +100,39 @@ class gNodeBManager:
         """
         if gnodeb_id in self.gNodeBs:
             del self.gNodeBs[gnodeb_id]
+            self.spatial_index.remove(gnodeb_id)
+            self._neighbor_cache.clear()
             # Assuming there's a method in DBManager to remove data
             self.db_manager.remove_data(gnodeb_id)
         else:
             print(f"gNodeB ID {gnodeb_id} not found.")
 
+    def update_gNodeB(self, gnodeb_id, **updates):
+        """
+        Update attributes of a gNodeB instance. A new position or coverage radius refreshes the spatial index, the
+        cached neighbors and the neighbor relations of the sectors of the gNodeB.
+
+        :param gnodeb_id: ID of the gNodeB to update.
+        :param updates: Attribute names and their new values, e.g. Latitude=48.85, CoverageRadius=1500.
+        :return: The updated gNodeB instance, if found; None otherwise.
+        """
+        gnodeb = self.get_gNodeB(gnodeb_id)
+        if gnodeb is None:
+            print(f"gNodeB ID {gnodeb_id} not found.")
+            return None
+        for key, value in updates.items():
+            setattr(gnodeb, key, value)
+        if NEIGHBOR_ATTRIBUTES & updates.keys():
+            self.spatial_index.add(gnodeb.ID, gnodeb.Latitude, gnodeb.Longitude)
+            self._neighbor_cache.clear()
+            from network.sector_manager import SectorManager
+            sector_manager = SectorManager.get_instance()
+            for sector in sector_manager.gnodeb_sectors_map.get(gnodeb_id, []):
+                if sector.sector_id in sector_manager.neighbor_table:
+                    sector_manager.neighbor_table.add(sector)  # Recomputes its relations and the ones of its neighbors
+        self.db_manager.insert_data(gnodeb.serialize_metadata_for_influxdb())
+        return gnodeb
+
     def get_gNodeB(self, gnodeb_id):
         """
         Retrieve a gNodeB instance by its ID.
@@ -115,16 +150,32 @@ class gNodeBManager:
         :param gnodeb_id: ID of the gNodeB to find neighbors for.
         :return: A list of gNodeB IDs that are neighbors based on coverage overlap.
         """
-        target_gNodeB = self.get_gNodeB(gnodeb_id)
-        if not target_gNodeB:
-            return []  # Target gNodeB not found
+        neighbors = self._neighbor_cache.get(gnodeb_id)
+        if neighbors is None:
+            target_gNodeB = self.get_gNodeB(gnodeb_id)
+            if not target_gNodeB:
+                return []  # Target gNodeB not found
+            if target_gNodeB.ID not in self.spatial_index:  # gNodeBs placed in the dictionary directly
+                self.spatial_index.build((gnb.ID, gnb.Latitude, gnb.Longitude) for gnb in self.gNodeBs.values())
+            # Candidates within the largest possible sum of the coverage radii, then the exact check of the pair
+            max_radius = max(gnb.CoverageRadius for gnb in self.gNodeBs.values())
+            candidates = self.spatial_index.query_radius(target_gNodeB.Latitude, target_gNodeB.Longitude,
+                                                         (target_gNodeB.CoverageRadius + max_radius) / 1000)
+            neighbors = []
+            for gnb_id, distance in candidates:
+                gnb = self.gNodeBs.get(gnb_id)
+                if gnb_id != gnodeb_id and gnb is not None:  # Don't include the target gNodeB itself
+                    # Check if the distance is less than the sum of their coverage radii
+                    if distance <= (target_gNodeB.CoverageRadius + gnb.CoverageRadius) / 1000:  # Convert meters to kilometers
+                        neighbors.append(gnb_id)
+            self._neighbor_cache[gnodeb_id] = neighbors
+        return list(neighbors)
 
-        neighbors = []
-        for gnb_id, gnb in self.gNodeBs.items():
-            if gnb_id != gnodeb_id:  # Don't include the target gNodeB itself
-                distance = calculate_distance(target_gNodeB.Latitude, target_gNodeB.Longitude, gnb.Latitude, gnb.Longitude)
-                # Check if the distance is less than the sum of their coverage radii
-                if distance <= (target_gNodeB.CoverageRadius + gnb.CoverageRadius) / 1000:  # Convert meters to kilometers
-                    neighbors.append(gnb_id)
+    def get_nearest_gNodeBs(self, latitude, longitude, k=1):
+        """
+        Find the gNodeBs nearest to a position.
 
-        return neighbors
\ No newline at end of file
+        :param k: Number of gNodeBs to return.
+        :return: A list of (gNodeB ID, distance in kilometers), nearest first.
+        """
+        return self.spatial_index.nearest(latitude, longitude, k)
@@ -0,0 +1,105 @@
+#####################################################################################################################
+# id_allocator.py is located in network folder. The IDAllocator gives out UE IDs ("ue1", "ue2", ...) from a        #
+# monotonic counter in O(1), instead of scanning every existing ID for the highest number. IDs given by the user are #
+# claimed so the counter never hands them out again. Numbers 1..UE_ID_RESERVED are reserved for IDs given by the    #
+# user, generated IDs start after them. With UE_ID_RECYCLE the IDs of deleted UEs go to a free list and are handed  #
+# out again (lowest first) before the counter moves on. allocate(n) returns a contiguous block for batch creation.  #
+#####################################################################################################################
+import os
+import heapq
+import threading
+
+# Read from environment variables or use default values
+UE_ID_PREFIX = 'ue'
+UE_ID_RESERVED = max(0, int(os.getenv('UE_ID_RESERVED', '0')))  # Numbers reserved for IDs given by the user
+UE_ID_RECYCLE = os.getenv('UE_ID_RECYCLE', 'false').lower() == 'true'  # Hand out the IDs of deleted UEs again
+
+class IDAllocator:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """The allocator of the UE IDs, configured from the environment."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(UE_ID_PREFIX, UE_ID_RESERVED, UE_ID_RECYCLE)
+            return cls._instance
+
+    def __init__(self, prefix=UE_ID_PREFIX, reserved=0, recycle=False):
+        """
+        :param prefix: Prefix of the IDs, followed by the number.
+        :param reserved: Numbers 1..reserved are never generated, they are left for IDs given by the user.
+        :param recycle: Whether released IDs are handed out again.
+        """
+        self.prefix = prefix
+        self.reserved = reserved
+        self.recycle = recycle
+        self._next = reserved + 1  # Next number of the counter
+        self._free = []  # Heap of the released numbers, entries no longer in _free_numbers are skipped
+        self._free_numbers = set()
+        self._lock = threading.Lock()
+
+    def _number(self, entity_id):
+        """Number of an ID in the form prefix + number, None for any other ID."""
+        if isinstance(entity_id, str) and entity_id.startswith(self.prefix) and entity_id[len(self.prefix):].isdigit():
+            return int(entity_id[len(self.prefix):])
+        return None
+
+    def next_id(self):
+        """:return: A new ID, a released one if recycling is enabled."""
+        with self._lock:
+            while self._free:
+                number = heapq.heappop(self._free)
+                if number in self._free_numbers:
+                    self._free_numbers.discard(number)
+                    return f"{self.prefix}{number}"
+            number = self._next
+            self._next += 1
+            return f"{self.prefix}{number}"
+
+    def allocate(self, n):
+        """
+        :param n: Number of IDs.
+        :return: List of n new IDs with contiguous numbers, taken from the counter (never from the free list).
+        """
+        with self._lock:
+            start = self._next
+            self._next += n
+        return [f"{self.prefix}{number}" for number in range(start, start + n)]
+
+    def unallocate(self, entity_ids):
+        """
+        Gives back IDs from allocate() that were never used, whether or not recycling is enabled. IDs at the end of
+        the counter rewind it, the others go to the free list.
+        """
+        numbers = sorted((number for number in map(self._number, entity_ids) if number is not None and number > self.reserved),
+                         reverse=True)
+        with self._lock:
+            for number in numbers:
+                if number == self._next - 1 and number not in self._free_numbers:
+                    self._next = number
+                elif number < self._next and number not in self._free_numbers:
+                    self._free_numbers.add(number)
+                    heapq.heappush(self._free, number)
+
+    def claim(self, entity_id):
+        """Marks an ID given by the user as used, so it is never generated."""
+        number = self._number(entity_id)
+        if number is None or number <= self.reserved:
+            return
+        with self._lock:
+            if number >= self._next:
+                self._next = number + 1  # Numbers skipped over are not generated, as with the former max() + 1
+            else:
+                self._free_numbers.discard(number)
+
+    def release(self, entity_id):
+        """Returns the ID of a deleted entity; it is handed out again only if recycling is enabled."""
+        number = self._number(entity_id)
+        if not self.recycle or number is None or number <= self.reserved:
+            return
+        with self._lock:
+            if number < self._next and number not in self._free_numbers:
+                self._free_numbers.add(number)
+                heapq.heappush(self._free, number)
@@ -12,6 +12,7 @@ from network.sector import Sector  # Import the Sector class
 from logs.logger_config import ue_logger
 from Config_files.config import Config
 from database.database_manager import DatabaseManager
+from database.line_protocol import LineBuffer
 
 def reconcile_network_with_map(network_map, cell_manager):
     # Adjusted to use cell_manager for cell retrieval
@@ -54,9 +55,12 @@ def initialize_network(base_dir, num_ues_to_launch=None):
 
         ues = ue_manager.initialize_ues(num_ues_to_launch, cells, gNodeBs, config.ue_config)
         print("Initialized UEs:")
+        line_buffer = LineBuffer()
         for ue in ues:
             print(f"UE ID: {ue.ID}, Service Type: {ue.ServiceType}, Sector ID: {ue.ConnectedSector}, Cell ID: {ue.ConnectedCellID}, gNodeB ID: {ue.gNodeB_ID}")
-            point = ue.serialize_for_influxdb()
-            db_manager.insert_data(point)
+            ue.metadata_to_line_protocol(line_buffer)
+            ue.to_line_protocol(line_buffer)
+        # Metadata and first metrics of every UE in a single record
+        db_manager.insert_line_protocol(line_buffer)
 
     return gNodeBs, cells, sectors, ues, cell_manager
@@ -0,0 +1,63 @@
+#####################################################################################################################
+# load_snapshot.py is located in network folder. A LoadSnapshot is the load of every sector, cell and gNodeB and of #
+# the network at one monitoring tick. The NetworkLoadManager builds one per tick, bottom-up (sectors, then cells,   #
+# then gNodeBs, then the network), writes each load once and publishes the snapshot; the monitoring loop, the load #
+# balancer and the CLI read the published snapshot instead of computing loads again. Snapshots are never modified  #
+# once built, so readers in other threads always see the loads of one tick.                                         #
+#####################################################################################################################
+import time
+from types import MappingProxyType
+
+class LoadSnapshot:
+    __slots__ = ('tick', 'timestamp', 'sector_loads', 'cell_loads', 'gNodeB_loads', 'network_load')
+
+    def __init__(self, tick, sector_loads, cell_loads, gNodeB_loads, network_load, timestamp=None):
+        """
+        :param tick: Number of the monitoring tick the loads belong to.
+        :param sector_loads: Dictionary of sector ID to load percentage; cell_loads and gNodeB_loads likewise.
+        :param network_load: Average load of the cells, as a percentage.
+        :param timestamp: UNIX time of the tick, defaults to now.
+        """
+        object.__setattr__(self, 'tick', tick)
+        object.__setattr__(self, 'timestamp', time.time() if timestamp is None else timestamp)
+        object.__setattr__(self, 'sector_loads', MappingProxyType(dict(sector_loads)))
+        object.__setattr__(self, 'cell_loads', MappingProxyType(dict(cell_loads)))
+        object.__setattr__(self, 'gNodeB_loads', MappingProxyType(dict(gNodeB_loads)))
+        object.__setattr__(self, 'network_load', float(network_load))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LoadSnapshot is immutable.")
+
+    @classmethod
+    def empty(cls):
+        """Snapshot used before the first tick, every load is 0."""
+        return cls(-1, {}, {}, {}, 0.0)
+
+    def sector_load(self, sector_id, default=0.0):
+        return self.sector_loads.get(sector_id, default)
+
+    def cell_load(self, cell_id, default=0.0):
+        return self.cell_loads.get(cell_id, default)
+
+    def gNodeB_load(self, gNodeB_id, default=0.0):
+        return self.gNodeB_loads.get(gNodeB_id, default)
+
+    def congested(self, threshold):
+        """
+        :return: Dictionary with the IDs of the gNodeBs, cells and sectors whose load is above threshold.
+        """
+        return {
+            'gNodeB': [entity_id for entity_id, load in self.gNodeB_loads.items() if load > threshold],
+            'cell': [entity_id for entity_id, load in self.cell_loads.items() if load > threshold],
+            'sector': [entity_id for entity_id, load in self.sector_loads.items() if load > threshold],
+        }
+
+    def to_dict(self):
+        return {
+            'tick': self.tick,
+            'timestamp': self.timestamp,
+            'network_load': self.network_load,
+            'gnodeb_loads': dict(self.gNodeB_loads),
+            'cell_loads': dict(self.cell_loads),
+            'sector_loads': dict(self.sector_loads),
+        }
@@ -109,7 +109,7 @@ class LoadBalancer:
 ###########################################################################################################################################
     def is_sector_overloaded(self, sector_id):
         # Existing logic to determine if a sector is overloaded
-        sector_load = self.network_load_manager.calculate_sector_load(sector_id)
+        sector_load = self.network_load_manager.get_snapshot().sector_load(sector_id)
         return sector_load > 80  # Assuming 80% as the overload threshold
 
     def get_sorted_ues_by_throughput(self, sector_id):
@@ -169,12 +169,13 @@ class LoadBalancer:
         current_cell = self.network_load_manager.sector_manager.get_cell_by_sector_id(current_sector_id)
         if not current_cell:
             return None
+        snapshot = self.network_load_manager.get_snapshot()  # Loads of the latest tick
         less_loaded_sector = min(
-            (sector for sector in current_cell.sectors if sector.ID != current_sector_id),
-            key=lambda x: x.calculate_sector_load(),
+            (sector for sector in current_cell.sectors if sector.sector_id != current_sector_id),
+            key=lambda x: snapshot.sector_load(x.sector_id),
             default=None
         )
-        if less_loaded_sector and less_loaded_sector.calculate_sector_load() < 80:  # Assuming 80% as the threshold
+        if less_loaded_sector and snapshot.sector_load(less_loaded_sector.sector_id) < 80:  # Assuming 80% as the threshold
             return less_loaded_sector
         return None
 #####################################################################################################################
@@ -183,9 +184,10 @@ class LoadBalancer:
         Find a less loaded sector in a different cell.
         """
         all_cells = self.network_load_manager.get_all_cells()
+        snapshot = self.network_load_manager.get_snapshot()  # Loads of the latest tick
         for cell in all_cells:
             for sector in cell.sectors:
-                if sector.calculate_sector_load() < 80:  # Assuming 80% as the threshold
+                if snapshot.sector_load(sector.sector_id) < 80:  # Assuming 80% as the threshold
                     return sector
         return None
 ###########################################################################################################################################
@@ -203,7 +205,7 @@ class LoadBalancer:
             return False
 
         # Check the load of the target cell instead of gNodeB load
-        cell_load = target_cell.calculate_cell_load()
+        cell_load = LoadBalancer.get_instance().network_load_manager.get_snapshot().cell_load(target_cell.ID)
         if cell_load > 90:  # Adjusted to check cell load instead of gNodeB load
             return False
 
@@ -225,11 +227,16 @@ class LoadBalancer:
         # Check handover feasibility
         if check_handover_feasibility(target_cell, ue):
             handover_successful = ue.perform_handover(original_cell, target_cell, gnodeb.network_state)
+            if handover_successful:
+                # Move the UE to the least loaded sector of the target cell with room left; the UERegistry hands it
+                # over, and the sectors update the UE lists of the original and target cells
+                target_sector = min((sector for sector in target_cell.sectors if sector.remaining_capacity > 0),
+                                    key=lambda sector: sector.current_load, default=None)
+                if target_sector is not None:
+                    target_sector.add_ue(ue)
+                handover_successful = target_sector is not None and ue.ID in target_sector.connected_ues
             if handover_successful:
                 # Process after successful handover
-                if original_cell:
-                    original_cell.ConnectedUEs.remove(ue.ID)
-                target_cell.ConnectedUEs.append(ue.ID)
                 gnodeb.update_cell(target_cell)  # Assuming gNodeB has a method to update cell info
 
                 # Logging the successful handover
@@ -9,6 +9,7 @@ from database.database_manager import DatabaseManager
 from network.NetworkLoadManager import NetworkLoadManager
 from network.ue_manager import UEManager
 from network.ue import UE
+from network.simulation_clock import SimulationClock
 from datetime import datetime
 from influxdb_client import Point
 
@@ -102,7 +103,7 @@ class MetricsManager:
             for tag_key, tag_value in tags.items():
                 point.tag(tag_key, tag_value)
         point.field(kpi_name, kpi_value)
-        point.time(datetime.utcnow())
+        point.time(SimulationClock.get_instance().utcnow())
         return point
     
     def update_metrics(self):
@@ -0,0 +1,190 @@
+#####################################################################################################################
+# neighbor_table.py is located in network folder. SectorNeighborTable is the neighbor relation table of the        #
+# sectors, built once from the topology instead of scanning every sector on each neighbor lookup. Relations are     #
+# typed with bit flags: SAME_CELL, SAME_GNODEB and ADJACENT (geometric adjacency from azimuth and beamwidth: beams   #
+# of one site that overlap, or sectors of neighboring gNodeBs whose beams face each other's site). The table is     #
+# stored in CSR form (indptr, indices, relations arrays) so the neighbors of a sector are one slice, O(degree).     #
+# Adding or removing a sector only recomputes the rows it touches; they are kept aside from the CSR arrays until    #
+# there are enough of them to compact the table again.                                                              #
+#####################################################################################################################
+import threading
+from math import radians, degrees, sin, cos, atan2
+import numpy as np
+
+# Neighbor classes, a relation is a combination of these flags
+SAME_CELL = 1
+SAME_GNODEB = 2
+ADJACENT = 4
+ANY_RELATION = SAME_CELL | SAME_GNODEB | ADJACENT
+RELATION_NAMES = {SAME_CELL: 'same_cell', SAME_GNODEB: 'same_gnodeb', ADJACENT: 'adjacent'}
+COMPACT_MIN_ROWS = 64  # Rows changed since the last compaction before the CSR arrays are rebuilt (or 1/8 of the table)
+
+def relation_names(relation):
+    """:return: Names of the neighbor classes of a relation, e.g. ('same_gnodeb', 'adjacent')."""
+    return tuple(name for flag, name in RELATION_NAMES.items() if relation & flag)
+
+def angle_between(first, second):
+    """Smallest difference in degrees between two directions."""
+    difference = abs(first - second) % 360
+    return min(difference, 360 - difference)
+
+def bearing(latitude1, longitude1, latitude2, longitude2):
+    """Initial bearing in degrees (0 = north, clockwise) from the first position to the second."""
+    latitude1, latitude2, delta = radians(latitude1), radians(latitude2), radians(longitude2 - longitude1)
+    x = sin(delta) * cos(latitude2)
+    y = cos(latitude1) * sin(latitude2) - sin(latitude1) * cos(latitude2) * cos(delta)
+    return degrees(atan2(x, y)) % 360
+
+class SectorNeighborTable:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.build(())
+
+    def build(self, sectors, gNodeB_manager=None):
+        """
+        Rebuilds the table from scratch.
+        :param sectors: Iterable of Sector instances; the gNodeB of a sector is the one of its cell.
+        :param gNodeB_manager: gNodeBManager giving the positions and neighbors of the gNodeBs, needed for the
+                               adjacency of sectors of different gNodeBs; without it only sectors of one gNodeB are related.
+        """
+        with self._lock:
+            self.gNodeB_manager = gNodeB_manager
+            self.sector_ids = []  # Position -> sector ID, None once removed
+            self._position = {}  # Sector ID -> position
+            self._info = []  # Position -> (cell ID, gNodeB ID, azimuth, beamwidth)
+            self._by_gNodeB = {}  # gNodeB ID -> positions of its sectors
+            for sector in sectors:
+                self._register(sector)
+            rows = [self._compute_row(position) for position in range(len(self.sector_ids))]
+            self._set_csr(rows)
+
+    def _register(self, sector):
+        position = len(self.sector_ids)
+        cell = sector.cell
+        gNodeB_id = getattr(cell, 'gNodeB_ID', None)
+        self.sector_ids.append(sector.sector_id)
+        self._position[sector.sector_id] = position
+        self._info.append((sector.cell_id, gNodeB_id, sector.azimuth_angle, sector.beamwidth))
+        self._by_gNodeB.setdefault(gNodeB_id, set()).add(position)
+        return position
+
+    def _set_csr(self, rows):
+        """Replaces the CSR arrays by rows, a list of (indices, relations) per position."""
+        self.indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+        self.indices = np.concatenate([indices for indices, _ in rows]) if rows else np.empty(0, dtype=np.int32)
+        self.relations = np.concatenate([relations for _, relations in rows]) if rows else np.empty(0, dtype=np.int8)
+        self._changed_rows = {}  # Position -> (indices, relations) of the rows changed since the CSR arrays were built
+
+    def _relation(self, first, second):
+        cell_first, gNodeB_first, azimuth_first, beamwidth_first = self._info[first]
+        cell_second, gNodeB_second, azimuth_second, beamwidth_second = self._info[second]
+        relation = 0
+        if gNodeB_first == gNodeB_second:
+            relation |= SAME_GNODEB
+            if cell_first == cell_second:
+                relation |= SAME_CELL
+            if angle_between(azimuth_first, azimuth_second) <= (beamwidth_first + beamwidth_second) / 2:
+                relation |= ADJACENT  # The beams overlap
+        else:
+            site_first, site_second = self._site(gNodeB_first), self._site(gNodeB_second)
+            if site_first is not None and site_second is not None:
+                # Each sector points toward the site of the other one
+                if angle_between(bearing(*site_first, *site_second), azimuth_first) <= beamwidth_first / 2 and \
+                        angle_between(bearing(*site_second, *site_first), azimuth_second) <= beamwidth_second / 2:
+                    relation |= ADJACENT
+        return relation
+
+    def _site(self, gNodeB_id):
+        gNodeB = self.gNodeB_manager.get_gNodeB(gNodeB_id) if self.gNodeB_manager is not None else None
+        return (gNodeB.Latitude, gNodeB.Longitude) if gNodeB is not None else None
+
+    def _candidates(self, position):
+        """Positions that can be related to position: sectors of the same gNodeB and of the neighboring gNodeBs."""
+        gNodeB_id = self._info[position][1]
+        candidates = set(self._by_gNodeB.get(gNodeB_id, ()))
+        if self.gNodeB_manager is not None and gNodeB_id is not None:
+            for neighbor_id in self.gNodeB_manager.get_neighbor_gNodeBs(gNodeB_id):
+                candidates.update(self._by_gNodeB.get(neighbor_id, ()))
+        candidates.discard(position)
+        return sorted(candidates)
+
+    def _compute_row(self, position):
+        row = [(candidate, self._relation(position, candidate)) for candidate in self._candidates(position)]
+        row = [(candidate, relation) for candidate, relation in row if relation]
+        return (np.array([candidate for candidate, _ in row], dtype=np.int32),
+                np.array([relation for _, relation in row], dtype=np.int8))
+
+    def _row(self, position):
+        changed = self._changed_rows.get(position)
+        if changed is not None:
+            return changed
+        if position >= len(self.indptr) - 1:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8)
+        start, end = self.indptr[position], self.indptr[position + 1]
+        return self.indices[start:end], self.relations[start:end]
+
+    def add(self, sector):
+        """Adds sector, or recomputes its relations if it is already in the table; only its row and the rows of its neighbors change."""
+        with self._lock:
+            if sector.sector_id in self._position:
+                self._remove(sector.sector_id)
+            position = self._register(sector)
+            row = self._compute_row(position)
+            self._changed_rows[position] = row
+            for neighbor in row[0].tolist():
+                self._changed_rows[neighbor] = self._compute_row(neighbor)
+            self._compact_if_needed()
+
+    def remove(self, sector_id):
+        """Removes a sector; only the rows of its neighbors change."""
+        with self._lock:
+            if sector_id in self._position:
+                self._remove(sector_id)
+                self._compact_if_needed()
+
+    def _remove(self, sector_id):
+        position = self._position.pop(sector_id)
+        neighbors = self._row(position)[0].tolist()
+        self._by_gNodeB[self._info[position][1]].discard(position)
+        self.sector_ids[position] = None
+        self._changed_rows[position] = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int8))
+        for neighbor in neighbors:
+            indices, relations = self._row(neighbor)
+            keep = indices != position
+            self._changed_rows[neighbor] = (indices[keep], relations[keep])
+
+    def _compact_if_needed(self):
+        if len(self._changed_rows) <= max(COMPACT_MIN_ROWS, len(self.sector_ids) // 8):
+            return
+        # Renumber the remaining sectors and rebuild the CSR arrays from the current rows
+        alive = [position for position, sector_id in enumerate(self.sector_ids) if sector_id is not None]
+        renumber = np.full(len(self.sector_ids), -1, dtype=np.int32)
+        renumber[alive] = np.arange(len(alive), dtype=np.int32)
+        rows = [(renumber[indices], relations) for indices, relations in map(self._row, alive)]
+        self.sector_ids = [self.sector_ids[position] for position in alive]
+        self._info = [self._info[position] for position in alive]
+        self._position = {sector_id: position for position, sector_id in enumerate(self.sector_ids)}
+        self._by_gNodeB = {}
+        for position, info in enumerate(self._info):
+            self._by_gNodeB.setdefault(info[1], set()).add(position)
+        self._set_csr(rows)
+
+    def neighbors(self, sector_id, relation=ANY_RELATION):
+        """
+        :param relation: Neighbor classes to return, a combination of SAME_CELL, SAME_GNODEB and ADJACENT.
+        :return: Dictionary of neighbor sector ID -> relation flags, empty if the sector is not in the table.
+        """
+        with self._lock:
+            position = self._position.get(sector_id)
+            if position is None:
+                return {}
+            indices, relations = self._row(position)
+            return {self.sector_ids[index]: flags for index, flags in zip(indices.tolist(), relations.tolist())
+                    if flags & relation}
+
+    def __contains__(self, sector_id):
+        return sector_id in self._position
+
+    def __len__(self):
+        return len(self._position)
@@ -18,12 +18,19 @@ import threading
 from logs.logger_config import sector_logger,database_logger
 from database.database_manager import DatabaseManager
 from network.ue import UE
+from network.ue_registry import UERegistry
+from database.line_protocol import LineTemplate
+from network.simulation_clock import SimulationClock
 sector_lock = threading.Lock()
 from datetime import datetime
 
 # Assume a global list or set for UE IDs is defined at the top level of your module
 global_ue_ids = set()
 sector_instances = {}
+# Share of the sector max throughput a single UE can count for in the sector load
+MAX_UE_THROUGHPUT_SHARE = 0.1
+SECTOR_METRICS_LINE = LineTemplate("sector_metrics", ("sector_id", "cell_id", "gnodeb_id"), (
+    ("sector_load", float), ("current_load", int), ("remaining_capacity", int)))
 
 class Sector:
     def __init__(self, sector_id, cell_id, cell, capacity, azimuth_angle, beamwidth, frequency, duplex_mode, tx_power, bandwidth, mimo_layers, beamforming, ho_margin, load_balancing, max_throughput, channel_model=None, connected_ues=None, current_load=0, ssb_periodicity=None, ssb_offset=0, is_active=True, sector_count=0):
@@ -54,8 +61,11 @@ class Sector:
         self.is_active = is_active
         self.sector_load_attribute = float(0) # Update the sector's load attribute
 
-        # List of UEs and current load, no change needed
-        self.connected_ues = connected_ues if connected_ues is not None else []
+        # Ordered set of the attached UE IDs, kept by the UERegistry with the UE -> sector reverse index
+        registry = UERegistry.get_instance()
+        self.connected_ues = registry.sector_ues(sector_id)
+        for ue_id in connected_ues or ():
+            registry.attach(ue_id, sector_id, cell_id, getattr(cell, 'gNodeB_ID', None))
         self.current_load = int(current_load)  # Integer, as load is a count which is shoe that how many use hosted in this sector.
 
     @classmethod
@@ -75,11 +85,11 @@ class Sector:
 
         return cls(**data)
     
-    def serialize_for_influxdb(self):
+    def serialize_metadata_for_influxdb(self):
+        """Static configuration of the sector, written at initialization and when the configuration changes."""
         try:
-            unix_timestamp_seconds = int(datetime.utcnow().timestamp())
-            ssb_periodicity_value = self.ssb_periodicity if self.ssb_periodicity is not None else 0
-            point = Point("sector_metrics") \
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
+            point = Point("sector_metadata") \
                 .tag("sector_id", str(self.sector_id)) \
                 .tag("cell_id", str(self.cell_id)) \
                 .tag("gnodeb_id", str(self.cell.gNodeB_ID)) \
@@ -99,7 +109,24 @@ class Sector:
                 .field("sector_is_active", bool(self.is_active)) \
                 .field("sector_count", int(self.sector_count)) \
                 .field("is_active", bool(self.is_active)) \
+                .time(unix_timestamp_seconds, WritePrecision.S)
+
+            return point
+        except Exception as e:
+            database_logger.error(f"Error serializing sector metadata for InfluxDB: {e}")
+            raise
+
+    def serialize_for_influxdb(self):
+        """Load and UE counters of the sector, written on every UE attach or detach."""
+        try:
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
+            point = Point("sector_metrics") \
+                .tag("sector_id", str(self.sector_id)) \
+                .tag("cell_id", str(self.cell_id)) \
+                .tag("gnodeb_id", str(self.cell.gNodeB_ID)) \
                 .field("sector_load", float(self.sector_load_attribute)) \
+                .field("current_load", int(self.current_load)) \
+                .field("remaining_capacity", int(self.remaining_capacity)) \
                 .time(unix_timestamp_seconds, WritePrecision.S)
 
             return point
@@ -108,6 +135,19 @@ class Sector:
             # Depending on your error handling policy, you might want to re-raise the exception or return None
             raise
 
+    def to_line_protocol(self, buffer=None):
+        """
+        Precompiled counterpart of serialize_for_influxdb(), producing the same line without building a Point.
+        :param buffer: Optional LineBuffer the line is appended to.
+        :return: The line, or None when it has been appended to buffer.
+        """
+        prefix = SECTOR_METRICS_LINE.cached_prefix(self, (str(self.sector_id), str(self.cell_id), str(self.cell.gNodeB_ID)))
+        values = (self.sector_load_attribute, self.current_load, self.remaining_capacity)
+        timestamp = int(SimulationClock.get_instance().time())
+        if buffer is None:
+            return SECTOR_METRICS_LINE.format(prefix, values, timestamp)
+        SECTOR_METRICS_LINE.write(buffer, prefix, values, timestamp)
+
     def add_ue(self, ue):
         with sector_lock:  # Assuming sector_lock is correctly defined and accessible
             # Check if the sector is at its maximum capacity
@@ -120,10 +160,13 @@ class Sector:
                 sector_logger.warning(f"UE with ID {ue.ID} is already connected to the sector {self.sector_id}.")
                 return  # Similarly, return here to avoid re-adding an existing UE
 
-            # If the checks pass, proceed to add the UE
-            self.connected_ues.append(ue.ID)  # Store only the ID, not the UE object
+            # If the checks pass, proceed to add the UE; a UE attached to another sector is handed over
+            previous = UERegistry.get_instance().attach(ue.ID, self.sector_id, self.cell_id, self.cell.gNodeB_ID)
+            previous_sector = all_sectors.get(previous.sector_id) if previous is not None else None
+            if previous_sector is not None:
+                previous_sector._release_ue(ue.ID)
             self.current_load += 1  # Increment the current load
-            self.cell.update_ue_lists()  # Assuming this method correctly updates relevant UE lists in the cell
+            self.cell.ue_attached(ue.ID)  # Delta update of the UE list of the cell
             global_ue_ids.add(ue.ID)  # Add the UE ID to the global list (ensure this is defined and accessible)
             self.remaining_capacity = self.capacity - len(self.connected_ues)  # Update remaining capacity
             # Set the connected_sector attribute for the UE
@@ -131,6 +174,8 @@ class Sector:
             ue.ConnectedCellID = self.cell_id  # Ensure self.cell_id is correctly defined and accessible
             ue.gNodeB_ID = self.cell.gNodeB_ID  # Ensure self.cell and its gNodeB_ID are correctly defined and accessible
             self.ues[ue.ID] = ue  # Add the UE object to the sector's UE dictionary
+            # Count the UE in the running load sums of the sector
+            ue._store.attach(ue._slot, self.sector_id, self.max_throughput * MAX_UE_THROUGHPUT_SHARE)
             # Note: The global_ue_ids.add(ue.ID) call is duplicated in original code. It should only be necessary once.
 
             # Serialize the sector for InfluxDB and insert the data
@@ -142,12 +187,9 @@ class Sector:
     def remove_ue(self, ue_id):
         with sector_lock:
             if ue_id in self.connected_ues:
-                self.connected_ues.remove(ue_id)  # Correctly remove the ID string
-                self.current_load -= 1  # Decrement the current load
-                self.cell.update_ue_lists()
+                UERegistry.get_instance().detach(ue_id)
+                self._release_ue(ue_id)
                 global_ue_ids.discard(ue_id)  # Correctly discard the ID string
-                self.remaining_capacity = self.capacity - len(self.connected_ues)  # Update remaining_capacity
-                del self.ues[ue_id]  # Correctly delete the UE from the dictionary
                 point = self.serialize_for_influxdb()
                 DatabaseManager().insert_data(point)
                 sector_logger.info(f"UE with ID {ue_id} has been removed from the sector. Current load (count): {self.current_load}")
@@ -158,6 +200,15 @@ class Sector:
             else:
                 sector_logger.warning(f"UE with ID {ue_id} is not connected to the sector.")
                 
+    def _release_ue(self, ue_id):
+        """Updates the counters of the sector and the UEs of its cell for a UE that left it (removed or handed over)."""
+        self.current_load -= 1  # Decrement the current load
+        self.remaining_capacity = self.capacity - len(self.connected_ues)  # Update remaining_capacity
+        ue = self.ues.pop(ue_id, None)  # Correctly delete the UE from the dictionary
+        if ue is not None:
+            ue._store.detach(ue._slot)
+        self.cell.ue_detached(ue_id)  # Delta update of the UE list of the cell
+
     @classmethod
     def get_sector_by_id(cls, sector_id):
         db_manager = DatabaseManager.get_instance()
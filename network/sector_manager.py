@@ -7,7 +7,10 @@
 # handling of User Equipment (UE) associations. This approach can streamline interactions with the database and ensure#
 # consistent state management across the application.                                                                 #
 #######################################################################################################################
-from network.sector import Sector, all_sectors
+from network.sector import Sector, all_sectors, global_ue_ids, MAX_UE_THROUGHPUT_SHARE
+from network.ue_store import UEStore
+from network.ue_registry import UERegistry
+from network.neighbor_table import SectorNeighborTable, ANY_RELATION
 from database.database_manager import DatabaseManager
 from influxdb_client import Point, WritePrecision
 from logs.logger_config import cell_logger, gnodeb_logger, ue_logger, sector_logger
@@ -21,6 +24,7 @@ class SectorManager:
         self.db_manager = DatabaseManager.get_instance() # Instance of DatabaseManager for DB operations
         self.lock = threading.Lock()  # Lock for thread-safe operations on sectors
         self.gnodeb_sectors_map = {}  # New attribute to track gNodeB to sectors association
+        self.neighbor_table = SectorNeighborTable()  # Neighbor relations of the sectors, see get_neighbor_sectors()
     
     @classmethod
     def get_instance(cls, db_manager=None):
@@ -88,12 +92,18 @@ class SectorManager:
 
                     self.sectors[new_sector.sector_id] = new_sector
                     initialized_sectors[new_sector.sector_id] = new_sector
-                    point = new_sector.serialize_for_influxdb()
-                    self.db_manager.insert_data(point)
+                    self.db_manager.insert_data_batch([new_sector.serialize_metadata_for_influxdb(), new_sector.serialize_for_influxdb()])
                     print(f"Sector {new_sector.sector_id} initialized and associated with gNodeB {gnodeb_id} and Cell {cell_id}.")
                 else:
                     print(f"Sector {sector_id} already exists in the manager.")
 
+        # Neighbor relations: built once for the whole topology, then kept up to date sector by sector
+        with self.lock:
+            if len(self.neighbor_table) == 0:
+                self.neighbor_table.build(self.sectors.values(), gnodeb_manager)
+            else:
+                for sector in initialized_sectors.values():
+                    self.neighbor_table.add(sector)
         print("Sectors initialization completed.")
         return list(initialized_sectors.values()) #Return a list of Sector instances
 
@@ -103,16 +113,13 @@ class SectorManager:
         with self.lock:  # Assuming self.lock is accessible and used across both SectorManager and UEManager for shared resources
             sector = self.sectors.get(sector_id)
             if sector and ue_id in sector.connected_ues:
-                print(f"Before removal, sector {sector_id} connected UEs: {sector.connected_ues}")
-                sector.connected_ues.remove(ue_id)  # Correctly remove the ID string
-                sector.current_load -= 1  # Decrement the current load
+                print(f"Before removal, sector {sector_id} connected UEs: {len(sector.connected_ues)}")
+                UERegistry.get_instance().detach(ue_id)  # Also drops it from sector.connected_ues
+                sector._release_ue(ue_id)  # Load counters, UE dictionary and load sums of the sector
                 global_ue_ids.discard(ue_id)  # Correctly discard the ID string
-                sector.remaining_capacity = sector.capacity - len(sector.connected_ues)  # Update remaining_capacity
-                if ue_id in sector.ues:  # Check if the UE is in the sector's UE dictionary before attempting to delete
-                    del sector.ues[ue_id]  # Correctly delete the UE from the dictionary
                 point = sector.serialize_for_influxdb()
                 self.db_manager.insert_data(point)  # Use SectorManager's db_manager to insert data
-                print(f"After removal, sector {sector_id} connected UEs: {sector.connected_ues}")
+                print(f"After removal, sector {sector_id} connected UEs: {len(sector.connected_ues)}")
                 sector_logger.info(f"UE with ID {ue_id} has been removed from the sector {sector_id}. Current load: {sector.current_load}")
                 return True  # Return True to indicate successful removal
             else:
@@ -134,8 +141,10 @@ class SectorManager:
                         sector_logger.info(f"Sector {sector_id} property {key} updated to {value}.")
                     else:
                         sector_logger.warning(f"Sector {sector_id} has no property {key}.")
-                # Serialize and update the sector in the database
-                point = sector.serialize_for_influxdb()
+                # Capacity or max throughput may have changed, recount the sector in the load sums
+                UEStore.get_instance().set_throughput_cap(sector_id, sector.max_throughput * MAX_UE_THROUGHPUT_SHARE)
+                # The configuration changed, write the sector metadata again
+                point = sector.serialize_metadata_for_influxdb()
                 self.db_manager.insert_data(point)
             else:
                 sector_logger.warning(f"Sector {sector_id} not found.")
@@ -154,25 +163,43 @@ class SectorManager:
             sector_logger.warning(f"Sector state not found for {sector_id}.")
         return sector_state
     
-    def get_neighbor_sectors(self, sector_id):
+    def get_neighbor_sectors(self, sector_id, relation=ANY_RELATION):
         """
-        Finds neighboring sectors for a given sector ID.
+        Finds neighboring sectors for a given sector ID from the neighbor relation table.
     
         :param sector_id: The ID of the sector for which to find neighbors.
-        :return: A list of Sector instances that are considered neighbors.
+        :param relation: Neighbor classes to include (SAME_CELL, SAME_GNODEB and/or ADJACENT from network.neighbor_table).
+        :return: A dictionary of neighbor sector ID -> relation flags.
         """
-        current_sector = self.sectors.get(sector_id)
-        if not current_sector:
+        if sector_id not in self.neighbor_table:
             sector_logger.warning(f"Sector {sector_id} not found.")
-            return []
+            return {}
+        return self.neighbor_table.neighbors(sector_id, relation)
 
-        neighbors = []
-        # Example criteria: Sectors are neighbors if they belong to the same gNodeB.
-        for sector in self.sectors.values():
-            if sector.gNodeB_ID == current_sector.gNodeB_ID and sector.sector_id != sector_id:
-                neighbors.append(sector)
-    
-        return neighbors
+    def remove_sector(self, sector_id):
+        """
+        Removes a sector from the manager, its cell and the neighbor relation table.
+
+        :param sector_id: ID of the sector to remove.
+        :return: True if the sector was removed, False if it was not found.
+        """
+        with self.lock:
+            sector = self.sectors.pop(sector_id, None)
+            if sector is None:
+                sector_logger.warning(f"Sector {sector_id} not found.")
+                return False
+            for ue in sector.ues.values():
+                ue._store.detach(ue._slot)  # Its UEs no longer count in any sector load
+            for ue_id in list(sector.connected_ues):
+                UERegistry.get_instance().detach(ue_id)
+            if sector.cell is not None:
+                sector.cell.sectors = [s for s in sector.cell.sectors if s.sector_id != sector_id]
+            for sectors in self.gnodeb_sectors_map.values():
+                if sector in sectors:
+                    sectors.remove(sector)
+            self.neighbor_table.remove(sector_id)
+            sector_logger.info(f"Sector {sector_id} removed.")
+            return True
     
     def is_sector_overloaded(self, sector_id):
         sector = self.sector_manager.get_sector(sector_id)
@@ -188,15 +215,8 @@ class SectorManager:
         return sorted_ues
     
     def find_sector_by_ue_id(self, ue_id):
-        # Assuming UE IDs are expected to be strings in connected_ues
-        # Convert ue_id to string if it's not already
-        ue_id_str = str(ue_id)
-
-        for sector_id, sector in self.sectors.items():
-            # Ensure connected_ues contains strings for comparison
-            if ue_id_str in map(str, sector.connected_ues):
-                return sector_id
-        return None
+        # Reverse index of the UERegistry, kept in sync on attach, detach and handover
+        return UERegistry.get_instance().sector_of(str(ue_id))
     
     def get_sector_by_id(self, sector_id):
     # Assuming self.sectors is a dictionary mapping sector IDs to Sector objects
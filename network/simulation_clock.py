@@ -0,0 +1,104 @@
+#####################################################################################################################
+# simulation_clock.py is located in network folder. The SimulationClock class is the time source of the simulation. #
+# In "virtual" mode the simulation owns its own time: the traffic loop advances it one tick at a time, other loops  #
+# (like NetworkLoadManager.monitoring) wait on it, and per-UE delay and jitter are recorded as simulated latencies   #
+# instead of stalling a thread with time.sleep. A tick therefore only costs CPU time and, with a speed factor above  #
+# 1 (or 0 for "as fast as possible"), the same run can execute faster than real time. In "realtime" mode the clock   #
+# simply follows the wall clock, which is the original behaviour of the simulator.                                  #
+#####################################################################################################################
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+
+# Read from environment variables or use default values
+SIMULATION_CLOCK_MODE = os.getenv('SIMULATION_CLOCK_MODE', 'virtual')  # 'virtual' or 'realtime'
+SIMULATION_SPEED = float(os.getenv('SIMULATION_SPEED', '1.0'))  # Virtual seconds per wall second, 0 means no pacing
+
+class SimulationClock:
+    _instance = None
+    _lock = threading.Lock()  # Ensure thread-safe singleton access
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, mode=SIMULATION_CLOCK_MODE, speed=SIMULATION_SPEED, start=None):
+        """
+        :param mode: 'virtual' for simulated time or 'realtime' to follow the wall clock.
+        :param speed: Pacing of virtual time in virtual seconds per wall second; 0 runs as fast as possible.
+        :param start: Optional UNIX timestamp the virtual clock starts at (defaults to the current wall time).
+        """
+        if mode not in ('virtual', 'realtime'):
+            raise ValueError(f"Unknown simulation clock mode: {mode}")
+        if speed < 0:
+            raise ValueError("Simulation speed cannot be negative.")
+        self.mode = mode
+        self.speed = speed
+        self._now = float(start) if start is not None else time.time()
+        self._condition = threading.Condition()
+        self.total_simulated_latency = 0.0  # Sum of all latencies recorded with after(), in milliseconds
+
+    def is_virtual(self):
+        return self.mode == 'virtual'
+
+    def time(self):
+        """Current simulation time as a UNIX timestamp in seconds."""
+        if not self.is_virtual():
+            return time.time()
+        with self._condition:
+            return self._now
+
+    def now(self):
+        """Current simulation time as a local datetime, the counterpart of datetime.now()."""
+        return datetime.fromtimestamp(self.time())
+
+    def utcnow(self):
+        """Current simulation time as a naive UTC datetime, the counterpart of datetime.utcnow()."""
+        return datetime.utcfromtimestamp(self.time())
+
+    def after(self, start_time, milliseconds):
+        """
+        Record a simulated latency and return the moment it ends.
+        Used for per-UE delay and jitter: the latency is accounted for in simulated time and no thread is stalled.
+
+        :param start_time: datetime the latency starts at.
+        :param milliseconds: Length of the latency in milliseconds.
+        :return: start_time shifted by the latency.
+        """
+        with self._condition:
+            self.total_simulated_latency += milliseconds
+        return start_time + timedelta(milliseconds=milliseconds)
+
+    def advance(self, seconds):
+        """
+        Move the simulation forward by one step. Called by the loop that drives the simulation (the traffic loop).
+        In virtual mode the wall clock wait is seconds / speed (none when speed is 0) and all waiters are woken up.
+        """
+        if not self.is_virtual():
+            time.sleep(seconds)
+            return
+        if self.speed > 0:
+            time.sleep(seconds / self.speed)
+        with self._condition:
+            self._now += seconds
+            self._condition.notify_all()
+
+    def sleep(self, seconds, timeout=None):
+        """
+        Wait until the simulation has moved forward by seconds. Used by loops that follow the simulation
+        (like monitoring) so they run once per simulated interval regardless of the speed factor.
+
+        :param timeout: Optional limit of the wait in wall seconds, so a follower is not stuck forever when the loop
+                        driving the simulation stops advancing it.
+        :return: True if the simulation moved forward by seconds, False if the wait timed out.
+        """
+        if not self.is_virtual():
+            time.sleep(seconds)
+            return True
+        with self._condition:
+            target = self._now + seconds
+            return self._condition.wait_for(lambda: self._now >= target, timeout)
@@ -0,0 +1,150 @@
+#####################################################################################################################
+# spatial_index.py is located in network folder. SpatialIndex is a KD-tree over the positions of network entities  #
+# (gNodeBs) for radius and k-nearest queries in O(log n) instead of a haversine call per entity. Latitude/longitude #
+# are stored as 3D unit vectors: the straight-line (chord) distance between two of them grows with the great-circle #
+# distance, so the tree can use plain euclidean bounding boxes and the result is still exact on the sphere, and     #
+# there is no special case at the antimeridian or the poles. Distances are returned in kilometers, as               #
+# network.utils.calculate_distance() does. Adding or removing a point rebuilds the tree on the next query.          #
+#####################################################################################################################
+import heapq
+import threading
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0  # Same radius as network.utils.calculate_distance()
+LEAF_SIZE = 16  # Points per leaf, scanned with one vectorized distance computation
+
+def to_unit_vectors(latitudes, longitudes):
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.stack((np.cos(latitudes) * np.cos(longitudes), np.cos(latitudes) * np.sin(longitudes),
+                     np.sin(latitudes)), axis=-1)
+
+def chord_to_km(chord):
+    """Great-circle distance in kilometers of a chord between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+def km_to_chord(distance):
+    """Chord between unit vectors of a great-circle distance in kilometers."""
+    return 2 * np.sin(min(distance / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+class SpatialIndex:
+    def __init__(self, points=(), leaf_size=LEAF_SIZE):
+        """
+        :param points: Iterable of (entity ID, latitude, longitude) tuples.
+        :param leaf_size: Maximum number of points of a leaf of the tree.
+        """
+        self.leaf_size = leaf_size
+        self._locations = {}  # Entity ID -> (latitude, longitude)
+        self._lock = threading.Lock()
+        self.build(points)
+
+    def build(self, points):
+        """Replaces every point of the index with points, (entity ID, latitude, longitude) tuples."""
+        with self._lock:
+            self._locations = {entity_id: (float(latitude), float(longitude)) for entity_id, latitude, longitude in points}
+            self._tree = None
+
+    def add(self, entity_id, latitude, longitude):
+        with self._lock:
+            self._locations[entity_id] = (float(latitude), float(longitude))
+            self._tree = None
+
+    def remove(self, entity_id):
+        with self._lock:
+            if self._locations.pop(entity_id, None) is not None:
+                self._tree = None
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, entity_id):
+        return entity_id in self._locations
+
+    def _get_tree(self):
+        with self._lock:
+            if self._tree is None:
+                self._tree = _KDTree(list(self._locations), list(self._locations.values()), self.leaf_size)
+            return self._tree
+
+    def query_radius(self, latitude, longitude, radius):
+        """
+        :param radius: Great-circle distance in kilometers.
+        :return: List of (entity ID, distance in kilometers) within radius of the position, nearest first.
+        """
+        return self._get_tree().query_radius(to_unit_vectors(latitude, longitude), km_to_chord(radius))
+
+    def nearest(self, latitude, longitude, k=1):
+        """
+        :return: List of the (entity ID, distance in kilometers) of the k entities nearest to the position, nearest first.
+        """
+        return self._get_tree().nearest(to_unit_vectors(latitude, longitude), k)
+
+class _KDTree:
+    def __init__(self, ids, locations, leaf_size):
+        self.ids = ids
+        self.points = to_unit_vectors(*zip(*locations)) if locations else np.empty((0, 3))
+        self.order = np.arange(len(ids))
+        # One entry per node; children are -1 for leaves, which hold order[start:end]
+        self.start, self.end, self.left, self.right, self.lower, self.upper = [], [], [], [], [], []
+        self.leaf_size = leaf_size
+        if ids:
+            self._build(0, len(ids))
+
+    def _build(self, start, end):
+        node = len(self.start)
+        points = self.points[self.order[start:end]]
+        for values, value in ((self.start, start), (self.end, end), (self.left, -1), (self.right, -1),
+                              (self.lower, points.min(axis=0)), (self.upper, points.max(axis=0))):
+            values.append(value)
+        if end - start > self.leaf_size:
+            # Split at the median of the widest dimension
+            dimension = int(np.argmax(self.upper[node] - self.lower[node]))
+            middle = (end - start) // 2
+            self.order[start:end] = self.order[start:end][np.argpartition(points[:, dimension], middle)]
+            self.left[node] = self._build(start, start + middle)
+            self.right[node] = self._build(start + middle, end)
+        return node
+
+    def _box_distance(self, node, point):
+        """Smallest distance between point and the bounding box of node."""
+        gap = np.maximum(np.maximum(self.lower[node] - point, point - self.upper[node]), 0)
+        return float(np.sqrt(gap @ gap))
+
+    def _leaf_distances(self, node, point):
+        indices = self.order[self.start[node]:self.end[node]]
+        return indices, np.linalg.norm(self.points[indices] - point, axis=1)
+
+    def query_radius(self, point, chord):
+        found = []
+        stack = [0] if self.ids else []
+        while stack:
+            node = stack.pop()
+            if self._box_distance(node, point) > chord:
+                continue
+            if self.left[node] < 0:
+                indices, distances = self._leaf_distances(node, point)
+                inside = distances <= chord
+                found.extend(zip(indices[inside].tolist(), distances[inside].tolist()))
+            else:
+                stack.extend((self.left[node], self.right[node]))
+        found.sort(key=lambda item: item[1])
+        return [(self.ids[index], float(chord_to_km(distance))) for index, distance in found]
+
+    def nearest(self, point, k):
+        best = []  # Max-heap of the k nearest points as (-distance, index)
+        queue = [(0.0, 0)] if self.ids and k > 0 else []  # Min-heap of the nodes to visit by box distance
+        while queue:
+            box_distance, node = heapq.heappop(queue)
+            if len(best) == k and box_distance > -best[0][0]:
+                break  # Every remaining node is farther than the k-th nearest point
+            if self.left[node] < 0:
+                indices, distances = self._leaf_distances(node, point)
+                for index, distance in zip(indices.tolist(), distances.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, index))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, index))
+            else:
+                for child in (self.left[node], self.right[node]):
+                    heapq.heappush(queue, (self._box_distance(child, point), child))
+        return [(self.ids[index], float(chord_to_km(-distance))) for distance, index in sorted(best, reverse=True)]
@@ -0,0 +1,108 @@
+#####################################################################################################################
+# tick_kernel.py is located in network folder. The TickKernel class runs the simulation one tick at a time in a     #
+# single pass: first traffic is generated for all UEs at once, then the load of the network is aggregated once      #
+# through the sector -> cell -> network hierarchy, and finally one network measurement is written. This replaces    #
+# calling network_measurement() for every UE, which made a tick O(UEs x sectors) with database writes. The order of #
+# the phases and how often each phase runs (every N ticks) are configurable.                                        #
+#####################################################################################################################
+import os
+import time
+from network.simulation_clock import SimulationClock
+from database.database_manager import DatabaseManager
+from logs.logger_config import network_load_logger
+
+# Read from environment variables or use default values
+SIMULATION_TICK_INTERVAL = float(os.getenv('SIMULATION_TICK_INTERVAL', '1.0'))  # Simulated seconds per tick
+SIMULATION_TICK_ORDER = os.getenv('SIMULATION_TICK_ORDER', 'traffic,load,measurement')  # Comma separated phase order
+SIMULATION_TRAFFIC_EVERY = int(os.getenv('SIMULATION_TRAFFIC_EVERY', '1'))  # Run the traffic phase every N ticks
+SIMULATION_LOAD_EVERY = int(os.getenv('SIMULATION_LOAD_EVERY', '1'))  # Run the load phase every N ticks
+SIMULATION_MEASUREMENT_EVERY = int(os.getenv('SIMULATION_MEASUREMENT_EVERY', '1'))  # Run the measurement phase every N ticks
+SIMULATION_SEVERITY = os.getenv('SIMULATION_SEVERITY', 'zero')  # Severity level used by the traffic phase
+
+TICK_PHASES = ('traffic', 'load', 'measurement')
+
+class TickKernel:
+    def __init__(self, traffic_controller, network_load_manager, ue_manager, clock=None, tick_interval=SIMULATION_TICK_INTERVAL,
+                 phase_order=SIMULATION_TICK_ORDER, phase_rates=None, severity=SIMULATION_SEVERITY, database_manager=None):
+        """
+        :param traffic_controller: TrafficController used for the traffic phase.
+        :param network_load_manager: NetworkLoadManager used for the load and measurement phases.
+        :param ue_manager: UEManager holding the UEs to generate traffic for.
+        :param clock: SimulationClock advanced after every tick (defaults to the shared instance).
+        :param tick_interval: Simulated seconds per tick.
+        :param phase_order: Phases to run and their order, as a list or a comma separated string.
+        :param phase_rates: Dictionary of phase name to N, the phase runs every N ticks (defaults to the environment settings).
+        :param severity: Severity level used by the traffic phase.
+        :param database_manager: DatabaseManager whose writes are coalesced per tick (defaults to the shared instance).
+        """
+        if isinstance(phase_order, str):
+            phase_order = [phase.strip() for phase in phase_order.split(',') if phase.strip()]
+        unknown_phases = [phase for phase in phase_order if phase not in TICK_PHASES]
+        if unknown_phases:
+            raise ValueError(f"Unknown tick phases: {unknown_phases}")
+        if phase_rates is None:
+            phase_rates = {
+                'traffic': SIMULATION_TRAFFIC_EVERY,
+                'load': SIMULATION_LOAD_EVERY,
+                'measurement': SIMULATION_MEASUREMENT_EVERY,
+            }
+        if any(rate < 1 for rate in phase_rates.values()):
+            raise ValueError("Tick phase rates must be at least 1.")
+
+        self.traffic_controller = traffic_controller
+        self.network_load_manager = network_load_manager
+        self.ue_manager = ue_manager
+        self.clock = clock or SimulationClock.get_instance()
+        self.database_manager = database_manager or DatabaseManager.get_instance()
+        self.tick_interval = tick_interval
+        self.phase_order = list(phase_order)
+        self.phase_rates = phase_rates
+        self.severity = severity
+        self.tick_count = 0
+        self.network_load = None  # Network load of the latest load phase, used by the measurement phase
+        self.last_tick_duration = 0.0  # Wall time spent in the latest tick, in seconds
+        self.running = False
+
+    def tick(self):
+        """
+        Run one tick: every phase due on this tick, in the configured order.
+        The points written during the tick are merged per measurement, tag set and timestamp before being queued.
+        """
+        started = time.perf_counter()
+        try:
+            with self.database_manager.tick_scope():
+                for phase in self.phase_order:
+                    if self.tick_count % self.phase_rates.get(phase, 1) == 0:
+                        getattr(self, f"_run_{phase}")()
+        finally:
+            self.tick_count += 1
+            self.last_tick_duration = time.perf_counter() - started
+
+    def run(self):
+        """Run ticks until stop() is called, advancing the simulation clock after every tick."""
+        self.running = True
+        while self.running:
+            try:
+                self.tick()
+            except Exception as e:
+                # A failing tick must not end the simulation, nor leave the loops following the clock waiting
+                network_load_logger.error(f"Tick {self.tick_count - 1} failed: {e}")
+            self.clock.advance(self.tick_interval)
+
+    def stop(self):
+        self.running = False
+
+    def _run_traffic(self):
+        # Copied under the lock of the UEManager, without the UEs being deleted (whose slot was released)
+        with self.ue_manager._lock:
+            ues = [ue for ue in self.ue_manager.ues.values() if not ue.released]
+        if ues:
+            self.traffic_controller.calculate_batch_throughput(ues, self.severity)
+
+    def _run_load(self):
+        # Computes the loads of this tick, writes them once and publishes the snapshot read by monitoring and the API
+        self.network_load = self.network_load_manager.refresh_snapshot().network_load
+        network_load_logger.info(f"Tick {self.tick_count}: network load {self.network_load:.2f}%")
+
+    def _run_measurement(self):
+        self.network_load_manager.network_measurement(self.network_load)
@@ -0,0 +1,94 @@
+#####################################################################################################################
+# topology.py is located in network folder. A CompiledTopology turns the sector -> cell -> gNodeB hierarchy into   #
+# integer parent-index arrays, so aggregating the load of the whole network is a few segmented reductions          #
+# (np.bincount) instead of Python loops over every entity: UEs are reduced to sectors, sectors to cells and cells   #
+# to gNodeBs. The sector load uses the same weights and per-UE throughput cap as NetworkLoadManager. The topology  #
+# is compiled once from the entity objects and reused while it does not change; UE attachments are read from the   #
+# UEStore columns on every compute() since UEs move between sectors.                                                #
+#####################################################################################################################
+import numpy as np
+from network.sector import MAX_UE_THROUGHPUT_SHARE
+
+SECTOR_COUNT_WEIGHT = 0.7  # Weight of the UE count in the sector load
+SECTOR_THROUGHPUT_WEIGHT = 0.3  # Weight of the capped throughput in the sector load
+
+class TopologyLoads:
+    __slots__ = ('sector_loads', 'cell_loads', 'gNodeB_loads', 'network_load')
+
+    def __init__(self, sector_loads, cell_loads, gNodeB_loads, network_load):
+        """Load arrays in the entity order of the CompiledTopology they were computed with."""
+        self.sector_loads = sector_loads
+        self.cell_loads = cell_loads
+        self.gNodeB_loads = gNodeB_loads
+        self.network_load = network_load
+
+class CompiledTopology:
+    def __init__(self, sectors, cells, gNodeBs):
+        """
+        :param sectors: Sequence of Sector instances.
+        :param cells: Sequence of Cell instances; a sector belongs to the cell it references through sector.cell.
+        :param gNodeBs: Sequence of gNodeB instances; a cell belongs to the gNodeB it references through cell.gNodeB.
+        """
+        self.sectors = list(sectors)
+        self.cells = list(cells)
+        self.gNodeBs = list(gNodeBs)
+        cell_index = {id(cell): index for index, cell in enumerate(self.cells)}
+        gNodeB_index = {id(gNodeB): index for index, gNodeB in enumerate(self.gNodeBs)}
+        # Parent-index arrays, -1 when the parent is not part of the topology
+        self.sector_cell = np.fromiter((cell_index.get(id(sector.cell), -1) for sector in self.sectors),
+                                       dtype=np.intp, count=len(self.sectors))
+        self.cell_gNodeB = np.fromiter((gNodeB_index.get(id(getattr(cell, 'gNodeB', None)), -1) for cell in self.cells),
+                                       dtype=np.intp, count=len(self.cells))
+        self.capacity = np.fromiter((sector.capacity for sector in self.sectors), dtype=np.float64, count=len(self.sectors))
+        self.max_throughput = np.fromiter((sector.max_throughput or 0 for sector in self.sectors), dtype=np.float64,
+                                          count=len(self.sectors))
+        self.throughput_cap = self.max_throughput * MAX_UE_THROUGHPUT_SHARE
+        self.sector_ids = [sector.sector_id for sector in self.sectors]
+        self._sector_position = {sector_id: index for index, sector_id in enumerate(self.sector_ids)}
+        self._mapping = np.full(1, -1, dtype=np.intp)
+        self._mapping_store = None
+
+    def _store_to_sector(self, store):
+        """Array mapping the sector indices of store to positions in this topology, -1 for unknown sectors."""
+        # Store sector indices are only ever appended, so the mapping is extended instead of rebuilt
+        known = len(self._mapping) - 1 if self._mapping_store is store else 0
+        if known < len(store.sector_ids):
+            mapping = np.full(len(store.sector_ids) + 1, -1, dtype=np.intp)  # The extra entry maps index -1 (not attached)
+            mapping[:known] = self._mapping[:known]
+            for index in range(known, len(store.sector_ids)):
+                mapping[index] = self._sector_position.get(store.sector_ids[index], -1)
+            self._mapping, self._mapping_store = mapping, store
+        return self._mapping
+
+    def compute(self, store):
+        """
+        Computes every load of the network from the UEs attached in store.
+        :param store: UEStore whose load_sector and throughput columns give the UE to sector attachment.
+        :return: TopologyLoads.
+        """
+        n_sectors, n_cells, n_gNodeBs = len(self.sectors), len(self.cells), len(self.gNodeBs)
+        # UEs -> sectors
+        slots = np.flatnonzero(store.in_use)
+        ue_sector = self._store_to_sector(store)[store.load_sector[slots]]
+        attached = ue_sector >= 0
+        ue_sector = ue_sector[attached]
+        capped = np.minimum(store.throughput[slots[attached]], self.throughput_cap[ue_sector])
+        ue_count = np.bincount(ue_sector, minlength=n_sectors)
+        capped_throughput = np.bincount(ue_sector, weights=capped, minlength=n_sectors)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            count_load = np.where(self.capacity > 0, ue_count / self.capacity * 100, 0.0)
+            throughput_load = np.where(self.max_throughput > 0, capped_throughput / self.max_throughput * 100, 0.0)
+        sector_loads = SECTOR_COUNT_WEIGHT * count_load + SECTOR_THROUGHPUT_WEIGHT * throughput_load
+        sector_loads[self.capacity == 0] = 100  # A sector without capacity is overloaded
+        # Sectors -> cells -> gNodeBs, each the average of its children; 0 without children
+        cell_loads = self._average(self.sector_cell, sector_loads, n_cells)
+        gNodeB_loads = self._average(self.cell_gNodeB, cell_loads, n_gNodeBs)
+        network_load = float(cell_loads.mean()) if n_cells else 0.0
+        return TopologyLoads(sector_loads, cell_loads, gNodeB_loads, network_load)
+
+    @staticmethod
+    def _average(parents, values, size):
+        known = parents >= 0
+        totals = np.bincount(parents[known], weights=values[known], minlength=size)
+        counts = np.bincount(parents[known], minlength=size)
+        return np.divide(totals, counts, out=np.zeros(size, dtype=np.float64), where=counts > 0)
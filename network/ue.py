@@ -12,73 +12,192 @@ import uuid
 import threading
 from threading import Lock
 from influxdb_client.client.write_api import SYNCHRONOUS, WritePrecision
+from database.line_protocol import LineTemplate
+from network.simulation_clock import SimulationClock
+from network.ue_store import UEStore, UE_COLUMNS
+from network.device_profile import DeviceProfileRegistry, profile_property, camel_to_snake
+from network.ue_registry import UERegistry
+from network.id_allocator import IDAllocator
+from network.address_pool import UEAddressPools
+
+# Precompiled line-protocol templates, see to_line_protocol() and metadata_to_line_protocol()
+UE_METRICS_LINE = LineTemplate("ue_metrics", ("ue_id", "service_type"), (
+    ("throughput", float), ("ue_jitter", float), ("ue_packet_loss_rate", float), ("ue_delay", float), ("signal_strength", float)))
+# Per-UE fields of ue_metadata; the device profile fields come preformatted from DeviceProfile.metadata_fragment
+UE_METADATA_LINE = LineTemplate("ue_metadata", ("ue_id", "connected_cell_id", "connected_sector_id", "entity_type", "gnb_id", "instance_id", "service_type"), (
+    ("imei", str), ("velocity", float), ("direction", str), ("scheduling_requests", int), ("screen_size", str), ("battery_level", int),
+    ("ip_address", str), ("mac_address", str), ("traffic_factor", float)))
+
+UE_COLUMNS_DEFAULTS = {name: default for name, (_, default) in UE_COLUMNS.items()}
+
+def _store_column(column, kind=float):
+    """Property reading and writing one UEStore column at the slot of the UE; None writes the column default."""
+    def get(self):
+        return kind(getattr(self._store, column)[self._slot])
+    def set(self, value):
+        getattr(self._store, column)[self._slot] = kind(value) if value is not None else UE_COLUMNS_DEFAULTS[column]
+    return property(get, set)
+
+class ReleasedUEError(RuntimeError):
+    """Raised when the store backed state of a deleted UE, whose slot was released, is used."""
+
 class UE:
     existing_ue_ids = set()  # Keep track of all existing UE IDs to avoid duplicates
     ue_instances = {}  #keep ue instanse
     ue_lock = Lock()
+    id_allocator = IDAllocator.get_instance()  # Generates the IDs of the UEs created without one
+    # Hot numeric state lives in the UEStore columns, the UE object only keeps its slot
+    ue_delay = _store_column('ue_delay')
+    ue_jitter = _store_column('ue_jitter')
+    ue_packet_loss_rate = _store_column('ue_packet_loss_rate')
+    traffic_factor = _store_column('traffic_factor')
+    Velocity = _store_column('velocity')
+    BatteryLevel = _store_column('battery_level', int)
+    # Device configuration is read from the shared, immutable DeviceProfile of the UE
+    profile = DeviceProfileRegistry.get_instance().from_config({})
+    RAT = profile_property('RAT')                        # Radio Access Technology used by the UE
+    MaxBandwidth = profile_property('MaxBandwidth')      # Maximum bandwidth available to the UE
+    DuplexMode = profile_property('DuplexMode')          # Duplex mode used by the UE (e.g., FDD, TDD)
+    TxPower = profile_property('TxPower')                # Transmission power of the UE
+    Modulation = profile_property('Modulation')          # Modulation techniques used by the UE
+    Coding = profile_property('Coding')                  # Coding scheme used by the UE
+    MIMO = profile_property('MIMO')                      # Indicates if MIMO is used by the UE
+    Processing = profile_property('Processing')          # Processing capabilities of the UE
+    BandwidthParts = profile_property('BandwidthParts')  # Bandwidth parts allocated to the UE
+    ChannelModel = profile_property('ChannelModel')      # Channel model used for the UE's connection
+    TrafficModel = profile_property('TrafficModel')      # Traffic model used for the UE's data transmission
+    RLCMode = profile_property('RLCMode')                # RLC mode used by the UE
+    SNRThresholds = profile_property('SNRThresholds')    # SNR thresholds for the UE
+    HOMargin = profile_property('HOMargin')              # Handover margin for the UE
+    N310 = profile_property('N310')                      # N310 parameter for the UE, related to handover
+    N311 = profile_property('N311')                      # N311 parameter for the UE, related to handover
+    Model = profile_property('Model')                    # Model of the UE
+
     def __init__(self, config, **kwargs):
+        self.config = config
+        ue_id = kwargs.get('ue_id', '').strip().lower()  # Normalize the UE ID to lowercase
+        # Only reserving the ID needs the lock, it is O(1) with the allocator
         with UE.ue_lock:
-            self.config = config
-            ue_id = kwargs.get('ue_id', '').strip().lower()  # Normalize the UE ID to lowercase
             if ue_id and ue_id in UE.existing_ue_ids:
                 raise ValueError(f"UE ID {ue_id} is already in use.")
-            elif not ue_id:
+            elif ue_id:
+                UE.id_allocator.claim(ue_id)  # Never generated from now on
+            else:
                 # Generate a unique UE ID if not provided
-                ue_id_counter = max((int(id[2:]) for id in UE.existing_ue_ids if id.startswith('ue')), default=0) + 1  # Note the 'ue' in startswith is lowercase
-                ue_id = f"ue{ue_id_counter}"  # Keep the generated ID lowercase
-                while ue_id in UE.existing_ue_ids:
-                    ue_id_counter += 1
-                    ue_id = f"ue{ue_id_counter}"
-        
-            self.ID = ue_id
-            print(f"Creating UE instance {self.ID}")
-            self.instance_id = str(uuid.uuid4())  # Generic unique identifier for the instance of the ue
-            ue_logger.debug(f"Created UE instance with ID: {self.instance_id}")
+                ue_id = UE.id_allocator.next_id()
+                while ue_id in UE.existing_ue_ids:  # Only for IDs given before the allocator knew of them
+                    ue_id = UE.id_allocator.next_id()
             UE.existing_ue_ids.add(ue_id)
-            UE.ue_instances[ue_id] = self  # Store the instance in the dictionary
-            self.IMEI = kwargs.get('imei') or self.allocate_imei()         # International Mobile Equipment Identity
-            self.throughput = float(kwargs.get('throughput', 0))  # Initialize throughput with a default value of 0
-            self.Location = kwargs.get('location')         # Geographic location of the UE
-            self.ConnectedCellID = kwargs.get('connected_cell_id')        # ID of the cell to which the UE is connected
-            self.ConnectedSector = kwargs.get('connected_sector')        # Sector of the cell to which the UE is connected
-            self.gNodeB_ID = kwargs.get('gnodeb_id')        # ID of the gNodeB to which the UE is connected
-            self.IsMobile = kwargs.get('is_mobile')        # Indicates if the UE is mobile or stationary
-            self.ServiceType = kwargs.get('service_type', random.choice(["video", "game", "voice", "data", "IoT"]))        # Type of service the UE is using (e.g., video, game)
-            self.SignalStrength = kwargs.get('initial_signal_strength', 0)       # Initial signal strength of the UE
-            self.RAT = kwargs.get('rat')        # Radio Access Technology used by the UE
-            self.MaxBandwidth = kwargs.get('max_bandwidth', 0)        # Maximum bandwidth available to the UE
-            self.DuplexMode = kwargs.get('duplex_mode')        # Duplex mode used by the UE (e.g., FDD, TDD)
-            self.TxPower = kwargs.get('tx_power',0)        # Transmission power of the UE
-            self.Modulation = kwargs.get('modulation')        # Modulation technique used by the UE
-            self.Coding = kwargs.get('coding')        # Coding scheme used by the UE
-            self.MIMO = kwargs.get('mimo')        # Indicates if MIMO is used by the UE
-            self.Processing = kwargs.get('processing')        # Processing capabilities of the UE
-            self.BandwidthParts = kwargs.get('bandwidth_parts')        # Bandwidth parts allocated to the UE
-            self.ChannelModel = kwargs.get('channel_model')        # Channel model used for the UE's connection
-            self.Velocity = kwargs.get('velocity',0)        # Velocity of the UE if it is mobile
-            self.Direction = kwargs.get('direction')        # Direction of the UE's movement if it is mobile
-            self.TrafficModel = kwargs.get('traffic_model')        # Traffic model used for the UE's data transmission
-            self.SchedulingRequests = kwargs.get('scheduling_requests',0)        # Number of scheduling requests made by the UE
-            self.RLCMode = kwargs.get('rlc_mode')        # RLC mode used by the UE
-            self.SNRThresholds = kwargs.get('snr_thresholds', [])        # SNR thresholds for the UE
-            self.HOMargin = kwargs.get('ho_margin')        # Handover margin for the UE
-            self.N310 = kwargs.get('n310')        # N310 parameter for the UE, related to handover
-            self.N311 = kwargs.get('n311')        # N311 parameter for the UE, related to handover
-            self.Model = kwargs.get('model')        # Model of the UE
-            self.ScreenSize = kwargs.get('screensize', f"{random.uniform(5.0, 7.0):.1f} inches")        # Screen size of the UE
-            self.BatteryLevel = kwargs.get('batterylevel', random.randint(10, 100))        # Battery level of the UE
-            self.traffic_volume = float(0)       # Traffic volume handled by the UE (initialized to 0)
-            self.DataSize = kwargs.get('datasize')        # Data size transmitted/received by the UE
-            self.generating_traffic = True               #link to initialize the traffic generation flag
-            self.IP = kwargs.get('ip') or UE.allocate_ip() # Allocate an IP if not provided
-            self.MAC = kwargs.get('mac') or UE.allocate_mac() # Allocate a MAC if not provided
-            self.ue_jitter = float(0)  # Initialize ue_jitter to 0. Jitter measures variation in packet delay.
-            self.ue_packet_loss_rate = float(0)  # Initialize ue_packet loss rate to 0. This measures the rate of ue lost packets in the network.
-            self.ue_delay = float(0)  # Initialize ue_delay to 0. Delay measures the time taken for data to travel from source to destination.
-            self.traffic_factor = float(kwargs.get('traffic_factor', 1.0))  # Default factor is 1.0, this is for dynamic traffic change via API
-
-            ue_logger.info(f"UE initialized with ID {self.ID} at {datetime.now()}")
+        # IMEI, IP and MAC are unique, see network/address_pool.py; the ones given must not be in use
+        pools = UEAddressPools.get_instance()
+        addresses = []
+        try:
+            for pool, key in ((pools.imei, 'imei'), (pools.ip, 'ip'), (pools.mac, 'mac')):
+                addresses.append((pool, UE.pooled_address(pool, kwargs.get(key), kwargs.get('preallocated', False))))
+        except ValueError:
+            for pool, address in addresses:
+                pool.release(address)
+            UE.deregister_ue(ue_id)
+            raise
+        imei, ip, mac = (address for _, address in addresses)
+
+        self.ID = ue_id
+        self.bind_slot()
+        print(f"Creating UE instance {self.ID}")
+        self.instance_id = str(uuid.uuid4())  # Generic unique identifier for the instance of the ue
+        ue_logger.debug(f"Created UE instance with ID: {self.instance_id}")
+        UE.ue_instances[ue_id] = self  # Store the instance in the dictionary
+        self.IMEI = imei         # International Mobile Equipment Identity
+        self.throughput = float(kwargs.get('throughput', 0))  # Initialize throughput with a default value of 0
+        self.Location = kwargs.get('location')         # Geographic location of the UE
+        self.ConnectedCellID = kwargs.get('connected_cell_id')        # ID of the cell to which the UE is connected
+        self.ConnectedSector = kwargs.get('connected_sector')        # Sector of the cell to which the UE is connected
+        self.gNodeB_ID = kwargs.get('gnodeb_id')        # ID of the gNodeB to which the UE is connected
+        self.IsMobile = kwargs.get('is_mobile')        # Indicates if the UE is mobile or stationary
+        self.ServiceType = kwargs.get('service_type', random.choice(["video", "game", "voice", "data", "IoT"]))        # Type of service the UE is using (e.g., video, game)
+        self.SignalStrength = kwargs.get('initial_signal_strength', 0)       # Initial signal strength of the UE
+        # Configuration shared with the UEs of the same device type, see network/device_profile.py
+        self.profile = kwargs.get('profile') or DeviceProfileRegistry.get_instance().from_config(kwargs)
+        self.Velocity = kwargs.get('velocity',0)        # Velocity of the UE if it is mobile
+        self.Direction = kwargs.get('direction')        # Direction of the UE's movement if it is mobile
+        self.SchedulingRequests = kwargs.get('scheduling_requests',0)        # Number of scheduling requests made by the UE
+        self.ScreenSize = kwargs.get('screensize', f"{random.uniform(5.0, 7.0):.1f} inches")        # Screen size of the UE
+        self.BatteryLevel = kwargs.get('batterylevel', random.randint(10, 100))        # Battery level of the UE
+        self.traffic_volume = float(0)       # Traffic volume handled by the UE (initialized to 0)
+        self.DataSize = kwargs.get('datasize')        # Data size transmitted/received by the UE
+        self.generating_traffic = True               #link to initialize the traffic generation flag
+        self.IP = ip # Allocated from the pool if not provided
+        self.MAC = mac # Allocated from the pool if not provided
+        self.ue_jitter = float(0)  # Initialize ue_jitter to 0. Jitter measures variation in packet delay.
+        self.ue_packet_loss_rate = float(0)  # Initialize ue_packet loss rate to 0. This measures the rate of ue lost packets in the network.
+        self.ue_delay = float(0)  # Initialize ue_delay to 0. Delay measures the time taken for data to travel from source to destination.
+        self.traffic_factor = float(kwargs.get('traffic_factor', 1.0))  # Default factor is 1.0, this is for dynamic traffic change via API
+
+        ue_logger.info(f"UE initialized with ID {self.ID} at {datetime.now()}")
     
+    def bind_slot(self, store=None):
+        """Allocates the slot of the UE in store (the shared UEStore by default)."""
+        self._store = store if store is not None else UEStore.get_instance()
+        self._slot_index = self._store.allocate()
+
+    def release_slot(self):
+        """Frees the slot of a deleted UE; its store backed attributes raise ReleasedUEError from then on."""
+        slot = self.__dict__.get('_slot_index')
+        if slot is not None:
+            self._store.release(slot)
+            self._slot_index = None
+
+    @property
+    def released(self):
+        """Whether the slot of the UE has been released, i.e. the UE has been deleted."""
+        return self.__dict__.get('_slot_index') is None
+
+    @property
+    def _slot(self):
+        slot = self.__dict__.get('_slot_index')
+        if slot is None:
+            raise ReleasedUEError(f"UE {getattr(self, 'ID', '?')} has been deleted, its state is no longer available.")
+        return slot
+
+    @property
+    def throughput(self):
+        return float(self._store.throughput[self._slot])
+
+    @throughput.setter
+    def throughput(self, value):
+        # Through the store, so the running load sums of the sector of the UE follow
+        self._store.set_throughput(self._slot, float(value) if value is not None else 0.0)
+
+    @property
+    def Location(self):
+        """[latitude, longitude], or None when the UE has no location."""
+        latitude = self._store.latitude[self._slot]
+        if latitude != latitude:  # NaN
+            return None
+        return [float(latitude), float(self._store.longitude[self._slot])]
+
+    @Location.setter
+    def Location(self, location):
+        if location is None:
+            latitude = longitude = float('nan')
+        elif isinstance(location, dict):
+            latitude, longitude = location['latitude'], location['longitude']
+        else:
+            latitude, longitude = location
+        self._store.latitude[self._slot] = latitude
+        self._store.longitude[self._slot] = longitude
+
+    @property
+    def ConnectedSector(self):
+        return self._store.sector_id_of(int(self._store.sector_index[self._slot]))
+
+    @ConnectedSector.setter
+    def ConnectedSector(self, sector_id):
+        self._store.sector_index[self._slot] = self._store.sector_index_of(sector_id)
+
+    # Sector.add_ue sets connected_sector, it is the same value
+    connected_sector = ConnectedSector
+
     @classmethod
     def get_ues(cls):
         with cls.ue_lock:
@@ -90,29 +209,31 @@ class UE:
     
     @staticmethod
     def allocate_imei():
-        # Generate and return a random IMEI during UE initialization
-        while True:
-            start = str(random.randint(10000000, 99999999))  # Generate an 8-digit TAC
-            while len(start) < 14:
-                start += str(random.randint(0, 9))
-            imei = start + str(UE.calc_check_digit(start))
-            break
-        return imei
-    @staticmethod
+        # Next IMEI of the pool (sequential serials with a Luhn check digit), unique until the UE is deleted
+        return UEAddressPools.get_instance().imei.allocate()
 
-    def allocate_ip():
-        # Generate a random IP address within the private range 192.168.0.0 to 192.168.255.255
-        octets = [192, 168, random.randint(0, 255), random.randint(1, 254)]
-        return '.'.join(str(octet) for octet in octets)
     @staticmethod
+    def allocate_ip():
+        # Next free address of UE_IP_POOL_CIDR (10.0.0.0/8 by default), unique until the UE is deleted
+        return UEAddressPools.get_instance().ip.allocate()
 
+    @staticmethod
     def allocate_mac():
-        # Generate a random MAC address in the format 00:00:00:00:00:00
-        # The first half of the MAC address (first three octets) can be a manufacturer's identifier. Here we use a private range (x2:xx:xx).
-        # The second half (last three octets) is randomly generated.
-        mac = [0x02, random.randint(0x00, 0x7f), random.randint(0x00, 0xff), 
-                random.randint(0x00, 0xff), random.randint(0x00, 0xff), random.randint(0x00, 0xff)]
-        return ':'.join(f'{octet:02x}' for octet in mac)
+        # Next MAC address under the locally administered UE_MAC_PREFIX, unique until the UE is deleted
+        return UEAddressPools.get_instance().mac.allocate()
+
+    @staticmethod
+    def pooled_address(pool, value, preallocated=False):
+        """
+        Returns value after marking it as used in pool, or the next address of pool when value is not given.
+        :param preallocated: value was already allocated from pool by the caller (batch creation), it is not claimed again.
+        :raises ValueError: If value is already in use.
+        """
+        if not value:
+            return pool.allocate()
+        if not preallocated:
+            pool.claim(value)
+        return value
     
     # Method to update data volume
     def update_traffic_volume(self, data_size):
@@ -127,8 +248,7 @@ class UE:
 
     @staticmethod
     def camel_to_snake(name):
-        name = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-        return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+        return camel_to_snake(name)
 
     @staticmethod
     def from_json(json_data):
@@ -141,33 +261,27 @@ class UE:
     
     @classmethod
     def get_ue_instance_by_id(cls, ue_id):
-        ue_id_processed = ue_id.strip().lower()
-        for stored_ue_id, ue_instance in cls.ues.items():  # Use the correct attribute 'ues'
-            if stored_ue_id.lower() == ue_id_processed:
-                return ue_instance
-        return None
+        return cls.ue_instances.get(ue_id.strip().lower())  # UE IDs are stored normalized to lowercase
     
     @classmethod
     def deregister_ue(cls, ue_id):
-        ue_id_lower = ue_id.lower()
-        for stored_ue_id in list(cls.existing_ue_ids):  # Create a list to avoid modifying the set during iteration
-            if stored_ue_id.lower() == ue_id_lower:
-                cls.existing_ue_ids.remove(stored_ue_id)
-                ue_logger.info(f"UE ID {stored_ue_id} removed from existing_ue_ids.")
-                break  # Assuming UE IDs are unique, break after finding and removing the ID
-
-        for stored_ue_id in list(cls.ues.keys()):  # Use the correct attribute 'ues'
-            if stored_ue_id.lower() == ue_id_lower:
-                del cls.ues[stored_ue_id]  # Use the correct attribute 'ues'
-                ue_logger.info(f"UE instance {stored_ue_id} removed from ues.")
-                break  # Assuming UE IDs are unique, break after finding and removing the instance
+        ue_id = ue_id.strip().lower()  # UE IDs are stored normalized to lowercase
+        with cls.ue_lock:
+            if ue_id in cls.existing_ue_ids:
+                cls.existing_ue_ids.discard(ue_id)
+                cls.id_allocator.release(ue_id)  # Handed out again only if UE_ID_RECYCLE is enabled
+                ue_logger.info(f"UE ID {ue_id} removed from existing_ue_ids.")
+            if cls.ue_instances.pop(ue_id, None) is not None:
+                ue_logger.info(f"UE instance {ue_id} removed from ue_instances.")
+        UERegistry.get_instance().detach(ue_id)
 
-    def serialize_for_influxdb(self):
+    def serialize_metadata_for_influxdb(self):
+        """Device profile and association of the UE, written at launch and when its parameters change."""
         try:
             # Convert current UTC time to a UNIX timestamp in seconds
-            unix_timestamp_seconds = int(datetime.utcnow().timestamp())
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
     
-            point = Point("ue_metrics") \
+            point = Point("ue_metadata") \
                 .tag("ue_id", str(self.ID)) \
                 .tag("connected_cell_id", str(self.ConnectedCellID)) \
                 .tag("connected_sector_id", str(self.ConnectedSector)) \
@@ -176,42 +290,68 @@ class UE:
                 .tag("instance_id", str(self.instance_id)) \
                 .tag("service_type", str(self.ServiceType)) \
                 .field("imei", str(self.IMEI)) \
-                .field("signal_strength", float(self.SignalStrength)) \
-                .field("rat", str(self.RAT)) \
-                .field("max_bandwidth", int(self.MaxBandwidth)) \
-                .field("throughput", float(self.throughput)) \
-                .field("duplex_mode", str(self.DuplexMode)) \
-                .field("tx_power", int(self.TxPower)) \
-                .field("modulation", ','.join(self.Modulation) if isinstance(self.Modulation, list) else str(self.Modulation)) \
-                .field("coding", str(self.Coding)) \
-                .field("mimo", str(self.MIMO)) \
-                .field("processing", str(self.Processing)) \
-                .field("bandwidth_parts", ','.join(map(str, self.BandwidthParts)) if isinstance(self.BandwidthParts, list) else str(self.BandwidthParts)) \
-                .field("channel_model", str(self.ChannelModel)) \
                 .field("velocity", float(self.Velocity)) \
                 .field("direction", str(self.Direction)) \
-                .field("traffic_model", str(self.TrafficModel)) \
                 .field("scheduling_requests", int(self.SchedulingRequests)) \
-                .field("rlc_mode", str(self.RLCMode)) \
-                .field("snr_thresholds", ','.join(map(str, self.SNRThresholds))) \
-                .field("ho_margin", str(self.HOMargin)) \
-                .field("n310", str(self.N310)) \
-                .field("n311", str(self.N311)) \
-                .field("model", str(self.Model)) \
                 .field("screen_size", str(self.ScreenSize)) \
                 .field("battery_level", int(self.BatteryLevel)) \
                 .field("ip_address", str(self.IP)) \
                 .field("mac_address", str(self.MAC)) \
+                .field("traffic_factor", float(self.traffic_factor)) \
+                .time(unix_timestamp_seconds, WritePrecision.S)  # Use UNIX timestamp in seconds
+            for field, value in self.profile.metadata_fields.items():
+                point.field(field, value)
+            return point
+        except Exception as e:
+            database_logger.error(f"Error serializing UE metadata for InfluxDB: {e}")
+            raise
+
+    def serialize_for_influxdb(self):
+        """Traffic metrics of the UE, tagged like the ue_metrics points of the traffic generator."""
+        try:
+            # Convert current UTC time to a UNIX timestamp in seconds
+            unix_timestamp_seconds = int(SimulationClock.get_instance().time())
+
+            point = Point("ue_metrics") \
+                .tag("ue_id", str(self.ID)) \
+                .tag("service_type", str(self.ServiceType)) \
+                .field("throughput", float(self.throughput)) \
                 .field("ue_jitter", float(self.ue_jitter)) \
                 .field("ue_packet_loss_rate", float(self.ue_packet_loss_rate)) \
                 .field("ue_delay", float(self.ue_delay)) \
-                .field("traffic_factor", float(self.traffic_factor)) \
+                .field("signal_strength", float(self.SignalStrength)) \
                 .time(unix_timestamp_seconds, WritePrecision.S)  # Use UNIX timestamp in seconds
             return point
         except Exception as e:
             database_logger.error(f"Error serializing UE data for InfluxDB: {e}")
             raise
 
+    def to_line_protocol(self, buffer=None):
+        """
+        Precompiled counterpart of serialize_for_influxdb(), producing the same line without building a Point.
+        :param buffer: Optional LineBuffer the line is appended to.
+        :return: The line, or None when it has been appended to buffer.
+        """
+        prefix = UE_METRICS_LINE.cached_prefix(self, (str(self.ID), str(self.ServiceType)))
+        values = (self.throughput, self.ue_jitter, self.ue_packet_loss_rate, self.ue_delay, self.SignalStrength)
+        timestamp = int(SimulationClock.get_instance().time())
+        if buffer is None:
+            return UE_METRICS_LINE.format(prefix, values, timestamp)
+        UE_METRICS_LINE.write(buffer, prefix, values, timestamp)
+
+    def metadata_to_line_protocol(self, buffer=None):
+        """Precompiled counterpart of serialize_metadata_for_influxdb(), see to_line_protocol()."""
+        prefix = UE_METADATA_LINE.cached_prefix(self, (str(self.ID), str(self.ConnectedCellID), str(self.ConnectedSector), "ue",
+                                                       str(self.gNodeB_ID), str(self.instance_id), str(self.ServiceType)))
+        values = (self.IMEI, self.Velocity, self.Direction, self.SchedulingRequests, self.ScreenSize, self.BatteryLevel,
+                  self.IP, self.MAC, self.traffic_factor)
+        # The Point path writes missing values as the string "None"
+        values = tuple('None' if value is None else value for value in values)
+        timestamp = int(SimulationClock.get_instance().time())
+        if buffer is None:
+            return UE_METADATA_LINE.format(prefix, values, timestamp, self.profile.metadata_fragment)
+        UE_METADATA_LINE.write(buffer, prefix, values, timestamp, self.profile.metadata_fragment)
+
     def update_parameters(self, **kwargs):
         for key, value in kwargs.items():
             if hasattr(self, key):
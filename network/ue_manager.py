@@ -12,7 +12,9 @@ from Config_files.config import Config
 from logs.logger_config import ue_logger
 from network.sector_manager import SectorManager
 from network.sector import global_ue_ids  # Ensure this import is correct
+from network.address_pool import UEAddressPools
 import threading
+from database.database_manager import DatabaseManager
 # Get base path
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 config = Config(base_dir)
@@ -116,6 +118,8 @@ class UEManager:
         print(f"UE instance found for ID {ue_id}: {ue}")
         if ue:
             ue.update_parameters(**kwargs)
+            # The device profile changed, write the UE metadata again
+            DatabaseManager.get_instance().insert_data(ue.serialize_metadata_for_influxdb())
             ue_logger.info(f"UE {ue_id} updated successfully with parameters {kwargs}.")
             return True
         else:
@@ -144,8 +148,14 @@ class UEManager:
         if sector_manager.remove_ue_from_sector(sector_id, ue_id):
             print(f"UE {ue_id} successfully removed from sector {sector_id}.")
             global_ue_ids.discard(ue_id)  # Correctly modify global_ue_ids
-            # Now, delete the UE instance from UEManager's ues dictionary
-            del self.ues[ue_id]
+            UE.deregister_ue(ue_id)  # UE.get_ues() no longer returns it
+            # Now, delete the UE instance from UEManager's ues dictionary. Under the lock, so the TickKernel never copies
+            # a UE whose slot is being released
+            with UEManager._lock:
+                del self.ues[ue_id]
+                ue.release_slot()  # Free the UE store slot for the next UE
+            UEAddressPools.get_instance().release(ue.IP, ue.MAC, ue.IMEI)  # Free its addresses for the next UEs
+            DatabaseManager.get_instance().recent_metrics.invalidate(ue_id)  # Its cached metrics are no longer served
             ue_logger.debug(f"UE {ue_id} successfully deleted from ues dictionary.")
             ue_logger.debug(f"Current contents of ues dictionary: {self.ues}")
             return True
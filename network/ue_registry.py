@@ -0,0 +1,118 @@
+#####################################################################################################################
+# ue_registry.py is located in network folder. The UERegistry is the one place that knows which UE is attached     #
+# where: for every sector an OrderedUESet of its UE IDs (insertion ordered like the lists it replaces, with O(1)    #
+# membership and removal), and the reverse index UE ID -> UELocation (sector, cell, gNodeB). Both are updated       #
+# together on attach, detach and handover, so finding the sector of a UE no longer scans every sector.              #
+# Sector.connected_ues is the OrderedUESet of the sector; change it through the registry, not directly.             #
+#####################################################################################################################
+import threading
+from collections import namedtuple
+
+UELocation = namedtuple('UELocation', ('sector_id', 'cell_id', 'gNodeB_id'))
+
+class OrderedUESet:
+    """Set of UE IDs iterating in insertion order; a drop-in for the UE ID lists (append, remove, len, in, iteration)."""
+    __slots__ = ('_ids',)
+
+    def __init__(self, ue_ids=()):
+        self._ids = dict.fromkeys(ue_ids)
+
+    def add(self, ue_id):
+        self._ids[ue_id] = None
+
+    append = add
+
+    def discard(self, ue_id):
+        self._ids.pop(ue_id, None)
+
+    def update(self, ue_ids):
+        self._ids.update(dict.fromkeys(ue_ids))
+
+    def clear(self):
+        self._ids.clear()
+
+    def remove(self, ue_id):
+        try:
+            del self._ids[ue_id]
+        except KeyError:
+            raise ValueError(f"UE {ue_id} is not in the set.") from None
+
+    def __contains__(self, ue_id):
+        return ue_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, (OrderedUESet, list, tuple)) else NotImplemented
+
+    def __repr__(self):
+        return repr(list(self._ids))
+
+class UERegistry:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self._sector_ues = {}  # Sector ID -> OrderedUESet of its UE IDs
+        self._locations = {}  # UE ID -> UELocation
+        self._lock = threading.Lock()
+
+    def sector_ues(self, sector_id):
+        """:return: The live OrderedUESet of the UEs attached to sector_id."""
+        ues = self._sector_ues.get(sector_id)
+        if ues is None:
+            with self._lock:
+                ues = self._sector_ues.setdefault(sector_id, OrderedUESet())
+        return ues
+
+    def attach(self, ue_id, sector_id, cell_id=None, gNodeB_id=None):
+        """
+        Attaches a UE to a sector; a UE attached to another sector is handed over (moved) to it.
+        :return: UELocation of the UE before, None if it was not attached.
+        """
+        ues = self.sector_ues(sector_id)
+        with self._lock:
+            previous = self._locations.get(ue_id)
+            if previous is not None and previous.sector_id != sector_id:
+                self._sector_ues[previous.sector_id].discard(ue_id)
+            ues.add(ue_id)
+            self._locations[ue_id] = UELocation(sector_id, cell_id, gNodeB_id)
+            return previous
+
+    handover = attach
+
+    def detach(self, ue_id):
+        """
+        Detaches a UE from its sector.
+        :return: UELocation of the UE before, None if it was not attached.
+        """
+        with self._lock:
+            location = self._locations.pop(ue_id, None)
+            if location is not None:
+                self._sector_ues[location.sector_id].discard(ue_id)
+            return location
+
+    def locate(self, ue_id):
+        """:return: UELocation (sector_id, cell_id, gNodeB_id) of a UE, None if it is not attached."""
+        return self._locations.get(ue_id)
+
+    def sector_of(self, ue_id):
+        location = self._locations.get(ue_id)
+        return location.sector_id if location is not None else None
+
+    def __contains__(self, ue_id):
+        return ue_id in self._locations
+
+    def __len__(self):
+        return len(self._locations)
@@ -0,0 +1,236 @@
+#####################################################################################################################
+# ue_store.py is located in network folder. The UEStore keeps the hot numeric state of every UE in contiguous NumPy #
+# columns (structure of arrays) indexed by a dense integer slot: throughput, delay, jitter, packet loss, traffic     #
+# factor, connected sector index, location, velocity and battery level. A UE object only holds its slot and reads   #
+# and writes these values through properties, so the per-UE state costs a few dozen bytes and aggregate passes      #
+# (capped sector throughput, display of all UEs, batch traffic updates) are vectorized over whole columns. Slots of #
+# deleted UEs are reused; the columns double in size when they are full. The store also keeps running UE counts and #
+# capped throughput sums per sector, updated on every attach, detach and throughput change, for the load manager.   #
+#####################################################################################################################
+import os
+import threading
+import numpy as np
+
+# Read from environment variables or use default values
+UE_STORE_CAPACITY = int(os.getenv('UE_STORE_CAPACITY', '1024'))  # Initial number of slots, doubled when full
+
+# Column name -> (dtype, value of a free slot)
+UE_COLUMNS = {
+    'throughput': (np.float64, 0.0),
+    'ue_delay': (np.float64, 0.0),
+    'ue_jitter': (np.float64, 0.0),
+    'ue_packet_loss_rate': (np.float64, 0.0),
+    'traffic_factor': (np.float64, 1.0),
+    'sector_index': (np.int32, -1),
+    'latitude': (np.float64, np.nan),
+    'longitude': (np.float64, np.nan),
+    'velocity': (np.float64, 0.0),
+    'battery_level': (np.int16, 0),
+    # Load accounting: sector index the UE is counted in (-1 when not attached) and its capped throughput counted there
+    'load_sector': (np.int32, -1),
+    'capped_throughput': (np.float64, 0.0),
+}
+
+class UEStore:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, capacity=UE_STORE_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        for name, (dtype, default) in UE_COLUMNS.items():
+            setattr(self, name, np.full(self.capacity, default, dtype=dtype))
+        self.in_use = np.zeros(self.capacity, dtype=bool)
+        self.sector_ids = []  # Sector index -> sector ID
+        self._sector_indices = {}  # Sector ID -> sector index
+        self._free_slots = []
+        self._next_slot = 0
+        # Running sums per sector index, updated on attach, detach and throughput change (see load accounting below)
+        self.sector_ue_count = np.zeros(0, dtype=np.int64)
+        self.sector_capped_throughput = np.zeros(0, dtype=np.float64)
+        self.sector_throughput_cap = np.zeros(0, dtype=np.float64)
+        self._dirty_sectors = set()
+        self._lock = threading.RLock()
+
+    def allocate(self):
+        """
+        :return: A free slot, reset to the default value of every column.
+        """
+        with self._lock:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            else:
+                if self._next_slot == self.capacity:
+                    self._grow(self.capacity * 2)
+                slot = self._next_slot
+                self._next_slot += 1
+            self._reset(slot)
+            self.in_use[slot] = True
+            return slot
+
+    def release(self, slot):
+        with self._lock:
+            if not self.in_use[slot]:
+                return
+            self.detach(slot)
+            self.in_use[slot] = False
+            self._reset(slot)
+            self._free_slots.append(slot)
+
+    def _reset(self, slot):
+        for name, (_, default) in UE_COLUMNS.items():
+            getattr(self, name)[slot] = default
+
+    def _grow(self, capacity):
+        for name, (dtype, default) in list(UE_COLUMNS.items()) + [('in_use', (bool, False))]:
+            column = np.full(capacity, default, dtype=dtype)
+            column[:self.capacity] = getattr(self, name)
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def sector_index_of(self, sector_id):
+        """Returns the dense index of sector_id, registering it on first use; -1 for None."""
+        if sector_id is None:
+            return -1
+        index = self._sector_indices.get(sector_id)
+        if index is None:
+            with self._lock:
+                index = self._sector_indices.setdefault(sector_id, len(self.sector_ids))
+                if index == len(self.sector_ids):
+                    self.sector_ids.append(sector_id)
+                    if index == len(self.sector_ue_count):
+                        self._grow_sectors(max(8, 2 * index))
+        return index
+
+    def _grow_sectors(self, size):
+        for name, default in (('sector_ue_count', 0), ('sector_capped_throughput', 0.0), ('sector_throughput_cap', np.inf)):
+            column = getattr(self, name)
+            grown = np.full(size, default, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def sector_id_of(self, index):
+        return self.sector_ids[index] if index >= 0 else None
+
+    def active_slots(self):
+        return np.flatnonzero(self.in_use)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.in_use))
+
+    def nbytes(self):
+        """Memory used by the columns, in bytes."""
+        return sum(getattr(self, name).nbytes for name in UE_COLUMNS) + self.in_use.nbytes
+
+    def capped_sum(self, column, slots, cap):
+        """Sum of column over slots, each value capped at cap."""
+        return float(np.minimum(getattr(self, column)[slots], cap).sum())
+
+    def sum_by_sector(self, column, caps=None):
+        """
+        Sums column over the UEs of every sector in one pass.
+        :param caps: Optional array, indexed by sector index, capping the value of each UE of the sector.
+        :return: Array indexed by sector index.
+        """
+        slots = np.flatnonzero(self.in_use & (self.sector_index >= 0))
+        sectors = self.sector_index[slots]
+        values = getattr(self, column)[slots]
+        if caps is not None:
+            values = np.minimum(values, np.asarray(caps, dtype=np.float64)[sectors])
+        return np.bincount(sectors, weights=values, minlength=len(self.sector_ids))
+
+    ###################################################################################################################
+    # Load accounting. Every UE attached to a sector counts once in the UE count of the sector and with its throughput,
+    # capped at the throughput cap of the sector, in its capped throughput. Both sums are kept up to date in O(1) per
+    # attach, detach and throughput change, and the sectors whose sums changed are remembered until pop_dirty_sectors().
+    def attach(self, slot, sector_id, cap=None):
+        """
+        Counts the UE at slot in the sums of sector_id, moving it out of the sector it was counted in.
+        :param cap: Throughput cap of the sector, see set_throughput_cap().
+        """
+        with self._lock:
+            index = self.sector_index_of(sector_id)
+            if cap is not None and cap != self.sector_throughput_cap[index]:
+                self.set_throughput_cap(sector_id, cap)
+            self.detach(slot)
+            capped = min(float(self.throughput[slot]), self.sector_throughput_cap[index])
+            self.load_sector[slot] = index
+            self.capped_throughput[slot] = capped
+            self.sector_ue_count[index] += 1
+            self.sector_capped_throughput[index] += capped
+            self._dirty_sectors.add(index)
+
+    def detach(self, slot):
+        """Removes the UE at slot from the sums of the sector it is counted in, if any."""
+        with self._lock:
+            index = int(self.load_sector[slot])
+            if index < 0:
+                return
+            self.sector_ue_count[index] -= 1
+            self.sector_capped_throughput[index] -= self.capped_throughput[slot]
+            self.load_sector[slot] = -1
+            self.capped_throughput[slot] = 0.0
+            self._dirty_sectors.add(index)
+
+    def set_throughput(self, slot, value):
+        """Sets the throughput of one UE and applies the change of its capped throughput to its sector."""
+        with self._lock:
+            self.throughput[slot] = value
+            index = self.load_sector[slot]
+            if index >= 0:
+                capped = min(float(value), self.sector_throughput_cap[index])
+                self.sector_capped_throughput[index] += capped - self.capped_throughput[slot]
+                self.capped_throughput[slot] = capped
+                self._dirty_sectors.add(int(index))
+
+    def set_throughputs(self, slots, values):
+        """Vectorized set_throughput() for an index array of distinct slots."""
+        with self._lock:
+            self.throughput[slots] = values
+            counted = self.load_sector[slots] >= 0
+            slots = slots[counted]
+            sectors = self.load_sector[slots]
+            capped = np.minimum(self.throughput[slots], self.sector_throughput_cap[sectors])
+            deltas = np.bincount(sectors, weights=capped - self.capped_throughput[slots], minlength=len(self.sector_capped_throughput))
+            self.sector_capped_throughput += deltas
+            self.capped_throughput[slots] = capped
+            self._dirty_sectors.update(np.unique(sectors).tolist())
+
+    def set_throughput_cap(self, sector_id, cap):
+        """Sets the maximum throughput one UE counts for in sector_id and recounts the UEs of the sector."""
+        with self._lock:
+            index = self.sector_index_of(sector_id)
+            self.sector_throughput_cap[index] = cap
+            slots = np.flatnonzero(self.load_sector == index)
+            self.capped_throughput[slots] = np.minimum(self.throughput[slots], cap)
+            self.sector_capped_throughput[index] = self.capped_throughput[slots].sum()
+            self._dirty_sectors.add(index)
+
+    def mark_dirty(self, sector_id):
+        with self._lock:
+            self._dirty_sectors.add(self.sector_index_of(sector_id))
+
+    def pop_dirty_sectors(self):
+        """Returns the IDs of the sectors whose sums changed since the previous call."""
+        with self._lock:
+            dirty, self._dirty_sectors = self._dirty_sectors, set()
+        return [self.sector_ids[index] for index in sorted(dirty)]
+
+    def recount_sectors(self):
+        """Recomputes the running sums from the UE columns, discarding the rounding drift of many small updates."""
+        with self._lock:
+            slots = np.flatnonzero(self.in_use & (self.load_sector >= 0))
+            sectors = self.load_sector[slots]
+            size = len(self.sector_ue_count)
+            self.sector_ue_count[:] = np.bincount(sectors, minlength=size)
+            self.sector_capped_throughput[:] = np.bincount(sectors, weights=self.capped_throughput[slots], minlength=size)
+
+def ue_slots(ues):
+    """Slots of a sequence of UEs, as an index array."""
+    return np.fromiter((ue._slot for ue in ues), dtype=np.intp, count=len(ues))
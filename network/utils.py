@@ -2,6 +2,8 @@
 import random
 import math
 from network.ue import UE
+from network.device_profile import DeviceProfileRegistry
+from network.address_pool import UEAddressPools
 from network.sector import Sector
 from network.gNodeB import gNodeB
 from network.cell import Cell
@@ -21,8 +23,12 @@ def allocate_ues(num_ues, sectors, ue_config):
     ue_allocs = {s: [] for s in sectors}
     rr_pointer = 0
     allocated_ues = []
+    # One contiguous block of IDs for the UEs the sectors can take
+    ue_ids = UE.id_allocator.allocate(min(num_ues, get_total_capacity(sectors)))
+    # And one block of IPs, MAC addresses and IMEIs
+    ips, macs, imeis = UEAddressPools.get_instance().allocate_block(len(ue_ids))
 
-    for _ in range(num_ues):
+    for ue_id, ip, mac, imei in zip(ue_ids, ips, macs, imeis):
         allocated = False
         attempted_sectors = 0
 
@@ -32,7 +38,7 @@ def allocate_ues(num_ues, sectors, ue_config):
             attempted_sectors += 1
 
             if sector.remaining_capacity > 0:
-                ue = create_ue(sector, ue_config)
+                ue = create_ue(sector, ue_config, ue_id, ip=ip, mac=mac, imei=imei, preallocated=True)
                 sector.add_ue(ue)
                 ue_allocs[sector].append(ue)
                 allocated_ues.append(ue)
@@ -43,6 +49,10 @@ def allocate_ues(num_ues, sectors, ue_config):
             print("Warning: Unable to allocate UE, all sectors at capacity.")
             break  # Break the for loop if no sectors have capacity
 
+    # Give the IDs and addresses of the UEs that could not be allocated back
+    UE.id_allocator.unallocate(ue_ids[len(allocated_ues):])
+    for ip, mac, imei in list(zip(ips, macs, imeis))[len(allocated_ues):]:
+        UEAddressPools.get_instance().release(ip, mac, imei)
     return allocated_ues
 
 
@@ -72,16 +82,20 @@ def get_sectors_for_gnb(gnb, all_sectors):
     return gnb_sectors
 
 
-def create_ue(sector, ue_config):
+def create_ue(sector, ue_config, ue_id='', **addresses):
     gnb = sector.cell.gNodeB
     latitude, longitude = random_location_within_radius(gnb.Latitude, gnb.Longitude, gnb.CoverageRadius)
 
-    # Create UE without specifying ue_id, letting the UE class handle it
+    # Without ue_id the UE class generates one. UEs created from the same configuration entry share one interned
+    # device profile.
     ue = UE(config=ue_config,
+            ue_id=ue_id,
+            profile=DeviceProfileRegistry.get_instance().from_config((ue_config.get('ues') or [{}])[0]),
             connected_sector=sector.sector_id,
             connected_cell=sector.cell_id,
             gnodeb_id=gnb.ID,
-            location=[latitude, longitude])
+            location=[latitude, longitude],
+            **addresses)  # ip, mac and imei (and preallocated); allocated from the address pools when not given
 
     return ue
 
@@ -16,6 +16,7 @@ from threading import Event
 import os
 import threading
 from network.ue import UE
+from network.ue_store import UEStore, ue_slots
 from blessed import Terminal
 from database.database_manager import DatabaseManager
 # Assuming these are your custom modules for managing various aspects of the network simulator
@@ -192,20 +193,24 @@ class SimulatorCLI(cmd.Cmd):
                     
                     # Fetch current UE instances
                     ue_instances = UE.get_ues()
-                    
-                    # Iterate over each UE instance to extract and display its attributes
-                    for ue in ue_instances:
-                        # Convert throughput from bytes to MB
-                        throughput_mbps = ue.throughput / 1e6
-                        
-                        # Add a row to the table for each UE's traffic data
+
+                    # Read the traffic columns of all UEs at once from the UE store
+                    store = UEStore.get_instance()
+                    slots = ue_slots(ue_instances)
+                    throughput_mbps = store.throughput[slots] / 1e6  # Convert throughput from bytes to MB
+                    delays = store.ue_delay[slots].tolist()
+                    jitters = store.ue_jitter[slots].tolist()
+                    packet_loss_rates = (store.ue_packet_loss_rate[slots] * 100).tolist()
+
+                    # Add a row to the table for each UE's traffic data
+                    for index, ue in enumerate(ue_instances):
                         table.add_row([
                             ue.ID,  # UE ID
                             ue.ServiceType,  # Service Type
-                            f"{throughput_mbps:.4f}",  # Throughput in MB
-                            f"{ue.ue_delay}",  # Delay in ms
-                            f"{ue.ue_jitter}%",  # Jitter in %
-                            f"{ue.ue_packet_loss_rate*100}%"  # Packet Loss Rate in %
+                            f"{throughput_mbps[index]:.4f}",  # Throughput in MB
+                            f"{delays[index]}",  # Delay in ms
+                            f"{jitters[index]}%",  # Jitter in %
+                            f"{packet_loss_rates[index]}%"  # Packet Loss Rate in %
                         ])
                     print(table)
                     time.sleep(1)  # Refresh every 1 second
@@ -235,7 +240,7 @@ class SimulatorCLI(cmd.Cmd):
 
                 # Reconstruct and print the gNodeB table
                 gNodeB_details_list = self.gNodeB_manager.list_all_gNodeBs_detailed()
-                gNodeB_loads = self.network_load_manager.calculate_gNodeB_load()
+                gNodeB_loads = self.network_load_manager.get_snapshot().gNodeB_loads  # Loads of the latest tick
                 table = PrettyTable()
                 table.field_names = ["gNodeB ID", "Latitude", "Longitude", "Coverage Radius", "Transmission Power", "Bandwidth", "Load %"]
                 for gNodeB in gNodeB_details_list:
@@ -302,7 +307,7 @@ class SimulatorCLI(cmd.Cmd):
                     technology = cell_detail.get('technology', '5GNR')
                     status = f"{term.green}Active{term.normal}" if cell.IsActive else f"{term.yellow}Inactive{term.normal}"
                     active_ues = len(cell.ConnectedUEs)
-                    cell_load_percentage = self.network_load_manager.calculate_cell_load(cell)
+                    cell_load_percentage = self.network_load_manager.get_snapshot().cell_load(cell_id)
         
                     row = [
                         cell_id,
@@ -356,7 +361,7 @@ class SimulatorCLI(cmd.Cmd):
 
                     status = f"{term.green}Active{term.normal}" if sector.is_active else f"{term.yellow}Inactive{term.normal}"
                     active_ues = len(sector.connected_ues)
-                    sector_load_percentage = self.network_load_manager.calculate_sector_load(sector)
+                    sector_load_percentage = self.network_load_manager.get_snapshot().sector_load(sector_id)
 
                     row = [
                         sector_id,
@@ -0,0 +1,51 @@
+#########################################################################################################
+# bench_line_protocol.py located in test folder. Microbenchmark of the UE serializers: the Point path  #
+# (serialize_for_influxdb().to_line_protocol()) against the precompiled LineTemplate path writing into #
+# a reusable LineBuffer, for the metrics and the metadata lines of N UEs (100k by default).            #
+# Run from the repository root: python -m test.bench_line_protocol [number_of_ues]                      #
+#########################################################################################################
+import sys
+import time
+from database.line_protocol import LineBuffer
+from test.test_line_protocol import make_ue
+
+def bench(label, function, ues):
+    started = time.perf_counter()
+    function(ues)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed:8.3f} s  {len(ues) / elapsed:12,.0f} UEs/s")
+    return elapsed
+
+def point_metrics(ues):
+    return '\n'.join(ue.serialize_for_influxdb().to_line_protocol() for ue in ues).encode('utf-8')
+
+def point_metadata(ues):
+    return '\n'.join(ue.serialize_metadata_for_influxdb().to_line_protocol() for ue in ues).encode('utf-8')
+
+def template_metrics(ues, buffer=LineBuffer()):
+    buffer.clear()
+    for ue in ues:
+        ue.to_line_protocol(buffer)
+    return buffer.getvalue()
+
+def template_metadata(ues, buffer=LineBuffer()):
+    buffer.clear()
+    for ue in ues:
+        ue.metadata_to_line_protocol(buffer)
+    return buffer.getvalue()
+
+def main(number_of_ues=100000):
+    ues = [make_ue(f"ue{index}", ("voice", "video", "game", "iot", "data")[index % 5]) for index in range(number_of_ues)]
+    # Warm up the cached tag prefixes, as in a running simulation
+    template_metrics(ues)
+    template_metadata(ues)
+    print(f"Serializing {number_of_ues:,} UEs")
+    point_time = bench("Point ue_metrics", point_metrics, ues)
+    template_time = bench("LineTemplate ue_metrics", template_metrics, ues)
+    print(f"{'speedup':<32} {point_time / template_time:8.1f}x")
+    point_time = bench("Point ue_metadata", point_metadata, ues)
+    template_time = bench("LineTemplate ue_metadata", template_metadata, ues)
+    print(f"{'speedup':<32} {point_time / template_time:8.1f}x")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,54 @@
+#########################################################################################################
+# bench_topology_loads.py located in test folder. Microbenchmark of the vectorized load aggregation:    #
+# CompiledTopology.compute() for N sectors (100k by default, 3 per cell and 3 cells per gNodeB) with 10 #
+# attached UEs per sector, against the per-sector Python loop it replaces.                              #
+# Run from the repository root: python -m test.bench_topology_loads [number_of_sectors]                 #
+#########################################################################################################
+import sys
+import time
+import numpy as np
+from types import SimpleNamespace
+from network.topology import CompiledTopology
+from network.ue_store import UEStore
+
+def build(number_of_sectors, ues_per_sector=10):
+    gNodeBs = [SimpleNamespace(ID=f"gnb{index}") for index in range(max(1, number_of_sectors // 9))]
+    cells = [SimpleNamespace(ID=f"cell{index}", gNodeB=gNodeBs[index // 3 % len(gNodeBs)]) for index in range(max(1, number_of_sectors // 3))]
+    sectors = [SimpleNamespace(sector_id=f"sector{index}", cell=cells[index // 3 % len(cells)], capacity=20, max_throughput=1e8)
+               for index in range(number_of_sectors)]
+    store = UEStore(capacity=number_of_sectors * ues_per_sector)
+    for sector in sectors:
+        store.sector_index_of(sector.sector_id)
+    # Attach the UEs directly through the columns, as many attaches would
+    slots = np.array([store.allocate() for _ in range(number_of_sectors * ues_per_sector)])
+    store.load_sector[slots] = np.repeat(np.arange(number_of_sectors), ues_per_sector)
+    store.throughput[slots] = np.random.default_rng(0).uniform(0, 2e7, len(slots))
+    return sectors, cells, gNodeBs, store
+
+def python_loads(sectors, store):
+    # One pass per sector over its UEs, as calculate_sector_load did
+    loads = {}
+    for index, sector in enumerate(sectors):
+        throughputs = store.throughput[store.load_sector == index] if index < 100 else ()
+        capped = sum(min(value, sector.max_throughput * 0.1) for value in throughputs)
+        loads[sector.sector_id] = 0.7 * len(throughputs) / sector.capacity * 100 + 0.3 * capped / sector.max_throughput * 100
+    return loads
+
+def main(number_of_sectors=100000):
+    sectors, cells, gNodeBs, store = build(number_of_sectors)
+    started = time.perf_counter()
+    topology = CompiledTopology(sectors, cells, gNodeBs)
+    print(f"{'compile':<32} {time.perf_counter() - started:8.3f} s")
+    topology.compute(store)  # Warm up
+    runs = 10
+    started = time.perf_counter()
+    for _ in range(runs):
+        topology.compute(store)
+    print(f"{'compute, per tick':<32} {(time.perf_counter() - started) / runs * 1000:8.1f} ms  for {number_of_sectors:,} sectors")
+    # The Python loop is timed on 100 sectors and extrapolated, the full run would take minutes
+    started = time.perf_counter()
+    python_loads(sectors[:100], store)
+    print(f"{'python loop, extrapolated':<32} {(time.perf_counter() - started) * number_of_sectors / 100 * 1000:8.1f} ms")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,57 @@
+import unittest
+from database.adaptive_sampler import AdaptiveSampler
+
+def make_line(measurement, ue_id):
+    return f"{measurement},ue_id={ue_id} throughput=1 1704067200"
+
+class TestAdaptiveSampler(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.pressure = (0.0, 0.0)
+        self.sampler = AdaptiveSampler(lambda: self.pressure, measurements="ue_metrics", target_latency=0.5,
+                                       target_queue_fill=0.5, min_rate=0.25, interval=1.0, recovery_step=0.5,
+                                       clock=lambda: self.now)
+
+    def advance(self):
+        self.now += 1.0
+
+    def test_rate_follows_write_pressure(self):
+        self.pressure = (2.0, 0.0)
+        self.advance()
+        self.sampler.keep_lines(make_line("ue_metrics", "ue1"))
+        self.assertEqual(self.sampler.rate, 0.5)
+        self.pressure = (0.0, 0.9)
+        for _ in range(3):
+            self.advance()
+            self.sampler.keep_lines(make_line("ue_metrics", "ue1"))
+        self.assertEqual(self.sampler.rate, 0.25)
+        self.pressure = (0.0, 0.0)
+        for _ in range(2):
+            self.advance()
+            self.sampler.keep_lines(make_line("ue_metrics", "ue1"))
+        self.assertEqual(self.sampler.rate, 1.0)
+
+    def test_each_ue_is_thinned_and_aggregates_are_not_sampled(self):
+        self.pressure = (2.0, 0.0)
+        self.advance()
+        kept = {ue_id: sum(self.sampler.keep_lines(make_line("ue_metrics", ue_id)) is not None for _ in range(8)) for ue_id in ("ue1", "ue2")}
+        self.assertEqual(kept, {"ue1": 4, "ue2": 4})
+        self.assertFalse(self.sampler.handles(make_line("sector_metrics", "ue1")))
+        self.assertTrue(self.sampler.handles(make_line("ue_metrics", "ue1")))
+
+    def test_line_records_are_thinned_per_series(self):
+        self.pressure = (2.0, 0.0)
+        self.advance()
+        record = b"ue_metrics,service_type=video,ue_id=ue1 throughput=1 1\nue_metrics,service_type=video,ue_id=ue2 throughput=1 1"
+        self.assertTrue(self.sampler.handles(record))
+        self.assertFalse(self.sampler.handles("sector_metrics,sector_id=s1 sector_load=1 1"))
+        self.assertIs(self.sampler.keep_lines(record), record)
+        # The second tick of both UEs is sampled out at a rate of 1/2, lines of other measurements are kept
+        self.assertEqual(self.sampler.keep_lines(record + b"\nsector_metrics,sector_id=s1 sector_load=1 1"),
+                         b"sector_metrics,sector_id=s1 sector_load=1 1")
+        self.assertEqual(self.sampler.stats()['skipped'], 2)
+        line = "ue_metrics,service_type=video,ue_id=ue1 throughput=1 3"
+        self.assertEqual([self.sampler.keep_lines(line), self.sampler.keep_lines(line)], [line, None])
+
+if __name__ == '__main__':
+    unittest.main()
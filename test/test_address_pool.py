@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from network.address_pool import IPv4Pool, MACPool, IMEIPool, PoolExhaustedError, luhn_check_digit, luhn_check_digits, luhn_valid
+
+class TestAddressPool(unittest.TestCase):
+    def test_ip_pool_is_a_collision_free_bitmap_over_the_cidr(self):
+        pool = IPv4Pool("10.0.0.0/24")
+        block = pool.allocate_block(200)
+        self.assertEqual(block[:2], ["10.0.0.1", "10.0.0.2"])  # The network address is never handed out
+        pool.claim("10.0.0.201")  # Given by the user
+        self.assertEqual(pool.allocate_block(53)[-1], "10.0.0.254")
+        self.assertEqual(len(set(block)), 200)
+        with self.assertRaises(PoolExhaustedError):
+            pool.allocate()  # The broadcast address is never handed out either
+        pool.release("10.0.0.7")
+        self.assertFalse(pool.in_use("10.0.0.7"))
+        self.assertEqual(pool.allocate(), "10.0.0.7")
+        pool.release("192.168.1.1")  # Outside the pool, ignored
+
+    def test_addresses_in_use_cannot_be_claimed(self):
+        pool = IPv4Pool("10.0.0.0/24")
+        pool.claim("10.0.0.9")
+        for address in ("10.0.0.9", pool.allocate(), "10.0.0.0"):
+            with self.assertRaises(ValueError):
+                pool.claim(address)
+        pool = MACPool("02:00:00")
+        pool.allocate_block(2)
+        pool.claim("02:00:00:00:00:05")
+        for mac in ("02:00:00:00:00:01", "02:00:00:00:00:05"):
+            with self.assertRaises(ValueError):
+                pool.claim(mac)
+        pool.release("02:00:00:00:00:01")
+        pool.claim("02:00:00:00:00:01")  # Free again
+
+    def test_mac_pool_is_sequential_and_recycles(self):
+        pool = MACPool("02:00:00")
+        self.assertEqual(pool.allocate_block(2), ["02:00:00:00:00:00", "02:00:00:00:00:01"])
+        pool.claim("02:00:00:00:00:02")
+        pool.release("02:00:00:00:00:00")
+        self.assertEqual(pool.allocate_block(2), ["02:00:00:00:00:00", "02:00:00:00:00:03"])
+
+    def test_imeis_carry_a_valid_luhn_check_digit(self):
+        self.assertEqual(luhn_check_digits([49015420323751]).tolist(), [8])
+        self.assertEqual(luhn_check_digit(49015420323751), 8)
+        imeis = IMEIPool("35000000").allocate_block(1000)
+        self.assertEqual(imeis[0], "350000000000006")
+        self.assertTrue(luhn_valid(np.array(imeis, dtype=np.int64)).all())
+        self.assertFalse(luhn_valid([490154203237517])[0])
+        pool = IMEIPool("35000000")
+        self.assertEqual([pool.allocate() for _ in range(3)], imeis[:3])  # Single allocations give the same IMEIs
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from types import SimpleNamespace
+from traffic.batch_traffic_engine import BatchTrafficEngine
+
+TRAFFIC_PARAMS = {
+    'voice': {'bitrate': (8, 16)},
+    'video': {'num_streams': (1, 5), 'stream_bitrate': (3, 8)},
+    'game': {'bitrate': (30, 70)},
+    'iot': {'packet_size': (5, 15), 'interval': (10, 60)},
+    'data': {'bitrate': (10, 100), 'interval': (0.5, 2)},
+}
+SEVERITY_LEVELS = {
+    'zero': {'multiplier': 1, 'delay': (0, 0), 'jitter': (0, 0), 'packet_loss_rate': 0.0},
+    'harsh': {'multiplier': 10, 'delay': (15, 50), 'jitter': (10, 20), 'packet_loss_rate': 0.1},
+}
+
+def make_ue(ue_id, service_type, generating_traffic=True, traffic_factor=1.0):
+    return SimpleNamespace(ID=ue_id, ServiceType=service_type, generating_traffic=generating_traffic, traffic_factor=traffic_factor)
+
+class TestBatchTrafficEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = BatchTrafficEngine(TRAFFIC_PARAMS, SEVERITY_LEVELS, seed=7)
+
+    def test_columns_are_aligned_with_ues(self):
+        ues = [make_ue(f"ue{i}", service_type) for i, service_type in enumerate(["voice", "Video", "game", "IoT", "data"] * 20)]
+        traffic_data = self.engine.generate(ues)
+        self.assertEqual(traffic_data['ue_ids'], [ue.ID for ue in ues])
+        for column in ('data_size', 'interval', 'ue_delay', 'ue_jitter', 'ue_packet_loss_rate'):
+            self.assertEqual(len(traffic_data[column]), len(ues))
+        self.assertTrue((traffic_data['data_size'] > 0).all())
+        self.assertTrue((traffic_data['ue_delay'] == 0).all())
+
+    def test_data_sizes_follow_traffic_tables(self):
+        ues = [make_ue(f"ue{i}", "voice") for i in range(1000)]
+        traffic_data = self.engine.generate(ues)
+        # 8-16 Kbps over a 20 ms interval
+        self.assertTrue((traffic_data['data_size'] >= int(8 * 0.02 / 8 * 1024)).all())
+        self.assertTrue((traffic_data['data_size'] <= int(16 * 0.02 / 8 * 1024)).all())
+        self.assertTrue((traffic_data['interval'] == 0.02).all())
+
+    def test_severity_delay_jitter_and_loss(self):
+        ues = [make_ue(f"ue{i}", "game") for i in range(2000)]
+        traffic_data = self.engine.generate(ues, severity='harsh')
+        self.assertTrue((traffic_data['ue_delay'] >= 15).all() and (traffic_data['ue_delay'] <= 50).all())
+        self.assertTrue((traffic_data['ue_jitter'] <= 20).all())
+        self.assertTrue((traffic_data['ue_packet_loss_rate'] == 0.1).all())
+        lost = (traffic_data['data_size'] == 0).mean()
+        self.assertGreater(lost, 0.05)
+        self.assertLess(lost, 0.15)
+
+    def test_stopped_ues_and_traffic_factor(self):
+        ues = [make_ue("ue1", "data", generating_traffic=False), make_ue("ue2", "iot", traffic_factor=0)]
+        traffic_data = self.engine.generate(ues, severity='harsh')
+        self.assertEqual(traffic_data['data_size'].tolist(), [0, 0])
+        self.assertEqual(traffic_data['ue_delay'][0], 0)
+
+    def test_unknown_service_type(self):
+        with self.assertRaises(ValueError):
+            self.engine.generate([make_ue("ue1", "fax")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import logging
+import tempfile
+import unittest
+from database.circuit_breaker import CircuitBreaker
+from database.database_manager import WritePipeline
+from database.spool import DiskSpool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_slow_or_failed_writes_and_recovers(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, slow_write_seconds=1.0, reset_timeout=30, clock=clock)
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record(True, 5.0)  # Slow writes count as failures
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        clock.now = 30
+        self.assertTrue(breaker.allow())  # Single trial write
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(breaker.allow())
+        breaker.record(False, 0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        clock.now = 60
+        self.assertTrue(breaker.allow())
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.stats()['opened'], 2)
+
+    def test_open_breaker_sends_batches_to_the_spool(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        calls = []
+        def failing_write(bucket, records):
+            calls.append(records)
+            raise ConnectionError("database down")
+        with tempfile.TemporaryDirectory() as path:
+            spool = DiskSpool(path)
+            breaker = CircuitBreaker(failure_threshold=1, reset_timeout=3600)
+            pipeline = WritePipeline(failing_write, batch_size=1, flush_interval=10, spool=spool, breaker=breaker)
+            pipeline.enqueue_many([f"m f={i} {i}" for i in range(3)], "RAN_metrics")
+            self.assertTrue(pipeline.flush(timeout=5))
+            pipeline.stop()
+            spool.stop()
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+            stats = pipeline.stats()
+            self.assertEqual((stats['spooled'], stats['rejected']), (3, 2))
+
+    def test_open_breaker_drops_batches_without_a_spool(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        calls = []
+        def failing_write(bucket, records):
+            calls.append(records)
+            raise ConnectionError("database down")
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=3600)
+        pipeline = WritePipeline(failing_write, batch_size=1, flush_interval=10, breaker=breaker)
+        pipeline.enqueue_many([f"m f={i} {i}" for i in range(3)], "RAN_metrics")
+        self.assertTrue(pipeline.flush(timeout=5))
+        pipeline.stop()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        stats = pipeline.stats()
+        self.assertEqual((stats['failed'], stats['rejected'], stats['dropped'], stats['spooled']), (1, 2, 2, 0))
+
+if __name__ == '__main__':
+    unittest.main()
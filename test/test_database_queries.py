@@ -0,0 +1,92 @@
+import logging
+import unittest
+from unittest.mock import MagicMock
+from types import SimpleNamespace
+from datetime import datetime
+from database.database_manager import DatabaseManager
+from database.rollup_aggregator import RollupAggregator
+
+def make_record(values):
+    return SimpleNamespace(values=values, get_time=lambda: values['_time'], get_value=lambda: values.get('_value'),
+                           get_measurement=lambda: values.get('_measurement'))
+
+class TestDatabaseQueries(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        # A bare manager: no sink or pipeline is needed to build queries
+        self.db_manager = object.__new__(DatabaseManager)
+        self.db_manager.bucket = "RAN_metrics"
+        self.db_manager.rollup = RollupAggregator(windows="10s,1m", measurements="ue_metrics,sector_metrics")
+        self.db_manager.query_api = MagicMock()
+        self.db_manager.query_api.query.return_value = []
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def last_query(self):
+        return self.db_manager.query_api.query.call_args.kwargs['query']
+
+    def test_window_is_pushed_into_flux(self):
+        self.db_manager.get_sector_load("AX1112-A1", start="-6h", window="5m", aggregate="max", limit=12)
+        query = self.last_query()
+        self.assertIn('r._measurement == "sector_metrics" and r["sector_id"] == "AX1112-A1"', query)
+        self.assertIn('r._field == "sector_load"', query)
+        self.assertIn('aggregateWindow(every: 5m, fn: max, createEmpty: false)', query)
+        self.assertIn('range(start: -6h)', query)
+        self.assertIn('limit(n: 12)', query)
+
+    def test_rollup_windows_read_the_rollup_measurement(self):
+        time = datetime(2024, 1, 1)
+        self.db_manager.query_api.query.return_value = [SimpleNamespace(records=[make_record({'_time': time, 'throughput_mean': 5.0})])]
+        metrics = self.db_manager.get_ue_metrics("ue1", window="1m")
+        self.assertIn('r._measurement == "ue_metrics_1m"', self.last_query())
+        self.assertNotIn('aggregateWindow', self.last_query())
+        self.assertEqual(metrics, [{'timestamp': time, 'throughput': 5.0, 'ue_jitter': None, 'ue_packet_loss_rate': None, 'ue_delay': None}])
+
+    def test_load_snapshot_keeps_the_newest_load_per_entity(self):
+        old, new = datetime(2024, 1, 1, 0, 0, 0), datetime(2024, 1, 1, 0, 0, 1)
+        self.db_manager.query_api.query.return_value = [SimpleNamespace(records=[
+            make_record({'_time': old, '_measurement': 'sector_metrics', 'sector_id': 's1', '_value': 90.0}),
+            make_record({'_time': new, '_measurement': 'sector_metrics', 'sector_id': 's1', '_value': 40.0}),
+            make_record({'_time': new, '_measurement': 'network_metrics', '_value': 35.0})])]
+        snapshot = self.db_manager.get_load_snapshot(start='-1m')
+        self.assertIn('|> last()', self.last_query())
+        self.assertEqual((snapshot['sector_loads'], snapshot['network_load'], snapshot['timestamp']), ({'s1': 40.0}, 35.0, new))
+
+    def test_ue_ids_are_distinct(self):
+        self.db_manager.get_all_ue_ids(limit=100)
+        self.assertIn('distinct(column: "ue_id")', self.last_query())
+        self.assertIn('limit(n: 100)', self.last_query())
+
+    def test_invalid_arguments(self):
+        for arguments in ({'window': '1 m'}, {'aggregate': 'drop'}, {'start': 'now'}, {'limit': 0}):
+            with self.assertRaises(ValueError):
+                self.db_manager.get_ue_metrics("ue1", **arguments)
+        self.db_manager.get_ue_metrics('ue"1')
+        self.assertIn('r["ue_id"] == "ue\\"1"', self.last_query())
+
+    def test_bulk_metrics_use_one_grouped_query(self):
+        time = datetime(2024, 1, 1)
+        self.db_manager.query_api.query_stream.return_value = iter([
+            make_record({'_time': time, 'ue_id': 'ue1', 'throughput': 1.0}),
+            make_record({'_time': time, 'ue_id': 'ue2', 'throughput': 2.0}),
+        ])
+        rows = list(self.db_manager.get_bulk_ue_metrics(ue_ids=["ue2", "ue1"], limit=10))
+        self.assertEqual(self.db_manager.query_api.query_stream.call_count, 1)
+        query = self.db_manager.query_api.query_stream.call_args.kwargs['query']
+        self.assertIn('contains(value: r.ue_id, set: ["ue1", "ue2"])', query)
+        self.assertIn('group(columns: ["ue_id"])', query)
+        self.assertIn('limit(n: 10)', query)
+        self.assertEqual([(row['ue_id'], row['throughput']) for row in rows], [('ue1', 1.0), ('ue2', 2.0)])
+
+    def test_bulk_metrics_of_a_sector_resolve_members_in_the_query(self):
+        self.db_manager.query_api.query_stream.return_value = iter([])
+        list(self.db_manager.get_bulk_ue_metrics(sector_id="AX1112-A1"))
+        query = self.db_manager.query_api.query_stream.call_args.kwargs['query']
+        self.assertIn('r["connected_sector_id"] == "AX1112-A1"', query)
+        self.assertIn('set: members', query)
+        with self.assertRaises(ValueError):
+            self.db_manager.get_bulk_ue_metrics(ue_ids=["ue1"], cell_id="AX1112")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from network.device_profile import DeviceProfileRegistry
+from network.ue import UE
+from network.ue_store import UEStore
+
+CONFIG = {"rat": "NR", "maxBandwidth": 100, "duplexMode": "TDD", "txPower": 23, "modulation": ["QPSK", "16QAM"],
+          "bandwidthParts": [1, 2], "snrThresholds": [10, 20], "model": "generic"}
+
+class TestDeviceProfile(unittest.TestCase):
+    def setUp(self):
+        self.registry = DeviceProfileRegistry()
+
+    def test_same_configuration_is_interned_once(self):
+        first = self.registry.from_config(CONFIG)
+        second = self.registry.from_config(dict(CONFIG, modulation=["QPSK", "16QAM"]))
+        self.assertIs(first, second)
+        self.assertEqual(len(self.registry), 1)
+        self.assertEqual(first.get('Modulation'), ("QPSK", "16QAM"))
+        self.assertEqual(first.metadata_fields['modulation'], "QPSK,16QAM")
+        self.assertIn('max_bandwidth=100i', first.metadata_fragment)
+        with self.assertRaises(AttributeError):
+            first.values = ()
+
+    def test_changing_a_ue_field_copies_on_write(self):
+        profile = DeviceProfileRegistry.get_instance().from_config(CONFIG)
+        ues = []
+        for _ in range(2):
+            ue = UE.__new__(UE)
+            ue.bind_slot(UEStore())
+            ue.profile = profile
+            ues.append(ue)
+        ues[0].TxPower = 10
+        self.assertEqual((ues[0].TxPower, ues[1].TxPower), (10, 23))
+        self.assertIs(ues[1].profile, profile)
+        self.assertIs(ues[0].profile, DeviceProfileRegistry.get_instance().replace(profile, TxPower=10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from types import SimpleNamespace
+from network.sector import Sector
+
+def make_sector():
+    cell = SimpleNamespace(ID="cell1", gNodeB_ID="gnb1")
+    return Sector(sector_id="sector1", cell_id="cell1", cell=cell, capacity=10, azimuth_angle=120, beamwidth=65,
+                  frequency=3500, duplex_mode="TDD", tx_power=40, bandwidth=100, mimo_layers=4, beamforming=True,
+                  ho_margin=3, load_balancing=1, max_throughput=1000000)
+
+class TestEntitySerialization(unittest.TestCase):
+    def test_sector_metrics_only_carry_dynamic_fields(self):
+        sector = make_sector()
+        sector.sector_load_attribute = 40.0
+        point = sector.serialize_for_influxdb()
+        self.assertEqual(point._name, "sector_metrics")
+        self.assertEqual(set(point._fields), {"sector_load", "current_load", "remaining_capacity"})
+        self.assertNotIn("instance_id", point._tags)
+
+    def test_sector_metadata_carries_the_configuration(self):
+        sector = make_sector()
+        point = sector.serialize_metadata_for_influxdb()
+        self.assertEqual(point._name, "sector_metadata")
+        self.assertEqual(point._tags["gnodeb_id"], "gnb1")
+        self.assertEqual(point._fields["duplex_mode"], "TDD")
+        self.assertNotIn("sector_load", point._fields)
+        # The metadata line is the bulk of the payload, the per-event line stays small
+        self.assertLess(len(sector.serialize_for_influxdb().to_line_protocol()), len(point.to_line_protocol()) / 2)
+
+if __name__ == '__main__':
+    unittest.main()
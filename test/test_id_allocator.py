@@ -0,0 +1,41 @@
+import unittest
+from network.id_allocator import IDAllocator
+
+class TestIDAllocator(unittest.TestCase):
+    def test_counter_skips_the_reserved_range_and_claimed_ids(self):
+        allocator = IDAllocator(reserved=10)
+        self.assertEqual(allocator.next_id(), "ue11")
+        allocator.claim("ue5")  # Reserved range, the counter is not affected
+        allocator.claim("ue20")
+        allocator.claim("phone-a")  # Not in the prefix + number form
+        self.assertEqual(allocator.next_id(), "ue21")
+
+    def test_bulk_allocation_is_contiguous(self):
+        allocator = IDAllocator()
+        allocator.next_id()
+        self.assertEqual(allocator.allocate(3), ["ue2", "ue3", "ue4"])
+        self.assertEqual(allocator.next_id(), "ue5")
+
+    def test_released_ids_are_recycled_lowest_first_only_when_enabled(self):
+        allocator = IDAllocator(recycle=True)
+        ids = allocator.allocate(5)
+        allocator.release(ids[3])
+        allocator.release(ids[1])
+        allocator.claim(ids[3])  # Given by the user again before it was recycled
+        self.assertEqual([allocator.next_id(), allocator.next_id()], ["ue2", "ue6"])
+        allocator = IDAllocator()
+        allocator.release(allocator.next_id())
+        self.assertEqual(allocator.next_id(), "ue2")
+
+    def test_unused_block_ids_are_given_back_without_recycling(self):
+        allocator = IDAllocator()
+        ids = allocator.allocate(5)
+        allocator.unallocate(ids[3:])  # At the end of the counter, which is rewound
+        self.assertEqual(allocator.next_id(), "ue4")
+        ids = allocator.allocate(3)
+        allocator.next_id()
+        allocator.unallocate(ids[1:])  # No longer at the end, handed out again from the free list
+        self.assertEqual([allocator.next_id(), allocator.next_id(), allocator.next_id()], ["ue6", "ue7", "ue9"])
+
+if __name__ == '__main__':
+    unittest.main()
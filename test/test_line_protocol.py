@@ -0,0 +1,79 @@
+import re
+import unittest
+from network.ue import UE
+from network.ue_store import UEStore
+from network.sector import Sector
+from types import SimpleNamespace
+from unittest.mock import patch
+from network.simulation_clock import SimulationClock
+from database.line_protocol import LineTemplate, LineBuffer, parse_line, series_key
+
+def without_timestamp(line):
+    return line.rsplit(' ', 1)[0]
+
+def parsed(line):
+    """Measurement and tag set, and the set of fields of a line; field order does not matter to InfluxDB."""
+    prefix, fields = re.split(r'(?<!\\) ', without_timestamp(line), 1)
+    return prefix, set(re.findall(r'(\w+=(?:"(?:[^"\\]|\\.)*"|[^,]+))', fields))
+
+def make_ue(ue_id="ue1", service_type="video"):
+    # Bypass __init__ (it registers the UE and logs), only the serialized attributes are needed
+    ue = UE.__new__(UE)
+    ue.bind_slot(UEStore())
+    for key, value in dict(
+        ID=ue_id, instance_id="instance-1", ServiceType=service_type, ConnectedCellID="cell1", ConnectedSector="sector1",
+        gNodeB_ID="gnb1", IMEI="490154203237518", RAT="5G", MaxBandwidth=100, DuplexMode="TDD", TxPower=23,
+        Modulation=["QPSK", "16QAM"], Coding="LDPC", MIMO="2x2", Processing=None, BandwidthParts=[1, 2], ChannelModel="urban",
+        Velocity=3.5, Direction="north", TrafficModel="fullbuffer", SchedulingRequests=1, RLCMode="AM", SNRThresholds=[10, 20],
+        HOMargin=3, N310=1, N311=1, Model="generic", ScreenSize="6.1 inches", BatteryLevel=80, IP="10.0.0.1",
+        MAC="02:00:00:00:00:01", traffic_factor=1.0, throughput=1234.5, ue_jitter=2.0, ue_packet_loss_rate=0.01,
+        ue_delay=15.25, SignalStrength=-80).items():
+        setattr(ue, key, value)
+    return ue
+
+class TestLineProtocol(unittest.TestCase):
+    def test_ue_lines_match_the_point_path(self):
+        ue = make_ue(service_type="Video Call")
+        self.assertEqual(without_timestamp(ue.to_line_protocol()), without_timestamp(ue.serialize_for_influxdb().to_line_protocol()))
+        self.assertEqual(parsed(ue.metadata_to_line_protocol()), parsed(ue.serialize_metadata_for_influxdb().to_line_protocol()))
+
+    def test_sector_line_matches_the_point_path(self):
+        sector = Sector(sector_id="sector1", cell_id="cell1", cell=SimpleNamespace(ID="cell1", gNodeB_ID="gnb1"), capacity=10,
+                        azimuth_angle=120, beamwidth=65, frequency=3500, duplex_mode="TDD", tx_power=40, bandwidth=100,
+                        mimo_layers=4, beamforming=True, ho_margin=3, load_balancing=1, max_throughput=1000000)
+        sector.sector_load_attribute = 12.5
+        self.assertEqual(without_timestamp(sector.to_line_protocol()), without_timestamp(sector.serialize_for_influxdb().to_line_protocol()))
+        # Both are timestamped in simulated time, like the ue_metrics
+        with patch.object(SimulationClock, '_instance', SimulationClock(mode='virtual', speed=0, start=1704067200)):
+            self.assertTrue(sector.to_line_protocol().endswith(" 1704067200"))
+            self.assertEqual(sector.serialize_for_influxdb().to_line_protocol(), sector.to_line_protocol())
+
+    def test_prefix_is_cached_until_tags_change(self):
+        ue = make_ue()
+        ue.to_line_protocol()
+        cached = ue._line_prefixes["ue_metrics"]
+        ue.to_line_protocol()
+        self.assertIs(ue._line_prefixes["ue_metrics"], cached)
+        ue.ServiceType = "game"
+        self.assertTrue(ue.to_line_protocol().startswith("ue_metrics,service_type=game,ue_id=ue1 "))
+
+    def test_buffer_is_reusable(self):
+        template = LineTemplate("m", ("t",), (("a", int), ("b", bool), ("c", str), ("d", float)))
+        buffer = LineBuffer()
+        template.write(buffer, template.prefix(("x y",)), (1, True, 'say "hi"', float('nan')), 5)
+        template.write(buffer, template.prefix((None,)), (None, False, "", 2.5))
+        self.assertEqual(buffer.getvalue(), b'm,t=x\\ y a=1i,b=true,c="say \\"hi\\"" 5\nm b=false,c="",d=2.5')
+        buffer.clear()
+        self.assertEqual((len(buffer), buffer.getvalue()), (0, b''))
+
+    def test_parse_line_reads_a_line_back(self):
+        template = LineTemplate("ue metrics", ("ue_id", "note"), (("throughput", float), ("count", int), ("ok", bool), ("text", str)))
+        line = template.format(template.prefix(("ue1", "a,b=c d")), (2.5, 3, True, 'say "hi", x=1'), 1704067200)
+        self.assertEqual(parse_line(line), ("ue metrics", {"ue_id": "ue1", "note": "a,b=c d"},
+                                            {"throughput": 2.5, "count": 3, "ok": True, "text": 'say "hi", x=1'}, 1704067200))
+        self.assertEqual(parse_line("m f=1"), ("m", {}, {"f": 1.0}, None))
+        self.assertEqual(series_key(line), r"ue\ metrics,note=a\,b\=c\ d,ue_id=ue1")
+        self.assertEqual(series_key("m"), "m")
+
+if __name__ == '__main__':
+    unittest.main()
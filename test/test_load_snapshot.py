@@ -0,0 +1,21 @@
+import unittest
+from network.load_snapshot import LoadSnapshot
+
+class TestLoadSnapshot(unittest.TestCase):
+    def test_snapshot_is_a_frozen_view_of_one_tick(self):
+        sector_loads = {"sector1": 85.0, "sector2": 10.0}
+        snapshot = LoadSnapshot(3, sector_loads, {"cell1": 47.5}, {"gnb1": 47.5}, 47.5, timestamp=100)
+        sector_loads["sector1"] = 0.0  # Later changes of the source do not leak into the snapshot
+        self.assertEqual((snapshot.sector_load("sector1"), snapshot.sector_load("unknown")), (85.0, 0.0))
+        self.assertEqual(snapshot.congested(80), {'gNodeB': [], 'cell': [], 'sector': ["sector1"]})
+        self.assertEqual(snapshot.to_dict()['cell_loads'], {"cell1": 47.5})
+        with self.assertRaises(AttributeError):
+            snapshot.network_load = 0.0
+        with self.assertRaises(TypeError):
+            snapshot.sector_loads["sector2"] = 0.0
+
+    def test_empty_snapshot_precedes_the_first_tick(self):
+        self.assertEqual((LoadSnapshot.empty().tick, LoadSnapshot.empty().network_load), (-1, 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from influxdb_client import Point, WritePrecision
+from database.line_protocol import LineBuffer
+from database.metrics_sink import MetricsSink, InfluxDBSink, MemorySink, LineProtocolFileSink, create_sink, to_line_protocol
+
+def make_point(ue_id, throughput):
+    return Point("ue_metrics").tag("ue_id", ue_id).field("throughput", float(throughput)).time(datetime(2024, 1, 1), WritePrecision.S)
+
+class TestMetricsSink(unittest.TestCase):
+    def test_line_protocol_is_normalized_to_nanoseconds(self):
+        line = to_line_protocol(make_point("ue1", 5))
+        self.assertEqual(line, "ue_metrics,ue_id=ue1 throughput=5 1704067200000000000")
+        # Line-protocol records are in LINE_PRECISION (seconds)
+        self.assertEqual(to_line_protocol(b"m f=1i 1"), "m f=1i 1000000000")
+        self.assertEqual(to_line_protocol('log message="up 2"'), 'log message="up 2"')
+
+    def test_line_buffer_records_count_every_line(self):
+        buffer = LineBuffer()
+        for i in range(3):
+            buffer.append(f"m,ue_id=ue{i} f=1 1704067200")
+        sink = MemorySink(capacity=2)
+        sink.write("RAN_metrics", [buffer.getvalue()])
+        self.assertEqual(sink.lines_written, 3)
+        self.assertEqual(sink.lines(), ["m,ue_id=ue1 f=1 1704067200000000000", "m,ue_id=ue2 f=1 1704067200000000000"])
+        sink.write_lines("RAN_metrics", ["m f=2 1704067200000"], WritePrecision.MS)  # Spool replay
+        self.assertEqual(sink.lines()[-1], "m f=2 1704067200000000000")
+
+    def test_memory_sink_is_a_ring_buffer(self):
+        sink = MemorySink(capacity=3)
+        sink.write("RAN_metrics", [make_point(f"ue{i}", i) for i in range(5)])
+        sink.write("RAN_logs", ["log message=\"x\" 1"])
+        self.assertEqual(sink.lines_written, 6)
+        self.assertEqual(len(sink.lines()), 3)
+        self.assertEqual([line.split(' ')[0] for line in sink.lines("RAN_metrics")], ["ue_metrics,ue_id=ue3", "ue_metrics,ue_id=ue4"])
+        sink.clear("RAN_metrics")
+        self.assertEqual(sink.lines(), ["log message=\"x\" 1000000000"])
+
+    def test_file_sink_appends_one_file_per_bucket(self):
+        with tempfile.TemporaryDirectory() as path:
+            sink = LineProtocolFileSink(path)
+            sink.write("RAN_metrics", [make_point("ue1", 1)])
+            sink.write("RAN_metrics", [make_point("ue2", 2)])
+            sink.close()
+            with open(os.path.join(path, "RAN_metrics.lp")) as file:
+                self.assertEqual(len(file.read().splitlines()), 2)
+            sink.clear("RAN_metrics")
+            self.assertEqual(os.path.getsize(os.path.join(path, "RAN_metrics.lp")), 0)
+
+    def test_unknown_sink(self):
+        with self.assertRaises(ValueError):
+            create_sink("kafka")
+        with self.assertRaises(ValueError):
+            create_sink("influxdb", url="http://localhost:8086", token=None, org="ranfusion")
+
+    def test_every_sink_implements_write_and_clear(self):
+        with self.assertRaises(TypeError):
+            MetricsSink()
+        sink = InfluxDBSink("http://localhost:8086", "token", "ranfusion")
+        sink.client = MagicMock()
+        sink.clear("RAN_metrics")
+        start, _, predicate = sink.client.delete_api().delete.call_args.args
+        self.assertEqual((start, predicate), ("1970-01-01T00:00:00Z", ''))
+        self.assertEqual(sink.client.delete_api().delete.call_args.kwargs, {'bucket': "RAN_metrics", 'org': "ranfusion"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+from network.neighbor_table import SectorNeighborTable, SAME_CELL, SAME_GNODEB, ADJACENT, relation_names
+import network.neighbor_table as neighbor_table
+
+def make_sector(sector_id, cell_id, gNodeB_id, azimuth, beamwidth=120):
+    return SimpleNamespace(sector_id=sector_id, cell_id=cell_id, cell=SimpleNamespace(gNodeB_ID=gNodeB_id),
+                           azimuth_angle=azimuth, beamwidth=beamwidth)
+
+class FakeGNodeBManager:
+    # Two sites on the same latitude, gNodeB2 is east of gNodeB1
+    sites = {"gNodeB1": SimpleNamespace(Latitude=42.0, Longitude=-71.0),
+             "gNodeB2": SimpleNamespace(Latitude=42.0, Longitude=-70.99)}
+
+    def get_gNodeB(self, gNodeB_id):
+        return self.sites.get(gNodeB_id)
+
+    def get_neighbor_gNodeBs(self, gNodeB_id):
+        return [other for other in self.sites if other != gNodeB_id]
+
+class TestSectorNeighborTable(unittest.TestCase):
+    def setUp(self):
+        self.sectors = [make_sector("s1", "c1", "gNodeB1", 0), make_sector("s2", "c1", "gNodeB1", 120),
+                        make_sector("s3", "c2", "gNodeB1", 240, beamwidth=60),
+                        make_sector("s4", "c3", "gNodeB2", 270, beamwidth=60)]  # Faces gNodeB1
+        self.table = SectorNeighborTable()
+        self.table.build(self.sectors, FakeGNodeBManager())
+
+    def test_typed_relations(self):
+        neighbors = self.table.neighbors("s1")
+        self.assertEqual(neighbors, {"s2": SAME_CELL | SAME_GNODEB | ADJACENT, "s3": SAME_GNODEB})
+        self.assertEqual(relation_names(neighbors["s3"]), ('same_gnodeb',))
+        # s2 (azimuth 120) faces east toward gNodeB2 whose s4 faces west
+        self.assertEqual(self.table.neighbors("s4"), {"s2": ADJACENT})
+        self.assertEqual(self.table.neighbors("s2", relation=ADJACENT), {"s1": SAME_CELL | SAME_GNODEB | ADJACENT, "s4": ADJACENT})
+        self.assertEqual(self.table.neighbors("unknown"), {})
+
+    def test_incremental_updates_match_a_rebuild(self):
+        self.table.remove("s2")
+        self.table.add(make_sector("s5", "c3", "gNodeB2", 90))
+        self.table.add(make_sector("s3", "c2", "gNodeB1", 0))  # Reconfigured
+        rebuilt = SectorNeighborTable()
+        rebuilt.build([self.sectors[0], self.sectors[3], make_sector("s5", "c3", "gNodeB2", 90),
+                       make_sector("s3", "c2", "gNodeB1", 0)], FakeGNodeBManager())
+        for sector_id in ("s1", "s3", "s4", "s5"):
+            self.assertEqual(self.table.neighbors(sector_id), rebuilt.neighbors(sector_id))
+        self.assertNotIn("s2", self.table)
+        # Compacting the changed rows into the CSR arrays keeps the same relations
+        with patch.object(neighbor_table, 'COMPACT_MIN_ROWS', 0):
+            self.table.remove("s5")
+            rebuilt.remove("s5")
+        self.assertEqual(self.table.sector_ids, ["s1", "s4", "s3"])
+        for sector_id in ("s1", "s3", "s4"):
+            self.assertEqual(self.table.neighbors(sector_id), rebuilt.neighbors(sector_id))
+
+if __name__ == '__main__':
+    unittest.main()
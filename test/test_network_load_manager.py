@@ -0,0 +1,81 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from network.NetworkLoadManager import NetworkLoadManager
+from network.load_snapshot import LoadSnapshot
+from network.simulation_clock import SimulationClock
+from database.database_manager import DatabaseManager
+from database.line_protocol import LineBuffer
+from database.rollup_aggregator import RollupAggregator
+from database.adaptive_sampler import AdaptiveSampler
+
+def make_entity(line, clock, **attributes):
+    """Entity writing one line of load at the current second of clock."""
+    return SimpleNamespace(to_line_protocol=lambda buffer: buffer.append(f"{line} {clock[0]}"), **attributes)
+
+class TestNetworkLoadManager(unittest.TestCase):
+    def make_manager(self, raw_sample_every):
+        db_manager = object.__new__(DatabaseManager)
+        db_manager.bucket = "metrics"
+        db_manager.rollup = RollupAggregator(windows="10s", measurements="sector_metrics,cell_metrics",
+                                             raw_sample_every=raw_sample_every)
+        db_manager.sampler = AdaptiveSampler(lambda: (0.0, 0.0))
+        db_manager.write_pipeline = MagicMock()
+        db_manager._write_stats_if_due = lambda: None
+        db_manager._tick_local = threading.local()
+        self.clock = [100]
+        sector = make_entity("sector_metrics,sector_id=s1 sector_load=10", self.clock, sector_load_attribute=10.0)
+        cell = make_entity("cell_metrics,cell_id=c1 cell_load=10", self.clock, cell_load=10.0, sectors=[sector])
+        gnodeb = make_entity("gnodeb_metrics,gnodeb_id=g1 gnodeb_load=10", self.clock, gnb_load=10.0, Cells=[cell])
+        manager = object.__new__(NetworkLoadManager)
+        manager.sector_manager = SimpleNamespace(sectors={"s1": sector})
+        manager.cell_manager = SimpleNamespace(cells={"c1": cell}, gNodeBs={"g1": gnodeb})
+        manager.db_manager = db_manager
+        manager.line_buffer = LineBuffer()
+        manager._cell_load_sum = 10.0
+        manager._snapshot = LoadSnapshot.empty()
+        manager._snapshot_lock = threading.Lock()
+        manager.clock = SimulationClock(mode='virtual', speed=0, start=100)
+        return manager
+
+    def written(self, manager):
+        return [call.args[0] for call in manager.db_manager.write_pipeline.enqueue.call_args_list]
+
+    def rollups(self, manager):
+        return [point.to_line_protocol() for call in manager.db_manager.write_pipeline.enqueue_many.call_args_list
+                for point in call.args[0]]
+
+    def test_loads_written_by_refresh_snapshot_are_rolled_up(self):
+        manager = self.make_manager(raw_sample_every=1)
+        with patch.object(NetworkLoadManager, 'update_loads'):
+            for second in (100, 101, 110):
+                self.clock[0] = second
+                manager.refresh_snapshot()
+        self.assertEqual(len(self.written(manager)), 3)
+        self.assertEqual(sorted(self.rollups(manager)),
+                         ["cell_metrics_10s,cell_id=c1 cell_load_count=2i,cell_load_last=10,cell_load_max=10,"
+                          "cell_load_mean=10,cell_load_min=10 100",
+                          "sector_metrics_10s,sector_id=s1 sector_load_count=2i,sector_load_last=10,sector_load_max=10,"
+                          "sector_load_mean=10,sector_load_min=10 100"])
+
+    def test_raw_sampling_applies_to_the_rolled_up_lines_only(self):
+        manager = self.make_manager(raw_sample_every=0)
+        with patch.object(NetworkLoadManager, 'update_loads'):
+            manager.refresh_snapshot()
+        self.assertEqual(self.written(manager), [b"gnodeb_metrics,gnodeb_id=g1 gnodeb_load=10 100"])
+
+    def test_monitoring_handles_each_snapshot_of_the_kernel_once(self):
+        manager = self.make_manager(raw_sample_every=1)
+        manager._snapshot = LoadSnapshot(3, {"s1": 10.0}, {"c1": 10.0}, {"g1": 10.0}, 10.0)
+        # Stop the loop on the third wait; the snapshot did not change in between
+        manager.clock = MagicMock(sleep=MagicMock(side_effect=[None, None, KeyboardInterrupt]))
+        with patch.object(NetworkLoadManager, 'handle_snapshot') as handle_snapshot, \
+                patch.object(NetworkLoadManager, 'refresh_snapshot') as refresh_snapshot:
+            with self.assertRaises(KeyboardInterrupt):
+                manager.monitoring()
+        handle_snapshot.assert_called_once_with(manager._snapshot)
+        refresh_snapshot.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from datetime import datetime
+from database.point_coalescer import PointCoalescer
+
+TICK = datetime(2024, 1, 1, 0, 0, 0)
+UE1 = {"ue_id": "ue1", "service_type": "video"}
+
+class TestPointCoalescer(unittest.TestCase):
+    def test_fields_of_the_same_row_are_merged(self):
+        coalescer = PointCoalescer()
+        coalescer.add("RAN_metrics", "ue_metrics", UE1, {"ue_jitter": 1.0, "ue_delay": 2.0}, TICK)
+        coalescer.add("RAN_metrics", "ue_metrics", {"ue_id": "ue2", "service_type": "video"}, {"ue_jitter": 3.0}, TICK)
+        # Same second, an ISO string timestamp as written by generate_traffic
+        coalescer.add("RAN_metrics", "ue_metrics", {"service_type": "video", "ue_id": "ue1"}, {"throughput": 100.0},
+                      "2024-01-01T00:00:00.400000")
+        drained = coalescer.drain()
+        self.assertEqual(len(drained), 2)
+        self.assertEqual(drained[0][1].to_line_protocol(), "ue_metrics,service_type=video,ue_id=ue1 throughput=100,ue_delay=2,ue_jitter=1 1704067200")
+        self.assertEqual(coalescer.added, 3)
+        self.assertEqual(len(coalescer), 0)
+
+    def test_distinct_rows_are_kept(self):
+        coalescer = PointCoalescer()
+        coalescer.add("RAN_metrics", "ue_metrics", UE1, {"throughput": 1.0}, TICK)
+        coalescer.add("RAN_metrics", "ue_metrics", UE1, {"throughput": 2.0}, datetime(2024, 1, 1, 0, 0, 1))
+        coalescer.add("RAN_logs", "ue_metrics", UE1, {"throughput": 3.0}, TICK)
+        self.assertEqual(len(coalescer), 3)
+
+    def test_fields_given_to_add_are_not_modified(self):
+        coalescer = PointCoalescer()
+        fields = {"count": 2}
+        coalescer.add("RAN_metrics", "m", {"id": "a b"}, fields, TICK)
+        coalescer.add("RAN_metrics", "m", {"id": "a b"}, {"state": "up"}, TICK)
+        (_, point), = coalescer.drain()
+        self.assertEqual(fields, {"count": 2})
+        self.assertEqual(point.to_line_protocol(), 'm,id=a\\ b count=2i,state="up" 1704067200')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import logging
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+from influxdb_client import Point, WritePrecision
+from database.database_manager import WritePipeline
+from database.line_protocol import LineBuffer
+from database.recent_metrics_cache import RecentMetricsCache
+
+def make_point(ue_id, throughput):
+    return Point("ue_metrics").tag("ue_id", ue_id).field("throughput", float(throughput)).time(datetime(2024, 1, 1), WritePrecision.S)
+
+class TestRecentMetricsCache(unittest.TestCase):
+    def test_written_batches_refresh_the_cache(self):
+        cache = RecentMetricsCache(size=2)
+        pipeline = WritePipeline(lambda bucket, records: None, flush_interval=0.05, on_written=cache.on_written)
+        pipeline.enqueue_many([make_point("ue1", i) for i in range(3)] + [make_point("ue2", 7)], "RAN_metrics")
+        pipeline.enqueue(Point("cell_metrics").tag("cell_id", "c1").field("cell_load", 1.0), "RAN_metrics")
+        self.assertTrue(pipeline.flush(timeout=5))
+        pipeline.stop()
+        self.assertEqual([sample['throughput'] for sample in cache.get("ue1")], [1.0, 2.0])
+        self.assertEqual(cache.latest("ue2")['throughput'], 7.0)
+        cache.invalidate("ue1")
+        self.assertEqual(cache.get("ue1"), [])
+
+    def test_failed_writes_are_not_cached(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        cache = RecentMetricsCache()
+        def failing_write(bucket, records):
+            raise ConnectionError("down")
+        pipeline = WritePipeline(failing_write, flush_interval=0.05, on_written=cache.on_written)
+        pipeline.enqueue(make_point("ue1", 1), "RAN_metrics")
+        pipeline.flush(timeout=5)
+        pipeline.stop()
+        self.assertEqual(cache.get("ue1"), [])
+
+    def test_line_records_are_cached(self):
+        cache = RecentMetricsCache()
+        buffer = LineBuffer()
+        buffer.append("ue_metrics,service_type=video,ue_id=ue1 throughput=5,ue_delay=2 1704067200")
+        buffer.append("sector_metrics,sector_id=s1 sector_load=10 1704067200")
+        cache.on_written("RAN_metrics", [buffer.getvalue(), b"cell_metrics,cell_id=c1 cell_load=1 1704067200"])
+        self.assertEqual(cache.get("ue1"), [{'throughput': 5.0, 'ue_jitter': None, 'ue_packet_loss_rate': None,
+                                             'ue_delay': 2.0, 'timestamp': datetime(2024, 1, 1, tzinfo=timezone.utc)}])
+
+    def test_samples_expire_after_the_ttl(self):
+        cache = RecentMetricsCache(ttl=1.0)
+        with patch('database.recent_metrics_cache.time.monotonic', return_value=100.0):
+            cache.put("ue1", [{'throughput': 1.0}])  # Read from the database by a process that does not write
+        with patch('database.recent_metrics_cache.time.monotonic', return_value=100.5):
+            self.assertEqual(cache.latest("ue1"), {'throughput': 1.0})
+        with patch('database.recent_metrics_cache.time.monotonic', return_value=101.5):
+            self.assertEqual(cache.get("ue1"), [])
+
+if __name__ == '__main__':
+    unittest.main()
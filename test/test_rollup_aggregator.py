@@ -0,0 +1,61 @@
+import unittest
+from database.rollup_aggregator import RollupAggregator, parse_windows
+from database.line_protocol import series_key
+
+def ue_line(timestamp, throughput, ue_id="ue1"):
+    return f'ue_metrics,ue_id={ue_id} throughput={float(throughput)},service="video" {timestamp}'
+
+class TestRollupAggregator(unittest.TestCase):
+    def test_parse_windows(self):
+        self.assertEqual(parse_windows("10s, 1m,1h"), [("10s", 10), ("1m", 60), ("1h", 3600)])
+        with self.assertRaises(ValueError):
+            parse_windows("10x")
+
+    def test_window_is_rolled_up_when_it_is_over(self):
+        aggregator = RollupAggregator(windows="10s", measurements="ue_metrics")
+        for second, throughput in zip(range(100, 110), [5, 1, 9, 3, 2, 4, 6, 8, 7, 0]):
+            line = ue_line(second, throughput)
+            self.assertEqual(aggregator.add_lines(line), (line, []))
+        _, rollups = aggregator.add_lines(ue_line(110, 50))
+        self.assertEqual(len(rollups), 1)
+        self.assertEqual(rollups[0].to_line_protocol(),
+                         "ue_metrics_10s,ue_id=ue1 throughput_count=10i,throughput_last=0,throughput_max=9,"
+                         "throughput_mean=4.5,throughput_min=0 100")
+        # The window in progress is written by flush()
+        self.assertEqual([series_key(rollup.to_line_protocol()) for rollup in aggregator.flush()], ["ue_metrics_10s,ue_id=ue1"])
+        self.assertEqual(aggregator.flush(), [])
+
+    def test_every_window_and_series_is_kept_apart(self):
+        aggregator = RollupAggregator(windows="10s,1m", measurements="ue_metrics")
+        for second in range(0, 60):
+            aggregator.add_lines(ue_line(second, 1, ue_id="ue1"))
+            aggregator.add_lines(ue_line(second, 2, ue_id="ue2"))
+        _, rollups = aggregator.add_lines(ue_line(60, 1))
+        names = sorted(series_key(rollup.to_line_protocol()) for rollup in rollups)
+        self.assertEqual(names.count("ue_metrics_10s,ue_id=ue2"), 1)  # Earlier 10s windows closed while the loop ran
+        self.assertIn("ue_metrics_1m,ue_id=ue1", names)
+        self.assertIn("ue_metrics_1m,ue_id=ue2", names)
+
+    def test_raw_points_are_sampled(self):
+        aggregator = RollupAggregator(windows="1m", measurements="ue_metrics", raw_sample_every=4)
+        kept = [aggregator.add_lines(ue_line(second, 1))[0] is not None for second in range(8)]
+        self.assertEqual(kept, [True, False, False, False, True, False, False, False])
+        dropping = RollupAggregator(windows="1m", measurements="ue_metrics", raw_sample_every=0)
+        self.assertIsNone(dropping.add_lines(ue_line(0, 1))[0])
+        self.assertFalse(dropping.handles("network_metrics network_load=1 0"))
+
+    def test_line_records_are_rolled_up_and_sampled_line_by_line(self):
+        aggregator = RollupAggregator(windows="10s", measurements="sector_metrics", raw_sample_every=2)
+        lines = [f"sector_metrics,sector_id=s1 sector_load={load} {second}\ngnodeb_metrics,gnodeb_id=g1 gnodeb_load=1 {second}"
+                 for second, load in ((100, 10.0), (101, 30.0))]
+        self.assertTrue(aggregator.handles(lines[0].encode('utf-8')))
+        self.assertEqual(aggregator.add_lines(lines[0].encode('utf-8')), (lines[0].encode('utf-8'), []))
+        # The second sector line is sampled out, the gNodeB line is not rolled up and always kept
+        self.assertEqual(aggregator.add_lines(lines[1]), (b"gnodeb_metrics,gnodeb_id=g1 gnodeb_load=1 101", []))
+        _, rollups = aggregator.add_lines("sector_metrics,sector_id=s1 sector_load=0 110")
+        self.assertEqual(rollups[0].to_line_protocol(),
+                         "sector_metrics_10s,sector_id=s1 sector_load_count=2i,sector_load_last=30,sector_load_max=30,"
+                         "sector_load_mean=20,sector_load_min=10 100")
+
+if __name__ == '__main__':
+    unittest.main()
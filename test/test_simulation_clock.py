@@ -0,0 +1,57 @@
+import time
+import threading
+import unittest
+from datetime import datetime
+from network.simulation_clock import SimulationClock
+
+class TestSimulationClock(unittest.TestCase):
+    def test_virtual_advance_does_not_wait_on_wall_time(self):
+        clock = SimulationClock(mode='virtual', speed=0, start=1000)
+        started = time.monotonic()
+        for _ in range(100):
+            clock.advance(1)
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(clock.time(), 1100)
+        self.assertEqual(clock.utcnow(), datetime.utcfromtimestamp(1100))
+
+    def test_after_records_simulated_latency(self):
+        clock = SimulationClock(mode='virtual', speed=0, start=0)
+        start = clock.now()
+        end = clock.after(start, 150)
+        self.assertEqual((end - start).total_seconds(), 0.15)
+        self.assertEqual(clock.total_simulated_latency, 150)
+        self.assertEqual(clock.time(), 0)  # Recording a latency does not move the shared clock
+
+    def test_sleep_waits_for_virtual_time(self):
+        clock = SimulationClock(mode='virtual', speed=0, start=0)
+        started, woke = threading.Event(), threading.Event()
+
+        def follower():
+            # The clock lock is reentrant and released while sleep() waits, so time cannot move before the target is set
+            with clock._condition:
+                started.set()
+                clock.sleep(3)
+            woke.set()
+
+        thread = threading.Thread(target=follower)
+        thread.start()
+        self.assertTrue(started.wait(1))
+        clock.advance(1)
+        clock.advance(1)
+        self.assertFalse(woke.wait(0.05))
+        clock.advance(1)
+        self.assertTrue(woke.wait(1))
+        thread.join()
+
+    def test_sleep_gives_up_after_the_wall_timeout(self):
+        clock = SimulationClock(mode='virtual', speed=0, start=0)
+        self.assertFalse(clock.sleep(1, timeout=0.01))
+        clock.advance(1)
+        self.assertEqual(clock.time(), 1)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            SimulationClock(mode='turbo')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import numpy as np
+from math import radians, sin, cos, sqrt, atan2
+from network.spatial_index import SpatialIndex
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    # Haversine distance in km, as network.utils.calculate_distance (not imported: network.utils loads every entity)
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 6371.0 * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        # Around Boston, plus points across the antimeridian
+        self.points = [(f"gnb{i}", lat, lon) for i, (lat, lon) in
+                       enumerate(zip(rng.uniform(42.0, 43.0, 300), rng.uniform(-72.0, -70.5, 300)))]
+        self.points += [("east", 0.0, 179.99), ("west", 0.0, -179.99)]
+        self.index = SpatialIndex(self.points, leaf_size=8)
+
+    def brute_force(self, latitude, longitude):
+        return sorted((calculate_distance(latitude, longitude, lat, lon), entity_id) for entity_id, lat, lon in self.points)
+
+    def test_radius_query_matches_haversine(self):
+        expected = [entity_id for distance, entity_id in self.brute_force(42.5, -71.2) if distance <= 15]
+        found = self.index.query_radius(42.5, -71.2, 15)
+        self.assertEqual([entity_id for entity_id, _ in found], expected)
+        self.assertAlmostEqual(found[0][1], self.brute_force(42.5, -71.2)[0][0], places=6)
+        self.assertEqual([entity_id for entity_id, _ in self.index.query_radius(0.0, 180.0, 5)], ["east", "west"])
+
+    def test_nearest(self):
+        expected = [entity_id for _, entity_id in self.brute_force(42.1, -70.6)[:5]]
+        self.assertEqual([entity_id for entity_id, _ in self.index.nearest(42.1, -70.6, k=5)], expected)
+        self.assertEqual(len(SpatialIndex().nearest(0, 0, k=3)), 0)
+
+    def test_add_and_remove(self):
+        self.index.add("new", 42.5, -71.2)
+        self.assertEqual(self.index.nearest(42.5, -71.2)[0][0], "new")
+        self.index.remove("new")
+        self.assertNotIn("new", self.index)
+        self.assertNotEqual(self.index.nearest(42.5, -71.2)[0][0], "new")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import logging
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from influxdb_client import Point, WritePrecision
+from database.database_manager import WritePipeline
+from database.spool import DiskSpool
+
+def make_point(ue_id, throughput):
+    return Point("ue_metrics").tag("ue_id", ue_id).field("throughput", float(throughput)).time(datetime(2024, 1, 1), WritePrecision.S)
+
+class TestDiskSpool(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+        logging.disable(logging.NOTSET)
+
+    def test_failed_batches_are_spooled_and_replayed(self):
+        spool = DiskSpool(self.path, replay_rate=0)
+        pipeline = WritePipeline(lambda bucket, records: 1 / 0, flush_interval=0.05, spool=spool)
+        pipeline.enqueue_many([make_point("ue1", 1), b"cell_metrics,cell_id=c1 cell_load=2 1704067200"], "RAN_metrics")
+        self.assertTrue(pipeline.flush(timeout=5))
+        pipeline.stop()
+        self.assertEqual(pipeline.stats()['spooled'], 2)
+        self.assertTrue(spool.has_pending())
+
+        replayed = []
+        self.assertEqual(spool.replay(lambda bucket, lines, precision: replayed.append((bucket, precision, lines))), 2)
+        self.assertEqual(replayed, [("RAN_metrics", "ns", ["ue_metrics,ue_id=ue1 throughput=1 1704067200000000000"]),
+                                    ("RAN_metrics", "s", ["cell_metrics,cell_id=c1 cell_load=2 1704067200"])])
+        self.assertFalse(spool.has_pending())
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_line_buffer_records_are_spooled_line_by_line(self):
+        spool = DiskSpool(self.path, replay_rate=0)
+        spool.append("RAN_metrics", [b"m,ue_id=ue1 f=1 1704067200\nm,ue_id=ue2 f=1 1704067200", {"measurement": "m", "fields": {"f": 1}, "time": 5}])
+        self.assertEqual(spool.stats()['spooled'], 3)
+        replayed = []
+        spool.replay(lambda bucket, lines, precision: replayed.append((precision, lines)))
+        self.assertEqual(sorted(replayed), [("ns", ["m f=1i 5"]), ("s", ["m,ue_id=ue1 f=1 1704067200", "m,ue_id=ue2 f=1 1704067200"])])
+
+    def test_unwritten_lines_survive_a_failed_replay_and_a_restart(self):
+        spool = DiskSpool(self.path, replay_rate=0, replay_batch=2)
+        spool.append("RAN_metrics", [f"m,ue_id=ue{i} f=1 {i}" for i in range(5)])
+        calls = []
+        def write(bucket, lines, precision):
+            calls.append(lines)
+            if len(calls) == 2:
+                raise ConnectionError("database down")
+        with self.assertRaises(ConnectionError):
+            spool.replay(write)
+        spool.stop()
+
+        restarted = DiskSpool(self.path, replay_rate=0)
+        replayed = []
+        restarted.replay(lambda bucket, lines, precision: replayed.extend(lines))
+        self.assertEqual(replayed, [f"m,ue_id=ue{i} f=1 {i}" for i in range(2, 5)])
+
+    def test_a_deleted_segment_is_dropped_from_the_replay(self):
+        spool = DiskSpool(self.path, replay_rate=0)
+        spool.append("RAN_metrics", ["m f=1 1"])
+        os.remove(os.path.join(self.path, os.listdir(self.path)[0]))
+        self.assertEqual(spool.replay(lambda bucket, lines, precision: None), 0)
+        self.assertEqual(spool.stats()['segments'], 0)
+        self.assertIsNone(spool._replaying)
+
+    def test_segments_rotate_and_oldest_are_dropped_when_full(self):
+        spool = DiskSpool(self.path, segment_bytes=20, max_bytes=60)
+        for i in range(10):
+            spool.append("RAN_metrics", [f"m f={i} {i}"])
+        stats = spool.stats()
+        self.assertLessEqual(stats['pending_bytes'], 60)
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(stats['spooled'], 10)
+        replayed = []
+        spool.replay(lambda bucket, lines, precision: replayed.extend(lines))
+        self.assertEqual(replayed[-1], "m f=9 9")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import logging
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from network.simulation_clock import SimulationClock
+from network.tick_kernel import TickKernel
+
+class TestTickKernel(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.calls = []
+        self.traffic_controller = MagicMock()
+        self.traffic_controller.calculate_batch_throughput.side_effect = lambda ues, severity: self.calls.append(('traffic', len(ues)))
+        self.network_load_manager = MagicMock()
+        self.network_load_manager.refresh_snapshot.side_effect = lambda: self.calls.append(('load',)) or SimpleNamespace(network_load=42.0)
+        self.network_load_manager.network_measurement.side_effect = lambda load: self.calls.append(('measurement', load))
+        self.ue_manager = SimpleNamespace(ues={f"ue{i}": SimpleNamespace(released=False) for i in range(3)}, _lock=threading.Lock())
+        self.clock = SimulationClock(mode='virtual', speed=0, start=0)
+        self.database_manager = MagicMock()
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def test_one_pass_per_tick(self):
+        kernel = TickKernel(self.traffic_controller, self.network_load_manager, self.ue_manager, clock=self.clock,
+                            phase_rates={'traffic': 1, 'load': 1, 'measurement': 1}, database_manager=self.database_manager)
+        kernel.tick()
+        self.assertEqual(self.calls, [('traffic', 3), ('load',), ('measurement', 42.0)])
+        self.network_load_manager.calculate_network_load.assert_not_called()  # The tick computes its own loads
+        self.database_manager.tick_scope.assert_called_once_with()
+
+    def test_phase_order_and_rates(self):
+        kernel = TickKernel(self.traffic_controller, self.network_load_manager, self.ue_manager, clock=self.clock,
+                            phase_order='load,traffic', phase_rates={'traffic': 1, 'load': 2}, database_manager=self.database_manager)
+        for _ in range(4):
+            kernel.tick()
+        self.assertEqual([call[0] for call in self.calls], ['load', 'traffic', 'traffic', 'load', 'traffic', 'traffic'])
+
+    def test_deleted_ues_are_skipped(self):
+        self.ue_manager.ues["ue1"].released = True
+        kernel = TickKernel(self.traffic_controller, self.network_load_manager, self.ue_manager, clock=self.clock,
+                            phase_order='traffic', database_manager=self.database_manager)
+        kernel.tick()
+        self.assertEqual(self.calls, [('traffic', 2)])
+
+    def test_a_failing_tick_does_not_stop_the_simulation(self):
+        kernel = TickKernel(self.traffic_controller, self.network_load_manager, self.ue_manager, clock=self.clock,
+                            phase_order='traffic', database_manager=self.database_manager)
+        outcomes = iter([RuntimeError("UE deleted during the tick"), None, None])
+
+        def traffic(ues, severity):
+            outcome = next(outcomes)
+            if outcome is not None:
+                raise outcome
+            if kernel.tick_count == 2:
+                kernel.stop()
+        self.traffic_controller.calculate_batch_throughput.side_effect = traffic
+        kernel.run()
+        self.assertEqual((kernel.tick_count, self.clock.time()), (3, 3))
+
+    def test_unknown_phase(self):
+        with self.assertRaises(ValueError):
+            TickKernel(self.traffic_controller, self.network_load_manager, self.ue_manager, clock=self.clock, phase_order='traffic,nap',
+                       database_manager=self.database_manager)
+
+if __name__ == '__main__':
+    unittest.main()
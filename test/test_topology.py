@@ -0,0 +1,31 @@
+import unittest
+import numpy as np
+from types import SimpleNamespace
+from network.topology import CompiledTopology
+from network.ue_store import UEStore
+
+def make_topology():
+    gNodeB = SimpleNamespace(ID="gnb1")
+    cells = [SimpleNamespace(ID="cell1", gNodeB=gNodeB), SimpleNamespace(ID="cell2", gNodeB=gNodeB)]
+    sectors = [SimpleNamespace(sector_id="s1", cell=cells[0], capacity=10, max_throughput=1000.0),
+               SimpleNamespace(sector_id="s2", cell=cells[0], capacity=10, max_throughput=1000.0),
+               SimpleNamespace(sector_id="s3", cell=cells[1], capacity=0, max_throughput=1000.0)]
+    return CompiledTopology(sectors, cells, [gNodeB])
+
+class TestCompiledTopology(unittest.TestCase):
+    def test_loads_are_reduced_through_the_parent_arrays(self):
+        store = UEStore(capacity=4)
+        for sector_id, throughput in (("s1", 500.0), ("s1", 20.0), ("s2", 50.0), ("unknown", 1e6)):
+            slot = store.allocate()
+            store.throughput[slot] = throughput
+            store.attach(slot, sector_id)
+        store.allocate()  # Not attached to any sector
+        loads = make_topology().compute(store)
+        # s1: 2 UEs of 10 and 100 + 20 capped throughput of 1000; s2: 1 UE and 50; s3 has no capacity
+        np.testing.assert_allclose(loads.sector_loads, [0.7 * 20 + 0.3 * 12, 0.7 * 10 + 0.3 * 5, 100])
+        np.testing.assert_allclose(loads.cell_loads, [(17.6 + 8.5) / 2, 100])
+        np.testing.assert_allclose(loads.gNodeB_loads, [(13.05 + 100) / 2])
+        self.assertAlmostEqual(loads.network_load, 56.525)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+from network.cell import Cell
+from network.sector import Sector, all_sectors
+from network.ue import UE
+from network.ue_registry import UERegistry, UELocation, OrderedUESet
+from network.ue_store import UEStore
+
+def make_cell(cell_id):
+    # Bypass __init__ (it asks an NTP server for the time and sleeps), only the UE lists are needed
+    cell = Cell.__new__(Cell)
+    cell.ID, cell.gNodeB_ID, cell.sectors, cell._ues = cell_id, "gnb1", [], OrderedUESet()
+    return cell
+
+def make_sector(sector_id, cell):
+    sector = Sector(sector_id=sector_id, cell_id=cell.ID, cell=cell, capacity=10, azimuth_angle=120, beamwidth=65,
+                    frequency=3500, duplex_mode="TDD", tx_power=40, bandwidth=100, mimo_layers=4, beamforming=True,
+                    ho_margin=3, load_balancing=1, max_throughput=1000000)
+    all_sectors[sector_id] = sector
+    cell.sectors.append(sector)
+    return sector
+
+class TestUERegistry(unittest.TestCase):
+    def setUp(self):
+        UERegistry._instance = None
+        self.registry = UERegistry.get_instance()
+
+    def tearDown(self):
+        UERegistry._instance = None
+        all_sectors.clear()
+
+    def test_ordered_set_keeps_insertion_order(self):
+        ues = OrderedUESet(["ue3", "ue1"])
+        ues.append("ue2")
+        ues.add("ue1")
+        ues.remove("ue3")
+        self.assertEqual(list(ues), ["ue1", "ue2"])
+        self.assertIn("ue2", ues)
+        with self.assertRaises(ValueError):
+            ues.remove("ue3")
+
+    def test_attach_handover_and_detach_keep_the_reverse_index(self):
+        self.registry.attach("ue1", "sector1", "cell1", "gnb1")
+        self.registry.attach("ue2", "sector1", "cell1", "gnb1")
+        previous = self.registry.handover("ue1", "sector2", "cell2", "gnb1")
+        self.assertEqual(previous, UELocation("sector1", "cell1", "gnb1"))
+        self.assertEqual(list(self.registry.sector_ues("sector1")), ["ue2"])
+        self.assertEqual(self.registry.locate("ue1"), UELocation("sector2", "cell2", "gnb1"))
+        self.assertEqual(self.registry.detach("ue1").sector_id, "sector2")
+        self.assertEqual((len(self.registry.sector_ues("sector2")), self.registry.sector_of("ue1")), (0, None))
+
+    @patch('network.sector.UE.deregister_ue')
+    @patch('network.sector.sector_logger')  # The log formatter asks an NTP server for the time
+    @patch('network.sector.DatabaseManager')
+    def test_handover_updates_the_sectors_and_the_cell_views(self, *_):
+        source_cell, target_cell = make_cell("cell1"), make_cell("cell2")
+        source, target = make_sector("sector1", source_cell), make_sector("sector2", target_cell)
+        ues = []
+        for ue_id in ("ue1", "ue2"):
+            ue = UE.__new__(UE)
+            ue.ID = ue_id
+            ue.bind_slot(UEStore())
+            source.add_ue(ue)
+            ues.append(ue)
+        connected = source_cell.ConnectedUEs  # Live view, updated by the sectors
+        target.add_ue(ues[0])
+        self.assertEqual((source.current_load, list(source.connected_ues), list(source.ues)), (1, ["ue2"], ["ue2"]))
+        self.assertEqual((target.current_load, list(target.connected_ues)), (1, ["ue1"]))
+        self.assertEqual(self.registry.locate("ue1"), UELocation("sector2", "cell2", "gnb1"))
+        self.assertEqual((list(connected), list(target_cell.assigned_UEs)), (["ue2"], ["ue1"]))
+        source.remove_ue("ue2")
+        self.assertEqual((len(connected), source_cell.IsActive), (0, False))
+        view = target_cell.ConnectedUEs
+        target_cell.update_ue_lists()  # A full rebuild gives the same UEs, in the same set
+        self.assertIs(target_cell.ConnectedUEs, view)
+        self.assertEqual(list(view), ["ue1"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from network.ue import UE, ReleasedUEError
+from network.ue_store import UEStore, ue_slots
+
+def make_ue(store, ue_id, sector_id, throughput):
+    # Bypass __init__ (it registers the UE and logs), only the store backed attributes are needed
+    ue = UE.__new__(UE)
+    ue.ID = ue_id
+    ue.bind_slot(store)
+    ue.ConnectedSector = sector_id
+    ue.throughput = throughput
+    return ue
+
+class TestUEStore(unittest.TestCase):
+    def setUp(self):
+        self.store = UEStore(capacity=2)
+
+    def test_ue_attributes_are_views_over_the_columns(self):
+        ue = make_ue(self.store, "ue1", "sector1", 10.0)
+        ue.Location = {'latitude': 42.5, 'longitude': -71.25}
+        ue.BatteryLevel = 80
+        ue.traffic_factor = None  # None restores the column default
+        self.assertEqual(self.store.throughput[ue._slot], 10.0)
+        self.assertEqual(ue.Location, [42.5, -71.25])
+        self.assertEqual((ue.BatteryLevel, ue.traffic_factor, ue.ConnectedSector), (80, 1.0, "sector1"))
+        self.assertIsInstance(ue.throughput, float)
+        ue.connected_sector = "sector2"
+        self.assertEqual(ue.ConnectedSector, "sector2")
+
+    def test_columns_grow_and_slots_are_reused(self):
+        ues = [make_ue(self.store, f"ue{i}", "sector1", float(i)) for i in range(5)]
+        self.assertGreaterEqual(self.store.capacity, 5)
+        self.assertEqual([ue.throughput for ue in ues], [0.0, 1.0, 2.0, 3.0, 4.0])
+        slot = ues[2]._slot
+        self.assertFalse(ues[2].released)
+        ues[2].release_slot()
+        self.assertTrue(ues[2].released)
+        self.assertEqual(len(self.store), 4)
+        self.assertEqual(make_ue(self.store, "ue9", None, 0.0)._slot, slot)
+        with self.assertRaises(ReleasedUEError):
+            ues[2].throughput
+        with self.assertRaises(ReleasedUEError):
+            ue_slots(ues)
+
+    def test_vectorized_sector_sums(self):
+        ues = [make_ue(self.store, "ue1", "sector1", 5.0), make_ue(self.store, "ue2", "sector1", 50.0),
+               make_ue(self.store, "ue3", "sector2", 7.0)]
+        self.assertEqual(self.store.capped_sum('throughput', ue_slots(ues[:2]), 20.0), 25.0)
+        sums = self.store.sum_by_sector('throughput', caps=np.array([20.0, 100.0]))
+        self.assertEqual(sums.tolist(), [25.0, 7.0])
+
+    def test_running_sector_sums_follow_attach_detach_and_throughput(self):
+        ues = [make_ue(self.store, f"ue{i}", "sector1", 0.0) for i in range(3)]
+        for ue in ues:
+            self.store.attach(ue._slot, "sector1", cap=20.0)
+        self.store.pop_dirty_sectors()
+        ues[0].throughput = 50.0  # Counted capped at 20
+        self.store.set_throughputs(ue_slots(ues[1:]), np.array([5.0, 7.0]))
+        index = self.store.sector_index_of("sector1")
+        self.assertEqual((self.store.sector_ue_count[index], self.store.sector_capped_throughput[index]), (3, 32.0))
+        self.assertEqual(self.store.pop_dirty_sectors(), ["sector1"])
+        self.store.attach(ues[1]._slot, "sector2")  # Moves out of sector1
+        ues[2].release_slot()
+        self.assertEqual((self.store.sector_ue_count[index], self.store.sector_capped_throughput[index]), (1, 20.0))
+        self.assertEqual(self.store.pop_dirty_sectors(), ["sector1", "sector2"])
+        self.store.set_throughput_cap("sector1", 10.0)
+        self.assertEqual(self.store.sector_capped_throughput[index], 10.0)
+        self.store.sector_capped_throughput[index] = 0.0
+        self.store.recount_sectors()
+        self.assertEqual(self.store.sector_capped_throughput[index], 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import threading
+import time
+import unittest
+from database.database_manager import WritePipeline
+
+class TestWritePipeline(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def write_fn(self, bucket, records):
+        self.batches.append((bucket, list(records)))
+
+    def test_batches_by_size_and_bucket(self):
+        pipeline = WritePipeline(self.write_fn, batch_size=3, flush_interval=10, max_queue_size=100, overflow_policy='block')
+        for i in range(6):
+            pipeline.enqueue(f"point{i}", 'metrics' if i % 2 else 'logs')
+        self.assertTrue(pipeline.flush(timeout=2))
+        written = [record for _, records in self.batches for record in records]
+        self.assertEqual(sorted(written), [f"point{i}" for i in range(6)])
+        self.assertTrue(all(len(records) <= 3 for _, records in self.batches))
+        self.assertEqual({bucket for bucket, _ in self.batches}, {'metrics', 'logs'})
+        stats = pipeline.stats()
+        self.assertEqual(stats['written'], 6)
+        self.assertEqual(stats['queue_depth'], 0)
+        pipeline.stop()
+
+    def test_flush_interval_writes_partial_batch(self):
+        pipeline = WritePipeline(self.write_fn, batch_size=100, flush_interval=0.05, max_queue_size=100)
+        pipeline.enqueue("point", 'metrics')
+        deadline = time.monotonic() + 2
+        while not self.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.batches, [('metrics', ["point"])])
+        pipeline.stop()
+
+    def test_enqueue_does_not_wait_on_slow_writes(self):
+        release = threading.Event()
+        pipeline = WritePipeline(lambda bucket, records: release.wait(2), batch_size=1, flush_interval=10, max_queue_size=1000)
+        started = time.monotonic()
+        for i in range(500):
+            pipeline.enqueue(i, 'metrics')
+        self.assertLess(time.monotonic() - started, 0.5)
+        release.set()
+        pipeline.stop()
+
+    def test_drop_oldest_policy(self):
+        pipeline = WritePipeline(self.write_fn, batch_size=100, flush_interval=10, max_queue_size=3, overflow_policy='drop_oldest')
+        for i in range(5):
+            pipeline.enqueue(i, 'metrics')
+        pipeline.flush(timeout=2)
+        self.assertEqual(self.batches, [('metrics', [2, 3, 4])])
+        self.assertEqual(pipeline.stats()['dropped'], 2)
+        pipeline.stop()
+
+    def test_sample_policy(self):
+        pipeline = WritePipeline(self.write_fn, batch_size=100, flush_interval=10, max_queue_size=2, overflow_policy='sample', sample_every=3)
+        accepted = [pipeline.enqueue(i, 'metrics') for i in range(8)]
+        self.assertEqual(accepted, [True, True, False, False, True, False, False, True])
+        pipeline.flush(timeout=2)
+        self.assertEqual(self.batches, [('metrics', [4, 7])])
+        pipeline.stop()
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            WritePipeline(self.write_fn, overflow_policy='ignore')
+
+if __name__ == '__main__':
+    unittest.main()
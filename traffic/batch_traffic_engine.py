@@ -0,0 +1,149 @@
+#############################################################################################################################
+# batch_traffic_engine.py is in traffic folder. The BatchTrafficEngine class generates one tick of traffic for a whole      #
+# population of UEs at once. Instead of drawing a handful of Python random values per UE and building a dict per UE, it     #
+# groups the UEs by service type and draws data_size, delay, jitter and packet loss for every UE of that type with NumPy.   #
+# The engine is driven by the same voice/video/gaming/iot/data traffic tables and SEVERITY_LEVELS used by TrafficController #
+# and returns columnar arrays (one array per metric, aligned with the order of the UEs passed in).                          #
+#############################################################################################################################
+import numpy as np
+
+# Service types understood by the engine, keyed the same way TrafficController.generate_traffic dispatches them
+SERVICE_TYPES = ('voice', 'video', 'game', 'iot', 'data')
+
+class BatchTrafficEngine:
+    def __init__(self, traffic_params, severity_levels, seed=None):
+        """
+        :param traffic_params: Dictionary keyed by service type ('voice', 'video', 'game', 'iot', 'data') holding the
+                               same parameter tables as TrafficController (e.g. {'voice': {'bitrate': (8, 16)}, ...}).
+        :param severity_levels: The SEVERITY_LEVELS table (multiplier, delay, jitter and packet_loss_rate per level).
+        :param seed: Optional seed for the random generator, useful for reproducible runs.
+        """
+        self.traffic_params = traffic_params
+        self.severity_levels = severity_levels
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_controller(cls, traffic_controller, seed=None):
+        """Build an engine that shares the traffic tables of an existing TrafficController."""
+        traffic_params = {
+            'voice': traffic_controller.voice_traffic_params,
+            'video': traffic_controller.video_traffic_params,
+            'game': traffic_controller.gaming_traffic_params,
+            'iot': traffic_controller.iot_traffic_params,
+            'data': traffic_controller.data_traffic_params,
+        }
+        return cls(traffic_params, traffic_controller.SEVERITY_LEVELS, seed=seed)
+
+    def generate(self, ues, severity='zero'):
+        """
+        Generate one tick of traffic for every UE in ues.
+
+        UEs that are not generating traffic get a zero data_size and no delay, jitter or loss, like
+        TrafficController.generate_traffic. The data size of every UE is scaled once by its traffic_factor.
+
+        :param ues: A sequence of UE instances.
+        :param severity: Name of the severity level to apply to the whole batch.
+        :return: Dictionary of columnar arrays aligned with ues: 'ue_ids', 'service_types', 'data_size' (bytes),
+                 'interval' (seconds), 'ue_delay', 'ue_jitter' and 'ue_packet_loss_rate'.
+        """
+        severity_settings = self.severity_levels.get(severity, self.severity_levels['zero'])
+        count = len(ues)
+
+        ue_ids = [ue.ID for ue in ues]
+        service_types = [str(ue.ServiceType).lower() for ue in ues]
+        traffic_factor = np.fromiter((ue.traffic_factor for ue in ues), dtype=np.float64, count=count)
+        active = np.fromiter((bool(ue.generating_traffic) for ue in ues), dtype=bool, count=count)
+
+        data_size = np.zeros(count, dtype=np.int64)
+        interval = np.ones(count, dtype=np.float64)
+        delay = np.zeros(count, dtype=np.float64)
+        jitter = np.zeros(count, dtype=np.float64)
+        packet_loss_rate = np.zeros(count, dtype=np.float64)
+
+        # Group the active UEs by service type so every type is drawn with a single call per metric
+        groups = {service_type: [] for service_type in SERVICE_TYPES}
+        for index, service_type in enumerate(service_types):
+            if not active[index]:
+                continue
+            if service_type not in groups:
+                raise ValueError(f"Unknown service type: {ues[index].ServiceType}")
+            groups[service_type].append(index)
+
+        generators = {
+            'voice': self._voice,
+            'video': self._video,
+            'game': self._gaming,
+            'iot': self._iot,
+            'data': self._data,
+        }
+        for service_type, indices in groups.items():
+            if not indices:
+                continue
+            indices = np.asarray(indices, dtype=np.intp)
+            size, group_interval = generators[service_type](len(indices), severity_settings)
+            data_size[indices] = np.floor(size * traffic_factor[indices]).astype(np.int64)
+            interval[indices] = group_interval
+
+        # Delay, jitter and loss rate only depend on the severity, so they are drawn for all active UEs together
+        active_indices = np.flatnonzero(active)
+        delay[active_indices] = self.rng.uniform(*severity_settings['delay'], size=len(active_indices))
+        jitter_setting = severity_settings['jitter']
+        jitter_max = jitter_setting if isinstance(jitter_setting, int) else jitter_setting[1]
+        if jitter_max > 0:
+            jitter[active_indices] = self.rng.uniform(0, jitter_max, size=len(active_indices))
+        packet_loss_rate[active_indices] = severity_settings['packet_loss_rate']
+
+        return {
+            'ue_ids': ue_ids,
+            'service_types': service_types,
+            'data_size': data_size,
+            'interval': interval,
+            'ue_delay': delay,
+            'ue_jitter': jitter,
+            'ue_packet_loss_rate': packet_loss_rate,
+        }
+##############################################################################################################################
+    def _lost(self, count, severity_settings):
+        """Boolean mask of packets lost according to the severity packet loss rate."""
+        return self.rng.random(count) < severity_settings['packet_loss_rate']
+
+    def _voice(self, count, severity_settings):
+        interval = 0.02  # Interval duration in seconds
+        bitrate = self.rng.uniform(*self.traffic_params['voice']['bitrate'], size=count) * severity_settings['multiplier']
+        size = np.floor((bitrate * interval) / 8 * 1024)
+        size[self._lost(count, severity_settings)] = 0
+        return size, interval
+
+    def _video(self, count, severity_settings):
+        interval = 1  # Interval duration in seconds
+        low, high = self.traffic_params['video']['num_streams']
+        num_streams = self.rng.integers(low, high, endpoint=True, size=count) * severity_settings['multiplier']
+        # Draw every stream of every UE in one go, then sum the surviving streams back per UE
+        owners = np.repeat(np.arange(count), num_streams)
+        stream_bitrate = self.rng.uniform(*self.traffic_params['video']['stream_bitrate'], size=len(owners)) * severity_settings['multiplier']
+        stream_size = np.floor((stream_bitrate * interval) / 8 * 1024 * 1024)
+        stream_size[self._lost(len(owners), severity_settings)] = 0
+        size = np.bincount(owners, weights=stream_size, minlength=count)
+        return size, interval
+
+    def _gaming(self, count, severity_settings):
+        interval = 0.1  # Interval duration in seconds
+        bitrate = self.rng.uniform(*self.traffic_params['game']['bitrate'], size=count) * severity_settings['multiplier']
+        size = np.floor((bitrate * interval) / 8 * 1024)
+        size[self._lost(count, severity_settings)] = 0
+        return size, interval
+
+    def _iot(self, count, severity_settings):
+        low, high = self.traffic_params['iot']['packet_size']
+        packet_size = self.rng.integers(low, high, endpoint=True, size=count) * severity_settings['multiplier']
+        interval = self.rng.uniform(*self.traffic_params['iot']['interval'], size=count) * severity_settings['multiplier']
+        size = (packet_size * 1024).astype(np.float64)
+        size[self._lost(count, severity_settings)] = 0
+        return size, interval
+
+    def _data(self, count, severity_settings):
+        bitrate = self.rng.uniform(*self.traffic_params['data']['bitrate'], size=count) * severity_settings['multiplier']
+        interval = self.rng.uniform(*self.traffic_params['data']['interval'], size=count) * severity_settings['multiplier']
+        size = np.floor((bitrate * interval) / 8 * 1024 * 1024)
+        size[self._lost(count, severity_settings)] = 0
+        return size, interval
@@ -6,13 +6,17 @@
 # of network conditions ranging from low to ultra severity.                                                                 #
 #############################################################################################################################
 import random
-import time
 from datetime import datetime
+import numpy as np
 from logs.logger_config import traffic_update_logger
-from network.ue import UE
+from network.ue import UE, UE_METRICS_LINE
+from network.ue_store import UEStore, ue_slots
 from database.database_manager import DatabaseManager
+from database.line_protocol import LineBuffer
 import threading
 from network.ue_manager import UEManager
+from traffic.batch_traffic_engine import BatchTrafficEngine
+from network.simulation_clock import SimulationClock
 import os
 class TrafficController:
     _instance = None
@@ -60,6 +64,9 @@ class TrafficController:
         self.ue_data_jitter = 0
         self.ue_data_delay = 0
         self.ue_data_packet_loss_rate = 0.1
+        self.clock = SimulationClock.get_instance()  # Simulation time source, delay and jitter are recorded as simulated latencies
+        self.batch_engine = BatchTrafficEngine.from_controller(self)  # Vectorized engine sharing the traffic tables above
+        self.line_buffer = LineBuffer()  # Reused by calculate_batch_throughput for the ue_metrics lines of a tick
     
     #Defines parameters for different severity levels of network conditions
     SEVERITY_LEVELS = {
@@ -101,8 +108,8 @@ class TrafficController:
             print(f"Traffic generation for UE {ue.ID} is stopped.")
             return {
                 'data_size': 0,
-                'start_timestamp': datetime.now(),
-                'end_timestamp': datetime.now(),
+                'start_timestamp': self.clock.now(),
+                'end_timestamp': self.clock.now(),
                 'interval': 1,
                 'ue_delay': 0,
                 'ue_jitter': 0,
@@ -143,7 +150,7 @@ class TrafficController:
                 "ue_packet_loss_rate": float(ue.ue_packet_loss_rate),
                 "ue_delay": float(ue.ue_delay),
             },
-            "time": datetime.utcnow().isoformat(),
+            "time": self.clock.utcnow().isoformat(),
         }
 
         # Write to InfluxDB
@@ -159,9 +166,8 @@ class TrafficController:
     def generate_voice_traffic(self, ue, severity='zero'):
         severity_settings = self.SEVERITY_LEVELS.get(severity, self.SEVERITY_LEVELS['zero'])
         # Adjust parameters based on severity
-        start_time = datetime.now()
+        start_time = self.clock.now()
         delay = random.uniform(*severity_settings['delay'])
-        time.sleep(delay)  # Use severity-specific delay
 
         # Ensure jitter is an integer before comparison
         jitter_setting = severity_settings['jitter']
@@ -175,12 +181,11 @@ class TrafficController:
         # Apply UE's traffic_factor to scale the data size (use for dynamic increase or decrease of the ue traffic)
         scaled_data_size = int(data_size * ue.traffic_factor)  # Scaling the data size according to the UE's traffic factor     
 
-        time.sleep(jitter)
         packet_loss_occurred = random.random() < severity_settings['packet_loss_rate']
 
         if packet_loss_occurred:
             data_size = 0  # Packet is lost
-        end_time = datetime.now()
+        end_time = self.clock.after(start_time, delay + jitter)  # Delay and jitter advance simulated time, not wall time
         traffic_data = {
             'data_size': scaled_data_size,
             'start_timestamp': start_time,
@@ -196,15 +201,13 @@ class TrafficController:
     def generate_video_traffic(self,ue, severity='zero'):
         severity_settings = self.SEVERITY_LEVELS.get(severity, self.SEVERITY_LEVELS['zero'])
         # Adjust parameters based on severity
-        start_time = datetime.now()
+        start_time = self.clock.now()
         delay = random.uniform(*severity_settings['delay'])
-        time.sleep(delay)  # Use severity-specific delay
 
         # Ensure jitter is an integer before comparison
         jitter_setting = severity_settings['jitter']
         jitter_max = jitter_setting if isinstance(jitter_setting, int) else jitter_setting[1]  # Use the second value if it's a tuple
         jitter = random.uniform(0, jitter_max) if jitter_max > 0 else 0
-        time.sleep(jitter)  # Apply jitter
 
         # Adjust the number of streams and bitrate based on severity
         num_streams = random.randint(*self.video_traffic_params['num_streams']) * severity_settings['multiplier']
@@ -221,7 +224,7 @@ class TrafficController:
             scaled_data_size += int((stream_bitrate * interval) / 8 * 1024 * 1024)
 
         # Record the end timestamp
-        end_time = datetime.now()
+        end_time = self.clock.after(start_time, delay + jitter)  # Delay and jitter advance simulated time, not wall time
         traffic_data = {
             'data_size': scaled_data_size,  # Now in bytes and ensured to be an integer
             'start_timestamp': start_time,
@@ -240,10 +243,9 @@ class TrafficController:
 
         try:
             # Record the start timestamp
-            start_time = datetime.now()
+            start_time = self.clock.now()
             # Adjust delay based on severity
             delay = random.uniform(*severity_settings['delay'])
-            time.sleep(delay)  # Use gaming-specific delay adjusted for severity
 
             # Ensure jitter is an integer before comparison
             jitter_setting = severity_settings['jitter']
@@ -260,16 +262,13 @@ class TrafficController:
             # Apply UE's traffic_factor to scale the data size (use for dynamic increase or decrease of the ue traffic)
             scaled_data_size = int(data_size * ue.traffic_factor)  # Scaling the data size according to the UE's traffic factor
 
-            # Apply jitter
-            time.sleep(jitter)
-
             # Simulate packet loss based on severity
             packet_loss_occurred = random.random() < severity_settings['packet_loss_rate']
             if packet_loss_occurred:
                 scaled_data_size = 0  # Packet is lost
 
             # Record the end timestamp
-            end_time = datetime.now()
+            end_time = self.clock.after(start_time, delay + jitter)  # Delay and jitter advance simulated time, not wall time
             traffic_data = {
                 'data_size': scaled_data_size,  # Now in bytes and ensured to be an integer
                 'start_timestamp': start_time,
@@ -286,8 +285,8 @@ class TrafficController:
             # Handle the exception by returning a default data structure with severity-adjusted parameters
             return {
                 'data_size': 0,  # Ensure this is consistent even in error handling
-                'start_timestamp': datetime.now(),
-                'end_timestamp': datetime.now(),
+                'start_timestamp': self.clock.now(),
+                'end_timestamp': self.clock.now(),
                 'interval': 0.1,
                 'ue_delay': severity_settings['delay'][0],  # Use the lower bound of the delay range for simplicity
                 'ue_jitter': 0,
@@ -298,10 +297,9 @@ class TrafficController:
         severity_settings = self.SEVERITY_LEVELS.get(severity, self.SEVERITY_LEVELS['zero'])
 
         # Record the start timestamp
-        start_time = datetime.now()
+        start_time = self.clock.now()
         # Adjust delay based on severity
         delay = random.uniform(*severity_settings['delay'])
-        time.sleep(delay)  # Use IoT-specific delay adjusted for severity
 
         # Ensure jitter is an integer before comparison
         jitter_setting = severity_settings['jitter']
@@ -317,15 +315,12 @@ class TrafficController:
         # Apply UE's traffic_factor to scale the data size (use for dynamic increase or decrease of the ue traffic)
         scaled_data_size = int(data_size * ue.traffic_factor)  # Scaling the data size according to the UE's traffic factor
 
-        # Apply jitter
-        time.sleep(jitter)
-
         # Simulate packet loss based on severity
         if random.random() < severity_settings['packet_loss_rate']:
             scaled_data_size = 0  # Packet is lost
 
         # Record the end timestamp
-        end_time = datetime.now()
+        end_time = self.clock.after(start_time, delay + jitter)  # Delay and jitter advance simulated time, not wall time
         traffic_data = {
             'data_size': scaled_data_size,  # Now in bytes and ensured to be an integer
             'start_timestamp': start_time,
@@ -342,10 +337,9 @@ class TrafficController:
         severity_settings = self.SEVERITY_LEVELS.get(severity, self.SEVERITY_LEVELS['zero'])
 
         # Record the start timestamp
-        start_time = datetime.now()
+        start_time = self.clock.now()
         # Adjust delay based on severity
         delay = random.uniform(*severity_settings['delay'])
-        time.sleep(delay)  # Use data-specific delay adjusted for severity
 
         # Ensure jitter is an integer before comparison
         jitter_setting = severity_settings['jitter']
@@ -361,15 +355,12 @@ class TrafficController:
         # Apply UE's traffic_factor to scale the data size (use for dynamic increase or decrease of the ue traffic)
         scaled_data_size = int(data_size * ue.traffic_factor)  # Scaling the data size according to the UE's traffic factor
 
-        # Apply jitter
-        time.sleep(jitter)
-
         # Simulate packet loss based on severity
         if random.random() < severity_settings['packet_loss_rate']:
             scaled_data_size = 0  # Packet is lost
 
         # Record the end timestamp
-        end_time = datetime.now()
+        end_time = self.clock.after(start_time, delay + jitter)  # Delay and jitter advance simulated time, not wall time
         traffic_data = {
             'data_size': scaled_data_size,  # Now in bytes and ensured to be an integer
             'start_timestamp': start_time,
@@ -390,6 +381,57 @@ class TrafficController:
                 traffic_data = self.generate_traffic(ue)
                 all_traffic_data.append(traffic_data)
             return all_traffic_data
+############################################################################################
+    def generate_batch_traffic(self, ues, severity='zero'):
+        """
+        Generate one tick of traffic for all given UEs with the vectorized BatchTrafficEngine.
+
+        :param ues: A sequence of UE instances.
+        :param severity: Severity level applied to the whole batch.
+        :return: Dictionary of columnar arrays aligned with ues (see BatchTrafficEngine.generate).
+        """
+        traffic_data = self.batch_engine.generate(ues, severity)
+
+        # Update the UEs after generating traffic data, as generate_traffic does, with one scatter per UE store column
+        slots = ue_slots(ues)
+        store = UEStore.get_instance()
+        store.ue_delay[slots] = traffic_data['ue_delay']
+        store.ue_jitter[slots] = traffic_data['ue_jitter']
+        store.ue_packet_loss_rate[slots] = traffic_data['ue_packet_loss_rate']
+
+        return traffic_data
+############################################################################################
+    def calculate_batch_throughput(self, ues, severity='zero'):
+        """
+        Batch counterpart of calculate_throughput: generates traffic for all given UEs in one pass, updates their
+        throughput and writes one ue_metrics line per UE in a single line-protocol record.
+
+        :param ues: A sequence of UE instances.
+        :param severity: Severity level applied to the whole batch.
+        :return: The columnar traffic data of generate_batch_traffic plus a 'throughput' column in bits/s.
+        """
+        traffic_data = self.generate_batch_traffic(ues, severity)
+
+        # Calculate throughput, 0 where the interval is not positive
+        interval = traffic_data['interval']
+        data_size_bits = traffic_data['data_size'] * 8
+        throughput = np.divide(data_size_bits, interval, out=np.zeros(len(ues), dtype=np.float64), where=interval > 0)
+        traffic_data['throughput'] = throughput
+
+        UEStore.get_instance().set_throughputs(ue_slots(ues), throughput)  # Also updates the sector load sums
+
+        # One line per UE with the precompiled ue_metrics template, formatted from the columns (signal strength is not
+        # part of the tick) into the reusable buffer, which is queued as a single record
+        timestamp = int(self.clock.time())
+        self.line_buffer.clear()
+        columns = zip(throughput.tolist(), traffic_data['ue_jitter'].tolist(), traffic_data['ue_packet_loss_rate'].tolist(),
+                      traffic_data['ue_delay'].tolist())
+        for ue, (ue_throughput, jitter, packet_loss_rate, delay) in zip(ues, columns):
+            prefix = UE_METRICS_LINE.cached_prefix(ue, (str(ue.ID), str(ue.ServiceType)))
+            UE_METRICS_LINE.write(self.line_buffer, prefix, (ue_throughput, jitter, packet_loss_rate, delay, None), timestamp)
+
+        DatabaseManager.get_instance().insert_line_protocol(self.line_buffer)
+        return traffic_data
 ############################################################################################
     def add_ue(self, ue):
         if ue.ID not in self.ues:
@@ -490,6 +532,12 @@ class TrafficController:
         if not isinstance(ue, UE):
             raise TypeError("Invalid UE object")
 
+        # generate_traffic and _calculate_throughput write ue_metrics rows of the UE with the same timestamp; merge
+        # them into one point, also when called outside a tick of the TickKernel (API, CLI)
+        with DatabaseManager.get_instance().tick_scope():
+            return self._calculate_throughput(ue)
+
+    def _calculate_throughput(self, ue):
         # Generate traffic and retrieve traffic parameters for the UE
         traffic_data = self.generate_traffic(ue)
 
@@ -515,34 +563,19 @@ class TrafficController:
         ue.throughput = throughput
 
         #print(f"UE {ue.ID} throughput: {throughput} bits/s")
-        # Prepare the data for InfluxDB with units for clarity
-        influxdb_data = {
-            "measurement": "ue_metrics",
-            "tags": {
-                "ue_id": ue.ID,
-                "service_type": ue.ServiceType,
+        # Queue the row for the batched writer, recent metrics are served by DatabaseManager.get_recent_ue_metrics.
+        # Written as a row (not a Point) so the tick_scope merges it with the one of generate_traffic
+        DatabaseManager.get_instance().insert_data(
+            measurement_or_point="ue_metrics",
+            tags={"ue_id": ue.ID, "service_type": ue.ServiceType},
+            fields={
+                "throughput": throughput,
+                "ue_jitter": float(jitter),
+                "ue_packet_loss_rate": float(packet_loss_rate),
+                "ue_delay": float(ue_delay),
             },
-            "fields": {
-                "throughput": throughput, 
-            },
-            "time": datetime.utcnow().isoformat(),
-        }
-        #print('******traffic Gen******influxdb_data:', influxdb_data)
-        # Assuming DatabaseManager and other necessary imports are correctly handled
-        database_manager = DatabaseManager()
-        # If preparing a data dictionary for insertion
-        influxdb_data['fields']['throughput'] = int(influxdb_data['fields']['throughput'])
-
-        database_manager.insert_data(
-            measurement_or_point=influxdb_data["measurement"],
-            tags=influxdb_data["tags"],
-            fields=influxdb_data["fields"],
-            timestamp=influxdb_data["time"]
+            timestamp=self.clock.utcnow()
         )
-        #print('--------------------------ue.ID-----------------------------------:',ue.ID)
-        ue_ID = ue.ID
-        database_manager.get_ue_metrics(ue_ID)
-        database_manager.close_connection()
 
         # Return the raw numeric value of throughput along with other metrics
         return {